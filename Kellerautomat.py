@@ -1,8 +1,2977 @@
-import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-from typing import List, Tuple, Dict
+import argparse
+import hashlib
+import json
+import operator
+import pickle
+import random
+import sys
+from typing import List, Tuple, Dict, Iterable, Iterator, Optional, NamedTuple
+from abc import ABC, abstractmethod
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import mmap
+import multiprocessing
+import os
+import queue
+import threading
 import time
 
+try:
+    import tkinter as tk
+    from tkinter import ttk, messagebox, scrolledtext, filedialog
+except ImportError:  # nur für die GUI; Engine und Kommandozeile laufen ohne Tk
+    tk = ttk = messagebox = scrolledtext = filedialog = None
+
+try:
+    import numpy as np
+except ImportError:  # optional, nur für accepts_batch
+    np = None
+
+try:
+    import yaml
+except ImportError:  # optional, nur für YAML-Definitionen
+    yaml = None
+
+
+# Ergebnisse eines Schritts bzw. Laufs
+RUNNING = "running"
+ACCEPTED = "accepted"
+REJECTED = "rejected"
+FINISHED = "finished"
+STACK_EMPTY = "stack_empty"
+CANCELLED = "cancelled"
+DIVERGED = "diverged"  # endlose epsilon-Übergänge am Ende der Eingabe
+
+# Art einer epsilon-Makrotransition (siehe CompiledTable.epsilon_macros)
+MACRO_EXPOSE = 0   # Top wurde abgebaut, darunter geht es weiter
+MACRO_STUCK = 1    # keine epsilon-Transition mehr
+MACRO_ACCEPT = 2   # Endzustand erreicht
+MACRO_DIVERGE = 3  # epsilon-Zyklus, hält nie an
+
+
+class ExplorationLimitError(RuntimeError):
+    """Nichtdeterministische Suche hat das Konfigurationslimit überschritten"""
+
+
+def transition_targets(target) -> list:
+    """Liefert alle Ziele eines Übergangs (eine Liste bei Nichtdeterminismus)"""
+    return target if isinstance(target, list) else [target]
+
+
+# Mitgelieferte Automaten-Definitionen (im PyInstaller-Bundle unter sys._MEIPASS)
+AUTOMATA_DIR = os.path.join(getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__))),
+                            "automata")
+DEFINITION_SUFFIXES = (".json", ".yaml", ".yml")
+# Version des Cache-Formats; erhöhen, wenn sich CompiledTable ändert
+CACHE_VERSION = 2
+
+TRANSITION_KEYS = {"state", "input", "top", "next", "push", "comment"}
+DEFINITION_KEYS = {"label", "start_state", "initial_stack_symbol", "accepting_states",
+                   "transitions", "examples", "info", "grammar"}
+# Felder, die bei einer Grammatik-Definition der Compiler erzeugt
+PDA_KEYS = {"start_state", "initial_stack_symbol", "accepting_states", "transitions"}
+# Kandidaten für das Kellerbodensymbol, das in der Grammatik nicht vorkommen darf
+BOTTOM_SYMBOLS = ("Z", "$", "⊥")
+
+
+class DefinitionError(ValueError):
+    """Ungültige Automaten-Definition"""
+
+
+# Binärspur eines Laufs (siehe TraceWriter): Kopf, Schritte, Fußteil fester Länge
+TRACE_MAGIC = b"PDAT\x01"
+TRACE_FOOTER_MAGIC = b"PDAE"
+TRACE_FOOTER_SIZE = 8 + 1 + len(TRACE_FOOTER_MAGIC)
+TRACE_RESULTS = (RUNNING, ACCEPTED, REJECTED, FINISHED, STACK_EMPTY, CANCELLED, DIVERGED)
+# Beim Lesen wird die Spur in Blöcken dieser Größe (Bytes) aus dem mmap kopiert
+TRACE_READ_CHUNK = 1 << 20
+
+# Zufallswörter: so oft hintereinander darf eine gezogene Länge leer ausgehen
+SAMPLE_ATTEMPTS = 1000
+
+# Heatmap der Profil-Tabelle: weiß (nie benutzt) bis rot (häufigster Übergang)
+HEAT_COLORS = tuple("#%02x%02x%02x" % (255 - (255 - 0xe7) * i // 9, 255 - (255 - 0x4c) * i // 9,
+                                       255 - (255 - 0x3c) * i // 9) for i in range(10))
+
+
+class TraceError(ValueError):
+    """Ungültige oder unvollständige Trace-Datei"""
+
+
+class Grammar:
+    """Kontextfreie Grammatik; Nichtterminale sind die linken Seiten der Regeln
+
+    Produktionen sind Paare (A, rechte Seite als Tupel von Symbolen), die
+    leere rechte Seite steht für A -> epsilon. Alle übrigen Symbole sind
+    Terminale und müssen einzelne Zeichen sein.
+    """
+
+    def __init__(self, start: str, productions: List[Tuple[str, Tuple[str, ...]]]):
+        self.start = start
+        self.productions = productions
+        self.nonterminals = list(dict.fromkeys(lhs for lhs, _ in productions))
+        self.terminals = sorted({symbol for _, rhs in productions for symbol in rhs
+                                 if symbol not in self.nonterminals})
+        # Nichtterminale, die epsilon ableiten (Fixpunkt)
+        self.nullable = set()
+        changed = True
+        while changed:
+            changed = False
+            for lhs, rhs in productions:
+                if lhs not in self.nullable and all(symbol in self.nullable for symbol in rhs):
+                    self.nullable.add(lhs)
+                    changed = True
+
+    def to_definition(self) -> dict:
+        """Übersetzt die Grammatik in einen nichtdeterministischen Kellerautomaten
+
+        Standardkonstruktion mit einem Arbeitszustand q1: epsilon-Übergänge
+        ersetzen ein Nichtterminal oben auf dem Stack durch eine rechte
+        Seite, ein Terminal oben wird gegen das gleiche Eingabezeichen
+        abgebaut. Liegt nur noch der Kellerboden, geht es nach qf.
+        """
+        symbols = set(self.nonterminals) | set(self.terminals)
+        # Belegt die Grammatik alle üblichen Bodenzeichen, dann Z0, Z1, ...
+        candidates = itertools.chain(BOTTOM_SYMBOLS, (f"Z{i}" for i in itertools.count()))
+        bottom = next(symbol for symbol in candidates if symbol not in symbols)
+        # Immer Listen: auch eine einzelne Regel braucht epsilon-Übergänge
+        # mitten in der Eingabe, also die nichtdeterministische Engine
+        transitions = {("q0", "", bottom): [("q1", [self.start, bottom])]}
+        for lhs, rhs in self.productions:
+            transitions.setdefault(("q1", "", lhs), []).append(("q1", list(rhs)))
+        for terminal in self.terminals:
+            transitions[("q1", terminal, terminal)] = [("q1", [])]
+        transitions[("q1", "", bottom)] = [("qf", [bottom])]
+        return {
+            "start_state": "q0",
+            "initial_stack_symbol": bottom,
+            "accepting_states": ["qf"],
+            "transitions": transitions,
+        }
+
+    def __repr__(self):
+        rules = "; ".join(f"{lhs} -> {' '.join(rhs) or 'ε'}" for lhs, rhs in self.productions)
+        return f"Grammar({self.start}: {rules})"
+
+
+def parse_grammar(data, source: str = "<grammar>") -> Grammar:
+    """Prüft eine Grammatik der Form {"start": "S", "rules": {"S": ["aSb", ""]}}
+
+    Eine Alternative ist ein String (jedes Zeichen ein Symbol) oder eine
+    Liste von Symbolen, falls Nichtterminale längere Namen haben.
+    """
+    def fail(message):
+        raise DefinitionError(f"{source}: grammar: {message}")
+
+    if not isinstance(data, dict) or set(data) - {"start", "rules"}:
+        fail("Objekt mit start und rules erwartet")
+    rules = data.get("rules")
+    if not isinstance(rules, dict) or not rules:
+        fail("rules muss ein nichtleeres Objekt Nichtterminal -> Alternativen sein")
+    start = data.get("start", next(iter(rules)))
+    if start not in rules:
+        fail(f"Startsymbol {start!r} hat keine Regeln")
+
+    productions = []
+    for lhs, alternatives in rules.items():
+        if not lhs:
+            fail("leerer Name für ein Nichtterminal")
+        if isinstance(alternatives, str):
+            alternatives = [alternatives]
+        if not isinstance(alternatives, list):
+            fail(f"{lhs}: Liste von Alternativen erwartet")
+        for alternative in alternatives:
+            if isinstance(alternative, str):
+                rhs = tuple(alternative)
+            elif isinstance(alternative, list) and all(isinstance(s, str) and s for s in alternative):
+                rhs = tuple(alternative)
+            else:
+                fail(f"{lhs}: Alternative muss ein String oder eine Liste von Symbolen sein")
+            for symbol in rhs:
+                if symbol not in rules and len(symbol) != 1:
+                    fail(f"{lhs}: Terminal {symbol!r} muss ein einzelnes Zeichen sein")
+            productions.append((lhs, rhs))
+    return Grammar(start, productions)
+
+
+def parse_definition(data, source: str = "<definition>") -> dict:
+    """Prüft eine eingelesene Definition und bringt sie in das Format der Engine
+
+    Übergänge sind eine Liste von Objekten mit state, input ("" = epsilon),
+    top, next und push (oberstes Symbol zuerst). Mehrere Einträge mit
+    gleichem (state, input, top) ergeben einen nichtdeterministischen
+    Übergang.
+    """
+    def fail(message):
+        raise DefinitionError(f"{source}: {message}")
+
+    def names(value, what, allow_empty=False):
+        if not isinstance(value, list) or not all(isinstance(v, str) and (v or allow_empty)
+                                                  for v in value):
+            fail(f"{what} muss eine Liste von Namen sein")
+        return value
+
+    if not isinstance(data, dict):
+        fail("Objekt mit Übergängen erwartet")
+    unknown = set(data) - DEFINITION_KEYS
+    if unknown:
+        fail(f"unbekannte Felder: {', '.join(sorted(unknown))}")
+    grammar = None
+    if "grammar" in data:
+        if PDA_KEYS & set(data):
+            fail(f"grammar schließt {', '.join(sorted(PDA_KEYS & set(data)))} aus")
+        grammar = parse_grammar(data["grammar"], source)
+        data = dict(data, **grammar.to_definition())
+    start_state = data.get("start_state", "q0")
+    initial_stack_symbol = data.get("initial_stack_symbol", "Z")
+    for value, what in ((start_state, "start_state"), (initial_stack_symbol, "initial_stack_symbol")):
+        if not isinstance(value, str) or not value:
+            fail(f"{what} muss ein nichtleerer String sein")
+    accepting_states = names(data.get("accepting_states"), "accepting_states")
+    examples = names(data.get("examples", []), "examples", allow_empty=True)
+    if grammar is None and not isinstance(data.get("transitions"), list):
+        fail("transitions muss eine Liste sein")
+
+    # Aus einer Grammatik erzeugte Übergänge liegen schon im Format der Engine vor
+    if grammar is not None:
+        transitions, items = data["transitions"], []
+    else:
+        transitions, items = {}, data["transitions"]
+    for number, item in enumerate(items):
+        where = f"Transition {number}"
+        if not isinstance(item, dict):
+            fail(f"{where}: Objekt erwartet")
+        unknown = set(item) - TRANSITION_KEYS
+        missing = {"state", "top", "next", "push"} - set(item)
+        if unknown or missing:
+            fail(f"{where}: unbekannte Felder {sorted(unknown)} / fehlende Felder {sorted(missing)}")
+        symbol = item.get("input", "")
+        if not isinstance(symbol, str) or len(symbol) > 1:
+            fail(f"{where}: input muss ein einzelnes Zeichen oder \"\" (epsilon) sein")
+        for field in ("state", "top", "next"):
+            if not isinstance(item[field], str) or not item[field]:
+                fail(f"{where}: {field} muss ein nichtleerer String sein")
+        push = names(item["push"], f"{where}: push")
+        key = (item["state"], symbol, item["top"])
+        target = (item["next"], list(push))
+        if key not in transitions:
+            transitions[key] = target
+        elif isinstance(transitions[key], list):
+            transitions[key].append(target)
+        else:
+            transitions[key] = [transitions[key], target]
+
+    info = data.get("info", {})
+    if not isinstance(info, dict):
+        fail("info muss ein Objekt Sprache -> Text sein")
+    texts = {}
+    for language, text in info.items():
+        if isinstance(text, list) and all(isinstance(line, str) for line in text):
+            text = "\n".join(text)
+        if not isinstance(text, str):
+            fail(f"info.{language} muss ein Text oder eine Liste von Zeilen sein")
+        texts[language] = text
+
+    return {
+        "label": str(data.get("label", os.path.splitext(os.path.basename(source))[0])),
+        "start_state": start_state,
+        "initial_stack_symbol": initial_stack_symbol,
+        "accepting_states": accepting_states,
+        "transitions": transitions,
+        "examples": examples,
+        "info": texts,
+        "grammar": grammar,
+    }
+
+
+def definition_cache_dir() -> str:
+    """Verzeichnis für kompilierte Definitionen ($KELLERAUTOMAT_CACHE oder ~/.cache)"""
+    return (os.environ.get("KELLERAUTOMAT_CACHE")
+            or os.path.join(os.path.expanduser("~"), ".cache", "kellerautomat"))
+
+
+def load_definition(path: str, cache_dir: Optional[str] = None) -> dict:
+    """Lädt, prüft und kompiliert eine Definitionsdatei (JSON oder YAML)
+
+    Das Ergebnis samt kompilierter Tabelle wird im Cache-Verzeichnis
+    abgelegt; ein erneutes Laden derselben Datei überspringt Parsen, Prüfen
+    und Kompilieren. Der Schlüssel ist der SHA-256 über Inhalt, Pfad (das
+    Label ist der Dateiname) und Modulname: als Skript gestartet verweisen
+    die Pickles auf __main__ und wären beim Import unbrauchbar.
+    """
+    with open(path, "rb") as stream:
+        raw = stream.read()
+    cache_dir = cache_dir or definition_cache_dir()
+    key = hashlib.sha256(raw)
+    for part in (os.path.abspath(path), __name__):
+        key.update(b"\0" + part.encode("utf-8", "surrogateescape"))
+    cache_path = os.path.join(cache_dir, f"{key.hexdigest()}-v{CACHE_VERSION}.pickle")
+    try:
+        with open(cache_path, "rb") as stream:
+            return pickle.load(stream)
+    except (OSError, EOFError, AttributeError, ImportError, pickle.UnpicklingError):
+        pass
+
+    if path.lower().endswith((".yaml", ".yml")):
+        if yaml is None:
+            raise DefinitionError(f"{path}: für YAML-Dateien wird PyYAML benötigt")
+        try:
+            data = yaml.safe_load(raw)
+        except yaml.YAMLError as error:
+            raise DefinitionError(f"{path}: {error}") from None
+    else:
+        try:
+            data = json.loads(raw)
+        except ValueError as error:
+            raise DefinitionError(f"{path}: {error}") from None
+    definition = parse_definition(data, path)
+    compiled = CompiledTable(definition["transitions"], definition["accepting_states"],
+                             definition["initial_stack_symbol"], definition["start_state"])
+    if compiled.deterministic:
+        compiled.epsilon_macros  # epsilon-Hülle gleich mit in den Cache
+    definition["compiled"] = compiled
+
+    # Atomar schreiben; ohne beschreibbares Cache-Verzeichnis geht es auch so
+    temporary = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(temporary, "wb") as stream:
+            pickle.dump(definition, stream, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, cache_path)
+    except (OSError, pickle.PicklingError):
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+    return definition
+
+
+def bundled_modes() -> List[str]:
+    """Namen der mitgelieferten Automaten (Dateinamen ohne Endung)"""
+    return sorted(os.path.splitext(name)[0] for name in os.listdir(AUTOMATA_DIR)
+                  if name.lower().endswith(DEFINITION_SUFFIXES))
+
+
+# Bereits geladene mitgelieferte Definitionen: Modus -> Definition
+_loaded_modes = {}
+
+
+def load_mode(mode: str) -> dict:
+    """Definition eines mitgelieferten Automaten (pro Prozess nur einmal geladen)"""
+    if mode not in _loaded_modes:
+        for suffix in DEFINITION_SUFFIXES:
+            path = os.path.join(AUTOMATA_DIR, mode + suffix)
+            if os.path.exists(path):
+                _loaded_modes[mode] = load_definition(path)
+                break
+        else:
+            raise DefinitionError(f"unbekannter Automat: {mode}")
+    return _loaded_modes[mode]
+
+
+class StackNode:
+    """Unveränderlicher Stack als verkettete Liste (oberstes Element zuerst)
+
+    Push und Pop erzeugen neue Knoten und teilen sich den Rest des Stacks
+    mit dem Vorgänger. Ein Schnappschuss ist daher nur eine Referenz (O(1)).
+    Der leere Stack ist EMPTY_STACK.
+    """
+    __slots__ = ("symbol", "below", "depth")
+
+    def __init__(self, symbol, below: "StackNode"):
+        self.symbol = symbol
+        self.below = below
+        self.depth = below.depth + 1
+
+    @classmethod
+    def from_list(cls, symbols: Iterable) -> "StackNode":
+        """Baut einen Stack aus einer Liste (unterstes Element zuerst)"""
+        stack = EMPTY_STACK
+        for symbol in symbols:
+            stack = cls(symbol, stack)
+        return stack
+
+    @property
+    def top(self):
+        return self.symbol
+
+    def pop(self) -> "StackNode":
+        return self.below
+
+    def push(self, symbols: List) -> "StackNode":
+        """Pusht eine Symbolliste (erstes Element landet oben)"""
+        stack = self
+        for symbol in reversed(symbols):
+            stack = StackNode(symbol, stack)
+        return stack
+
+    def to_list(self) -> list:
+        """Materialisiert den Stack (unterstes Element zuerst)"""
+        symbols = list(self)
+        symbols.reverse()
+        return symbols
+
+    def levels(self, base: int, top: int) -> Dict[int, str]:
+        """Symbole der Ebenen base..top (0 = unterstes Element)"""
+        node = self
+        while node.depth - 1 > top:
+            node = node.below
+        symbols = {}
+        while node.depth and node.depth - 1 >= base:
+            symbols[node.depth - 1] = node.symbol
+            node = node.below
+        return symbols
+
+    def __iter__(self):
+        # Von oben nach unten
+        node = self
+        while node.depth:
+            yield node.symbol
+            node = node.below
+
+    def __len__(self):
+        return self.depth
+
+    def __repr__(self):
+        return repr(self.to_list())
+
+
+# Leerer Stack (Wurzel aller Stacks)
+EMPTY_STACK = StackNode.__new__(StackNode)
+EMPTY_STACK.symbol = None
+EMPTY_STACK.below = None
+EMPTY_STACK.depth = 0
+
+
+class CounterStack:
+    """Stack der Form [Boden, X, X, ..., X] als reiner Zähler
+
+    Für Automaten, die oberhalb des Bodensymbols nur ein einziges
+    Stacksymbol verwenden (Ein-Zähler-Automaten wie anbn und klammern).
+    Gespeichert wird nur die Tiefe; Push und Pop kosten O(1) Speicher.
+    Die Schnittstelle entspricht StackNode, die GUI sieht also einen
+    normalen Stack. Pusht ein Übergang doch etwas anderes, entsteht ein
+    gewöhnlicher StackNode.
+    """
+    __slots__ = ("bottom", "counted", "depth")
+
+    def __init__(self, bottom, counted, depth: int):
+        self.bottom = bottom
+        self.counted = counted
+        self.depth = depth
+
+    @property
+    def top(self):
+        if not self.depth:
+            return None
+        return self.bottom if self.depth == 1 else self.counted
+
+    symbol = top
+
+    @property
+    def below(self):
+        return self.pop() if self.depth else None
+
+    def pop(self) -> "CounterStack":
+        return CounterStack(self.bottom, self.counted, self.depth - 1)
+
+    def push(self, symbols: List):
+        """Pusht eine Symbolliste (erstes Element landet oben)"""
+        counted = self.counted
+        if self.depth and all(symbol == counted for symbol in symbols):
+            return CounterStack(self.bottom, counted, self.depth + len(symbols))
+        if (not self.depth and symbols and symbols[-1] == self.bottom
+                and all(symbol == counted for symbol in symbols[:-1])):
+            return CounterStack(self.bottom, counted, len(symbols))
+        return StackNode.from_list(self.to_list()).push(symbols)
+
+    def to_list(self) -> list:
+        """Materialisiert den Stack (unterstes Element zuerst)"""
+        if not self.depth:
+            return []
+        return [self.bottom] + [self.counted] * (self.depth - 1)
+
+    def levels(self, base: int, top: int) -> Dict[int, str]:
+        """Symbole der Ebenen base..top (0 = unterstes Element)"""
+        return {level: self.bottom if level == 0 else self.counted
+                for level in range(max(base, 0), min(top, self.depth - 1) + 1)}
+
+    def __iter__(self):
+        # Von oben nach unten
+        for level in range(self.depth - 1, 0, -1):
+            yield self.counted
+        if self.depth:
+            yield self.bottom
+
+    def __len__(self):
+        return self.depth
+
+    def __repr__(self):
+        return repr(self.to_list())
+
+
+class RunStack:
+    """Stack aus Läufen gleicher Symbole (Lauflängenkodierung)
+
+    Jeder Knoten ist ein Lauf "Symbol × Anzahl" über dem Rest des Stacks.
+    Push und Pop des obersten Symbols ändern nur die Anzahl; [Z, A, ..., A]
+    braucht also zwei Knoten statt n. Wie StackNode unveränderlich und mit
+    derselben Schnittstelle; repr zeigt die Läufe als 'A'×10000.
+    """
+    __slots__ = ("symbol", "count", "rest", "depth", "runs")
+
+    def __init__(self, symbol, count: int, rest: "RunStack"):
+        self.symbol = symbol
+        self.count = count
+        self.rest = rest
+        self.depth = rest.depth + count
+        self.runs = rest.runs + 1
+
+    @classmethod
+    def from_runs(cls, runs: Iterable[Tuple[str, int]]) -> "RunStack":
+        """Baut einen Stack aus (Symbol, Anzahl)-Paaren (unterster Lauf zuerst)"""
+        stack = EMPTY_RUNS
+        for symbol, count in runs:
+            if count <= 0:
+                continue
+            if stack.depth and stack.symbol == symbol:
+                stack = cls(symbol, stack.count + count, stack.rest)
+            else:
+                stack = cls(symbol, count, stack)
+        return stack
+
+    @classmethod
+    def from_list(cls, symbols: Iterable) -> "RunStack":
+        """Baut einen Stack aus einer Liste (unterstes Element zuerst)"""
+        return cls.from_runs((symbol, sum(1 for _ in group))
+                             for symbol, group in itertools.groupby(symbols))
+
+    @property
+    def top(self):
+        return self.symbol
+
+    @property
+    def below(self):
+        return self.pop() if self.depth else None
+
+    def pop(self) -> "RunStack":
+        if self.count > 1:
+            return RunStack(self.symbol, self.count - 1, self.rest)
+        return self.rest
+
+    def push(self, symbols: List) -> "RunStack":
+        """Pusht eine Symbolliste (erstes Element landet oben)"""
+        stack = self
+        for symbol in reversed(symbols):
+            if stack.depth and stack.symbol == symbol:
+                stack = RunStack(symbol, stack.count + 1, stack.rest)
+            else:
+                stack = RunStack(symbol, 1, stack)
+        return stack
+
+    def iter_runs(self) -> Iterator[Tuple[str, int]]:
+        """(Symbol, Anzahl) je Lauf, von oben nach unten"""
+        node = self
+        while node.depth:
+            yield node.symbol, node.count
+            node = node.rest
+
+    def to_list(self) -> list:
+        """Materialisiert den Stack (unterstes Element zuerst)"""
+        symbols = []
+        for symbol, count in reversed(list(self.iter_runs())):
+            symbols.extend([symbol] * count)
+        return symbols
+
+    def levels(self, base: int, top: int) -> Dict[int, str]:
+        """Symbole der Ebenen base..top (0 = unterstes Element)"""
+        symbols = {}
+        node = self
+        while node.depth and node.depth - 1 >= base:
+            for level in range(max(node.rest.depth, base), min(node.depth - 1, top) + 1):
+                symbols[level] = node.symbol
+            node = node.rest
+        return symbols
+
+    def run_levels(self, base: int, top: int) -> Dict[int, str]:
+        """Beschriftungen der Läufe base..top (0 = unterster Lauf), z.B. "A×10000" """
+        labels = {}
+        node = self
+        index = self.runs - 1
+        while node.depth and index >= base:
+            if index <= top:
+                labels[index] = f"{node.symbol}×{node.count}" if node.count > 1 else str(node.symbol)
+            node = node.rest
+            index -= 1
+        return labels
+
+    def __iter__(self):
+        # Von oben nach unten
+        for symbol, count in self.iter_runs():
+            for _ in range(count):
+                yield symbol
+
+    def __len__(self):
+        return self.depth
+
+    def __repr__(self):
+        runs = reversed(list(self.iter_runs()))
+        return "[" + ", ".join(repr(symbol) + (f"×{count}" if count > 1 else "")
+                               for symbol, count in runs) + "]"
+
+
+# Leerer Lauflängen-Stack
+EMPTY_RUNS = RunStack.__new__(RunStack)
+EMPTY_RUNS.symbol = None
+EMPTY_RUNS.count = 0
+EMPTY_RUNS.rest = None
+EMPTY_RUNS.depth = 0
+EMPTY_RUNS.runs = 0
+
+
+def counter_symbol(transitions, initial_stack_symbol: str) -> Optional[str]:
+    """Einziges Stacksymbol oberhalb des Bodens, falls der Stack ein Zähler ist
+
+    Das ist der Fall, wenn jeder Übergang den Stack in der Form
+    [Boden, X, ..., X] lässt: auf X wird nur X gepusht, auf dem Boden
+    entweder nichts oder der Boden mit X darüber.
+    """
+    if any(isinstance(target, list) for target in transitions.values()):
+        return None
+    others = {top for (_, _, top) in transitions} | {
+        symbol for _, stack_action in transitions.values() for symbol in stack_action}
+    others.discard(initial_stack_symbol)
+    if len(others) != 1:
+        return None
+    counted = others.pop()
+    for (_, _, top), (_, stack_action) in transitions.items():
+        above = stack_action
+        if top == initial_stack_symbol and stack_action:
+            if stack_action[-1] != initial_stack_symbol:
+                return None
+            above = stack_action[:-1]
+        if any(symbol != counted for symbol in above):
+            return None
+    return counted
+
+
+class Profile:
+    """Messwerte schrittweiser Läufe (opt-in über Kellerautomat.profile)
+
+    Zählt Treffer je Übergangsschlüssel, epsilon-Übergänge und die
+    maximale Stacktiefe; times sammelt Sekunden für Lookup und
+    Stack-Operationen (Engine) sowie Log und Zeichnen (GUI). Mehrere
+    Läufe mit demselben Profil werden aufsummiert. Bei
+    nichtdeterministischen Automaten zählt jeder Übergang jeder besuchten
+    Konfiguration, configurations die besuchten Konfigurationen; die
+    Suche läuft dort komplett unter lookup.
+    """
+
+    PHASES = ("lookup", "stack", "log", "render")
+
+    def __init__(self):
+        self.hits = {}
+        self.steps = 0
+        self.epsilon_moves = 0
+        self.max_depth = 0
+        self.configurations = 0
+        self.times = dict.fromkeys(self.PHASES, 0.0)
+
+    def count(self, key: Tuple[str, str, str], depth: int):
+        """Verbucht einen ausgeführten Übergang"""
+        self.hits[key] = self.hits.get(key, 0) + 1
+        self.steps += 1
+        if not key[1]:
+            self.epsilon_moves += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def to_dict(self, transitions: Optional[dict] = None) -> dict:
+        """JSON-fähige Zusammenfassung; mit transitions auch nie genutzte Übergänge"""
+        keys = list(transitions) if transitions is not None else []
+        known = set(keys)
+        keys += [key for key in self.hits if key not in known]
+        return {
+            "steps": self.steps,
+            "epsilon_moves": self.epsilon_moves,
+            "max_depth": self.max_depth,
+            "configurations": self.configurations,
+            "seconds": dict(self.times),
+            "transitions": [
+                {"state": state, "input": symbol, "top": top, "hits": self.hits.get((state, symbol, top), 0)}
+                for state, symbol, top in keys
+            ],
+        }
+
+
+class StepRecord(NamedTuple):
+    """Ein ausgeführter Übergang als Delta (ohne Kopie des Stacks)"""
+    number: int
+    key: Tuple[str, str, str]
+    new_state: str
+    pushed: Tuple[str, ...]
+    stack: StackNode
+
+    @property
+    def old_state(self):
+        return self.key[0]
+
+    @property
+    def symbol(self):
+        return self.key[1]
+
+    @property
+    def popped(self):
+        return self.key[2]
+
+    @property
+    def depth(self):
+        return self.stack.depth
+
+
+def format_step(record: StepRecord, snapshot: bool = False) -> str:
+    """Kompakte, sprachneutrale Log-Zeile; konstante Länge unabhängig von der Stacktiefe"""
+    line = (f"{record.number}: {record.old_state} → {record.new_state}, "
+            f"'{record.symbol or 'ε'}', pop {record.popped}, "
+            f"push {','.join(record.pushed) or 'ε'}, depth {record.depth}")
+    if snapshot:
+        line += f"\n    stack: {record.stack}"
+    return line
+
+
+class CompiledTable:
+    """Übergangstabelle mit ganzzahlig kodierten Zuständen und Symbolen
+
+    Zustände, Eingabesymbole und Stack-Symbole werden auf kleine Ganzzahlen
+    abgebildet. Die Tabelle ist ein flaches Array, indiziert mit
+    (Zustand * Anzahl Eingabesymbole + Symbol) * Anzahl Stack-Symbole + Top,
+    und enthält die Nummer der Transition (-1 = keine Transition).
+    Epsilon hat immer die Symbolnummer 0. Hat ein Schlüssel mehrere Ziele,
+    steht die erste Transition in der Tabelle und alle in alternatives.
+    """
+
+    def __init__(self, transitions, accepting_states, initial_stack_symbol="Z", start_state="q0"):
+        # Zustände und Symbole in stabiler Reihenfolge einsammeln
+        states = [start_state]
+        input_symbols = [""]
+        stack_symbols = [initial_stack_symbol]
+        for (state, symbol, top), target in transitions.items():
+            for name, names in ((state, states), (symbol, input_symbols), (top, stack_symbols)):
+                if name not in names:
+                    names.append(name)
+            for new_state, stack_action in transition_targets(target):
+                if new_state not in states:
+                    states.append(new_state)
+                for pushed in stack_action:
+                    if pushed not in stack_symbols:
+                        stack_symbols.append(pushed)
+        for state in accepting_states:
+            if state not in states:
+                states.append(state)
+
+        self.states = states
+        self.input_symbols = input_symbols
+        self.stack_symbols = stack_symbols
+        self.state_ids = {name: i for i, name in enumerate(states)}
+        self.symbol_ids = {name: i for i, name in enumerate(input_symbols)}
+        self.stack_ids = {name: i for i, name in enumerate(stack_symbols)}
+
+        n_stack = len(stack_symbols)
+        self.state_stride = len(input_symbols) * n_stack
+        # Offset eines Eingabesymbols innerhalb eines Zustandsblocks
+        self.symbol_offsets = {name: i * n_stack for i, name in enumerate(input_symbols) if name}
+        self.start_base = self.state_ids[start_state] * self.state_stride
+        self.bottom = self.stack_ids[initial_stack_symbol]
+        self.accepting = bytearray(len(states))
+        for state in accepting_states:
+            self.accepting[self.state_ids[state]] = 1
+
+        # Pro Transition: Schlüssel, Zielzustand, Basis-Index des Ziels und
+        # die zu pushenden Stack-IDs (unterstes zuerst, passend für list.extend)
+        self.table = array('i', [-1]) * (len(states) * self.state_stride)
+        self.keys = []
+        self.next_state = array('i')
+        self.next_base = array('i')
+        self.pushes = []
+        self.alternatives = {}
+        for key, target in transitions.items():
+            state, symbol, top = key
+            index = (self.state_ids[state] * self.state_stride
+                     + self.symbol_ids[symbol] * n_stack + self.stack_ids[top])
+            self.table[index] = len(self.keys)
+            group = []
+            for new_state, stack_action in transition_targets(target):
+                group.append(len(self.keys))
+                self.keys.append(key)
+                self.next_state.append(self.state_ids[new_state])
+                self.next_base.append(self.state_ids[new_state] * self.state_stride)
+                self.pushes.append(tuple(self.stack_ids[s] for s in reversed(stack_action)))
+            if len(group) > 1:
+                self.alternatives[group[0]] = tuple(group)
+        # Wie Kellerautomat.nondeterministic: auch einelementige Listen zählen
+        self.deterministic = not any(isinstance(t, list) for t in transitions.values())
+        # Ein-Zähler-Automat: Stack als Tiefe, Übergänge als Tiefenänderung
+        counted = counter_symbol(transitions, initial_stack_symbol)
+        self.counter = self.stack_ids[counted] if counted is not None else None
+        self.deltas = array('i', (len(push) - 1 for push in self.pushes))
+        self._byte_table = None
+        self._batch_table = None
+        self._epsilon_macros = None
+
+    def __getstate__(self):
+        # Abgeleitete Tabellen werden bei Bedarf neu erzeugt (Cache, Worker-Prozesse)
+        state = self.__dict__.copy()
+        state["_byte_table"] = None
+        state["_batch_table"] = None
+        return state
+
+    @property
+    def epsilon_macros(self) -> list:
+        """epsilon-Hülle je (Zustand, Top) als eine Makrotransition
+
+        Index ist Zustand * Anzahl Stack-Symbole + Top. Ein Makro fasst alle
+        epsilon-Übergänge zusammen, bis das Top-Feld abgebaut ist (EXPOSE),
+        keine Transition mehr passt (STUCK) oder ein Endzustand erreicht
+        ist (ACCEPT). Jeder Eintrag ist (Art, Ziel-Basis, Ersatz für das
+        Top-Feld (unterstes zuerst), Schritte, letzte Transition). Läuft die
+        Hülle in einen Zyklus, ist die Art DIVERGE. Nur für deterministische
+        Automaten.
+        """
+        if self._epsilon_macros is None:
+            self._epsilon_macros = self._close_epsilon()
+        return self._epsilon_macros
+
+    def _close_epsilon(self) -> list:
+        """Berechnet die epsilon-Makros mit Zykluserkennung"""
+        n_stack = len(self.stack_symbols)
+        stride = self.state_stride
+        memo = {}
+        diverge = (MACRO_DIVERGE, 0, (), 0, -1)
+
+        def open_field(key):
+            # Ein Makro hängt nur von Zustand und Top ab; der Rest des Stacks
+            # wird erst nach EXPOSE gelesen. Taucht (Zustand, Top) während
+            # der eigenen Berechnung wieder auf, wiederholt sich der Lauf
+            # über diesem Feld endlos.
+            memo[key] = None
+            state, top = key
+            t = self.table[state * stride + top]
+            if t < 0:
+                result = (MACRO_STUCK, state * stride, (top,), 0, -1)
+            elif self.accepting[self.next_state[t]]:
+                result = (MACRO_ACCEPT, self.next_base[t], self.pushes[t], 1, t)
+            else:
+                return [key, list(self.pushes[t]), self.next_state[t], 1, t]
+            memo[key] = result
+            return result
+
+        def close(state, top):
+            # Explizite Arbeitsliste statt Rekursion: lange epsilon-Ketten
+            # dürfen nicht an der Rekursionstiefe von Python scheitern.
+            # Ein Rahmen ist [Feld, offene Zellen, Zustand, Schritte, letzte].
+            key = (state, top)
+            if key in memo:
+                return memo[key] or diverge
+            frames = []
+            sub = open_field(key)
+            while True:
+                if isinstance(sub, list):
+                    frames.append(sub)
+                    sub = None
+                if not frames:
+                    return sub
+                frame = frames[-1]
+                _, cells, current, steps, last = frame
+                result = None
+                if sub is not None:
+                    kind, next_base, replacement, count, sub_last = sub
+                    if kind == MACRO_DIVERGE:
+                        result = diverge
+                    else:
+                        current = next_base // stride
+                        steps += count
+                        if sub_last >= 0:
+                            last = sub_last
+                        if kind == MACRO_EXPOSE:
+                            cells.pop()
+                        else:
+                            cells[-1:] = replacement
+                            result = (kind, next_base, tuple(cells), steps, last)
+                    frame[2:] = current, steps, last
+                if result is None:
+                    if cells:
+                        key = (current, cells[-1])
+                        sub = (memo[key] or diverge) if key in memo else open_field(key)
+                        continue
+                    result = (MACRO_EXPOSE, current * stride, (), steps, last)
+                frames.pop()
+                memo[frame[0]] = result
+                sub = result
+
+        return [close(state, top) for state in range(len(self.states)) for top in range(n_stack)]
+
+    @property
+    def batch_table(self) -> "BatchTable":
+        """NumPy-Fassung der Tabelle für accepts_batch"""
+        if self._batch_table is None:
+            self._batch_table = BatchTable(self)
+        return self._batch_table
+
+    @property
+    def byte_table(self) -> "ByteTable":
+        """Variante der Tabelle, die direkt mit Bytewerten indiziert wird"""
+        if self._byte_table is None:
+            self._byte_table = ByteTable(self)
+        return self._byte_table
+
+
+class BatchTable:
+    """Übergangstabelle als NumPy-Arrays für den Gleichschritt vieler Wörter
+
+    Gegenüber der CompiledTable gibt es je eine zusätzliche Zeile für
+    einen toten Zustand, ein unbekanntes Eingabesymbol und ein
+    Wächter-Stacksymbol unter dem Boden; alle liefern keine Transition.
+    Statt "keine Transition" wird die Senke (letzte Transition) ausgeführt,
+    die in den toten Zustand führt. So laufen alle Wörter ohne Masken und
+    ohne Umsortieren weiter.
+    """
+
+    def __init__(self, compiled: CompiledTable):
+        n_states = len(compiled.states)
+        n_symbols = len(compiled.input_symbols)
+        n_stack = len(compiled.stack_symbols)
+        self.n_stack = n_stack + 1
+        self.stride = (n_symbols + 1) * self.n_stack
+        self.sentinel = n_stack
+        self.dead_base = n_states * self.stride
+        # Offsets pro Codepunkt kommen aus symbol_offsets, unbekannt = letzte Symbolzeile
+        self.symbol_offsets = {symbol: compiled.symbol_ids[symbol] * self.n_stack
+                               for symbol in compiled.symbol_offsets}
+        self.unknown = n_symbols * self.n_stack
+
+        table = np.full((n_states + 1, n_symbols + 1, self.n_stack), -1, dtype=np.int64)
+        table[:n_states, :n_symbols, :n_stack] = np.array(compiled.table, dtype=np.int64).reshape(
+            n_states, n_symbols, n_stack)
+        self.sink = len(compiled.pushes)
+        table[table < 0] = self.sink
+        self.table = table.ravel()
+        self.next_base = np.array(list(compiled.next_state) + [n_states], dtype=np.int64) * self.stride
+        self.accepting = np.zeros(n_states + 1, dtype=bool)
+        self.accepting[:n_states] = np.frombuffer(bytes(compiled.accepting), dtype=np.uint8) > 0
+
+        # Pushes als aufgefüllte Matrix, unterstes Symbol zuerst; die Senke
+        # schreibt den Wächter auf das Top und lässt die Tiefe unverändert
+        pushes = compiled.pushes + [(self.sentinel,)]
+        self.width = max(len(push) for push in pushes)
+        self.pushes = np.full((len(pushes), self.width), self.sentinel, dtype=np.int32)
+        for t, push in enumerate(pushes):
+            self.pushes[t, :len(push)] = push
+        self.push_lengths = np.array([len(push) for push in pushes], dtype=np.int64)
+        self.deltas = self.push_lengths - 1
+
+        # (Zustand, Top), ab denen die epsilon-Übergänge am Ende nie enden
+        self.diverges = np.zeros((n_states + 1) * self.n_stack, dtype=bool)
+        for index, macro in enumerate(compiled.epsilon_macros):
+            state, top = divmod(index, n_stack)
+            self.diverges[state * self.n_stack + top] = macro[0] == MACRO_DIVERGE
+
+
+class ByteTable:
+    """Übergangstabelle für Byte-Eingaben (bytes, memoryview, mmap)
+
+    Jeder Zustandsblock hat 256 Symbolplätze, das gelesene Byte ist also
+    direkt der Symbolindex - kein Dekodieren und kein Dictionary-Lookup.
+    Das passt nur zu ASCII-Eingabesymbolen (siehe check_alphabet);
+    epsilon-Übergänge bleiben in der CompiledTable. Die Transitionsnummern
+    sind dieselben.
+    """
+
+    def __init__(self, compiled: CompiledTable):
+        self.check_alphabet(compiled.input_symbols)
+        n_stack = len(compiled.stack_symbols)
+        self.stride = 256 * n_stack
+        self.table = array('i', [-1]) * (len(compiled.states) * self.stride)
+        for t, (state, symbol, top) in enumerate(compiled.keys):
+            if len(symbol) != 1:
+                continue
+            index = (compiled.state_ids[state] * self.stride
+                     + ord(symbol) * n_stack + compiled.stack_ids[top])
+            if self.table[index] < 0:
+                self.table[index] = t
+        self.next_base = array('i', (state * self.stride for state in compiled.next_state))
+
+    @staticmethod
+    def check_alphabet(symbols: Iterable[str]):
+        """Lehnt Eingabesymbole ab, die in UTF-8 mehr als ein Byte belegen
+
+        run() dekodiert UTF-8; ab Codepunkt 128 wäre ein Byte nicht mehr
+        ein Zeichen, und die Urteile würden sich unterscheiden.
+        """
+        wide = [symbol for symbol in symbols if not symbol.isascii()]
+        if wide:
+            raise ValueError(f"Byte-Eingabe nur mit ASCII-Eingabesymbolen: {', '.join(wide)}")
+
+
+class Kellerautomat:
+    """Kellerautomat ohne GUI - gleiche Semantik wie die schrittweise Ausführung
+
+    Deterministische Automaten lesen epsilon-Übergänge nur am Ende der
+    Eingabe (wie die GUI). Nichtdeterministische Automaten werden als
+    Breitensuche über Konfigurationsmengen simuliert; dort sind
+    epsilon-Übergänge an jeder Position erlaubt.
+    """
+
+    def __init__(self, transitions: Dict[Tuple[str, str, str], Tuple[str, List[str]]],
+                 accepting_states: Iterable[str], initial_stack_symbol: str = "Z",
+                 start_state: str = "q0", max_configurations: int = 100000,
+                 max_depth: Optional[int] = None, run_length: bool = False):
+        self.transitions = transitions
+        self.accepting_states = list(accepting_states)
+        self.initial_stack_symbol = initial_stack_symbol
+        self.start_state = start_state
+        self.nondeterministic = any(isinstance(t, list) for t in transitions.values())
+        self.counted_symbol = counter_symbol(transitions, initial_stack_symbol)
+        # Persistenten Stack lauflängenkodiert halten (RunStack)
+        self.run_length = run_length
+        # Grenzen der nichtdeterministischen Suche
+        self.max_configurations = max_configurations
+        self.max_depth = max_depth
+        # Messwerte (Profile) nur auf Wunsch; None kostet pro Schritt einen Vergleich
+        self.profile = None
+        self._compiled = None
+        # Earley über der Tripel-Grammatik, erst bei Bedarf gebaut (False = leere Sprache)
+        self._exact_parser = None
+        self.reset("")
+
+    @classmethod
+    def from_mode(cls, mode: str, **options) -> "Kellerautomat":
+        """Erzeugt einen der mitgelieferten Automaten (automata/<mode>.json)"""
+        return cls.from_definition(load_mode(mode), **options)
+
+    @classmethod
+    def from_file(cls, path: str, **options) -> "Kellerautomat":
+        """Erzeugt einen Automaten aus einer JSON/YAML-Definitionsdatei"""
+        return cls.from_definition(load_definition(path), **options)
+
+    @classmethod
+    def from_definition(cls, definition: dict, **options) -> "Kellerautomat":
+        """Erzeugt einen Automaten aus einer geladenen Definition (mit kompilierter Tabelle)"""
+        engine = cls(definition["transitions"], definition["accepting_states"],
+                     definition["initial_stack_symbol"], definition["start_state"], **options)
+        engine._compiled = definition.get("compiled")
+        return engine
+
+    def definition_data(self) -> dict:
+        """Definition im Dateiformat (JSON-fähig), Übergänge in der Reihenfolge der Tabelle"""
+        transitions = []
+        for (state, symbol, top), target in self.transitions.items():
+            for new_state, stack_action in transition_targets(target):
+                transitions.append({"state": state, "input": symbol, "top": top,
+                                    "next": new_state, "push": list(stack_action)})
+        return {
+            "start_state": self.start_state,
+            "initial_stack_symbol": self.initial_stack_symbol,
+            "accepting_states": list(self.accepting_states),
+            "transitions": transitions,
+        }
+
+    def clone(self) -> "Kellerautomat":
+        """Neue Engine mit derselben Definition (teilt die kompilierte Tabelle)"""
+        engine = Kellerautomat(self.transitions, self.accepting_states, self.initial_stack_symbol,
+                               self.start_state, self.max_configurations, self.max_depth,
+                               self.run_length)
+        engine._compiled = self._compiled
+        return engine
+
+    def reset(self, word: str):
+        """Setzt die Konfiguration für ein neues Wort zurück"""
+        self.word = word
+        self.state = self.start_state
+        self.stack = self.make_stack([self.initial_stack_symbol])
+        self.position = 0
+        self.steps = 0
+        self.result = RUNNING
+        # Zuletzt gesuchter Schlüssel und gefundenes Ziel (None = keine Transition)
+        self.last_key = None
+        self.last_target = None
+        # Delta des zuletzt ausgeführten Übergangs
+        self.last_step = None
+
+    def make_stack(self, symbols: List):
+        """Stack in der passenden Darstellung (unterstes Element zuerst)
+
+        RunStack bei run_length, CounterStack für Ein-Zähler-Automaten,
+        sonst StackNode.
+        """
+        if self.run_length:
+            return RunStack.from_list(symbols)
+        if self.counted_symbol is not None:
+            # push() fällt selbst auf StackNode zurück, wenn es kein Zählerstack ist
+            return CounterStack(self.initial_stack_symbol, self.counted_symbol, 0).push(symbols[::-1])
+        return StackNode.from_list(symbols)
+
+    def set_run_length(self, enabled: bool):
+        """Schaltet die Lauflängenkodierung des Stacks um (auch mitten im Lauf)"""
+        self.run_length = enabled
+        self.stack = self.make_stack(self.stack.to_list())
+
+    def step(self) -> str:
+        """Führt einen Schritt aus und gibt das Ergebnis zurück"""
+        if self.profile is not None:
+            return self._profiled_step()
+        target = self.lookup()
+        if target is None:
+            return self.result
+        return self.apply(self.last_key, target)
+
+    def _profiled_step(self) -> str:
+        """step() mit Zeitmessung für Lookup und Stack-Operationen"""
+        profile = self.profile
+        started = time.perf_counter()
+        target = self.lookup()
+        looked_up = time.perf_counter()
+        profile.times["lookup"] += looked_up - started
+        if target is None:
+            return self.result
+        result = self.apply(self.last_key, target)
+        profile.times["stack"] += time.perf_counter() - looked_up
+        profile.count(self.last_key, self.stack.depth)
+        return result
+
+    def lookup(self):
+        """Sucht den Übergang für die aktuelle Konfiguration
+
+        Liefert das Ziel oder None; dann steht das Ergebnis (FINISHED,
+        STACK_EMPTY, DIVERGED, ACCEPTED oder REJECTED) in self.result.
+        """
+        if self.nondeterministic:
+            raise ValueError("step() unterstützt nur deterministische Automaten")
+        word = self.word
+        # Prüfe ob fertig
+        if self.position > len(word):
+            self.result = FINISHED
+            return None
+
+        # Aktuelles Symbol (oder epsilon)
+        symbol = word[self.position] if self.position < len(word) else ""
+
+        if not self.stack:
+            self.result = STACK_EMPTY
+            return None
+
+        transition_key = (self.state, symbol, self.stack.top)
+        target = self.transitions.get(transition_key)
+        self.last_key = transition_key
+        self.last_target = target
+
+        if not symbol and target is not None and self.epsilon_diverges():
+            # epsilon-Zyklus: hier nicht endlos weiterschalten
+            self.result = DIVERGED
+            return None
+
+        if target is None:
+            # Keine Transition gefunden
+            if self.state in self.accepting_states and self.position == len(word):
+                self.result = ACCEPTED
+            else:
+                self.result = REJECTED
+        return target
+
+    def apply(self, transition_key: Tuple[str, str, str], target) -> str:
+        """Wendet einen (bereits gefundenen) Übergang an - von step() und Replay genutzt"""
+        new_state, stack_action = target
+        self.stack = self.stack.pop().push(stack_action)
+
+        self.state = new_state
+        self.steps += 1
+        self.last_step = StepRecord(self.steps, transition_key, new_state,
+                                    tuple(stack_action), self.stack)
+        if transition_key[1]:  # Nur weitergehen wenn nicht epsilon
+            self.position += 1
+        elif new_state in self.accepting_states:
+            # Bei epsilon-Übergang in Endzustand
+            self.position = len(self.word) + 1
+
+        if (new_state in self.accepting_states and self.position >= len(self.word)
+                and self.stack.depth == 1 and self.stack.top == self.initial_stack_symbol):
+            self.result = ACCEPTED
+        else:
+            self.result = RUNNING
+        return self.result
+
+    def epsilon_diverges(self) -> bool:
+        """Prüft per epsilon-Hülle, ob die epsilon-Übergänge ab hier nie enden"""
+        compiled = self.compiled
+        if not self.stack or self.nondeterministic:
+            return False
+        index = (compiled.state_ids[self.state] * len(compiled.stack_symbols)
+                 + compiled.stack_ids[self.stack.top])
+        return compiled.epsilon_macros[index][0] == MACRO_DIVERGE
+
+    def iter_steps(self, word: str) -> Iterator[StepRecord]:
+        """Führt ein Wort schrittweise aus und liefert jeden Übergang als Delta"""
+        self.reset(word)
+        while True:
+            steps = self.steps
+            result = self.step()
+            if self.steps != steps:
+                yield self.last_step
+            if result != RUNNING:
+                return
+
+    def log_lines(self, word: str, snapshot_every: int = 0) -> Iterator[str]:
+        """Kompaktes Log eines Laufs, optional mit vollem Stack alle N Schritte"""
+        for record in self.iter_steps(word):
+            yield format_step(record, snapshot_every > 0 and record.number % snapshot_every == 0)
+
+    def compile(self) -> CompiledTable:
+        """Kompiliert die Übergänge in eine Tabelle mit ganzzahligen Indizes"""
+        self._compiled = CompiledTable(self.transitions, self.accepting_states,
+                                       self.initial_stack_symbol, self.start_state)
+        return self._compiled
+
+    @property
+    def compiled(self) -> CompiledTable:
+        """Kompilierte Tabelle (wird beim ersten Zugriff erzeugt)"""
+        if self._compiled is None:
+            self.compile()
+        return self._compiled
+
+    def run(self, word: str, progress=None, progress_every: int = 1 << 16) -> str:
+        """Lässt ein Wort ohne Zwischenschritte bis zum Ergebnis laufen
+
+        progress(position, state, depth) wird optional alle progress_every
+        Symbole aufgerufen; gibt der Callback False zurück, wird der Lauf
+        mit CANCELLED abgebrochen.
+        """
+        if self.nondeterministic:
+            return self._run_nondeterministic((word,), len(word), word)
+        if self.profile is not None:
+            # Gemessen wird Schritt für Schritt (die kompilierte Schleife hat keine Hooks)
+            self.reset(word)
+            while self.step() == RUNNING:
+                pass
+            return self.result
+        self.begin()
+        if progress is None:
+            chunks = (word,)
+        else:
+            chunks = (word[i:i + progress_every] for i in range(0, len(word), progress_every))
+        compiled = self.compiled
+        for chunk in chunks:
+            if self.feed(chunk) != RUNNING:
+                break
+            if (progress is not None and progress(
+                    self.steps, compiled.states[self._base // compiled.state_stride],
+                    self._depth if self._ints is None else len(self._ints)) is False):
+                self._sync(CANCELLED)
+                break
+        else:
+            self.finish()
+        self.word = word
+        return self.result
+
+    def begin(self):
+        """Startet einen Lauf, dessen Eingabe stückweise per feed() kommt
+
+        Gespeichert werden nur Zustand und Stack, nicht die gelesene
+        Eingabe; der Speicherbedarf hängt also nur von der Stacktiefe ab.
+        """
+        if self.nondeterministic:
+            raise ValueError("feed() unterstützt nur deterministische Automaten")
+        compiled = self.compiled
+        self.reset("")
+        self._base = compiled.start_base
+        # Ein-Zähler-Automaten speichern statt der Liste nur die Tiefe
+        self._ints = [compiled.bottom] if compiled.counter is None else None
+        self._depth = 1
+        self._t = -1
+        self._symbol = ""
+
+    def feed(self, chunk: str) -> str:
+        """Liest den nächsten Eingabeblock; meldet REJECTED/STACK_EMPTY sofort"""
+        if self.result != RUNNING:
+            return self.result
+        compiled = self.compiled
+        table = compiled.table
+        offsets = compiled.symbol_offsets
+        next_base = compiled.next_base
+
+        base = self._base
+        stack = self._ints
+        steps = self.steps
+        t = self._t
+        result = RUNNING
+        symbol = ""
+        if stack is None:
+            # Zähler: Top ist das Zählsymbol oder (bei Tiefe 1) der Boden
+            deltas = compiled.deltas
+            counted = compiled.counter
+            bottom = compiled.bottom
+            depth = self._depth
+            for symbol in chunk:
+                if not depth:
+                    result = STACK_EMPTY
+                    break
+                offset = offsets.get(symbol)
+                t = (table[base + offset + (counted if depth > 1 else bottom)]
+                     if offset is not None else -1)
+                if t < 0:
+                    result = REJECTED
+                    break
+                base = next_base[t]
+                depth += deltas[t]
+                steps += 1
+            self._depth = depth
+        else:
+            pushes = compiled.pushes
+            # Pro Symbol nur noch Integer-Lookups statt Tupel-Hashing
+            for symbol in chunk:
+                if not stack:
+                    result = STACK_EMPTY
+                    break
+                offset = offsets.get(symbol)
+                t = table[base + offset + stack[-1]] if offset is not None else -1
+                if t < 0:
+                    result = REJECTED
+                    break
+                base = next_base[t]
+                stack.pop()
+                push = pushes[t]
+                if push:
+                    stack.extend(push)
+                steps += 1
+
+        self._base = base
+        self._t = t
+        self._symbol = symbol
+        self.steps = self.position = steps
+        if result != RUNNING:
+            self._sync(result)
+        return result
+
+    def feed_bytes(self, data) -> str:
+        """Wie feed(), aber für bytes/memoryview/mmap - jedes Byte ist ein Symbol"""
+        if self.result != RUNNING:
+            return self.result
+        compiled = self.compiled
+        bytes_table = compiled.byte_table
+        table = bytes_table.table
+        next_base = bytes_table.next_base
+        n_stack = len(compiled.stack_symbols)
+        if not isinstance(data, (bytes, bytearray)):
+            # Über einem memoryview liefert die Iteration ints, über mmap nicht
+            data = memoryview(data).cast('B')
+
+        # Basis-Index in das Byte-Layout umrechnen (und am Ende zurück)
+        base = self._base // compiled.state_stride * bytes_table.stride
+        stack = self._ints
+        steps = self.steps
+        t = self._t
+        result = RUNNING
+        byte = None
+        if stack is None:
+            deltas = compiled.deltas
+            counted = compiled.counter
+            bottom = compiled.bottom
+            depth = self._depth
+            for byte in data:
+                if not depth:
+                    result = STACK_EMPTY
+                    break
+                t = table[base + byte * n_stack + (counted if depth > 1 else bottom)]
+                if t < 0:
+                    result = REJECTED
+                    break
+                base = next_base[t]
+                depth += deltas[t]
+                steps += 1
+            self._depth = depth
+        else:
+            pushes = compiled.pushes
+            for byte in data:
+                if not stack:
+                    result = STACK_EMPTY
+                    break
+                t = table[base + byte * n_stack + stack[-1]]
+                if t < 0:
+                    result = REJECTED
+                    break
+                base = next_base[t]
+                stack.pop()
+                push = pushes[t]
+                if push:
+                    stack.extend(push)
+                steps += 1
+
+        self._base = base // bytes_table.stride * compiled.state_stride
+        self._t = t
+        self._symbol = chr(byte) if byte is not None else ""
+        self.steps = self.position = steps
+        if result != RUNNING:
+            self._sync(result)
+        return result
+
+    def finish(self) -> str:
+        """Beendet die Eingabe: epsilon-Übergänge am Ende und Endergebnis"""
+        if self.result != RUNNING:
+            return self.result
+        compiled = self.compiled
+        macros = compiled.epsilon_macros
+        n_stack = len(compiled.stack_symbols)
+        counted = compiled.counter
+        accepting = compiled.accepting
+        stride = compiled.state_stride
+        bottom = compiled.bottom
+
+        base = self._base
+        stack = self._ints
+        depth = self._depth if stack is None else len(stack)
+        steps = position = self.steps
+        t = self._t
+        result = None
+        # Tiefe 1 heißt beim Zähler immer [Boden]
+        if (position and accepting[base // stride] and depth == 1
+                and (stack is None or stack[0] == bottom)):
+            result = ACCEPTED
+
+        # Am Ende nur noch epsilon-Übergänge, je Top-Feld als ein Makro aus
+        # der vorberechneten epsilon-Hülle; jedes EXPOSE baut ein Feld ab,
+        # die Schleife endet also spätestens nach "Tiefe" Makros
+        if result is None:
+            self._symbol = ""
+        while result is None:
+            if not depth:
+                result = STACK_EMPTY
+                break
+            if stack is None:
+                top = counted if depth > 1 else bottom
+            else:
+                top = stack[-1]
+            kind, base_after, replacement, count, last = macros[base // stride * n_stack + top]
+            if kind == MACRO_DIVERGE:
+                t = -1
+                result = DIVERGED
+                break
+            base = base_after
+            steps += count
+            if stack is None:
+                depth += len(replacement) - 1
+            else:
+                stack.pop()
+                stack.extend(replacement)
+                depth = len(stack)
+            t = last if kind != MACRO_STUCK else -1
+            if kind == MACRO_STUCK:
+                result = ACCEPTED if accepting[base // stride] else REJECTED
+            elif kind == MACRO_ACCEPT:
+                position += 1
+                result = (ACCEPTED if depth == 1 and (stack is None or stack[0] == bottom)
+                          else FINISHED)
+
+        self._base = base
+        self._depth = depth
+        self._t = t
+        self.steps = steps
+        self.position = position
+        self._sync(result)
+        return result
+
+    def _sync(self, result: str):
+        """Überträgt den Integer-Zustand des Laufs auf state/stack/last_key"""
+        compiled = self.compiled
+        stack_symbols = compiled.stack_symbols
+        stack = self._ints
+        t = self._t
+        self.state = compiled.states[self._base // compiled.state_stride]
+        if stack is None:
+            bottom = stack_symbols[compiled.bottom]
+            counted = stack_symbols[compiled.counter]
+            if self.run_length:
+                self.stack = RunStack.from_runs(((bottom, min(self._depth, 1)),
+                                                 (counted, self._depth - 1)))
+            else:
+                self.stack = CounterStack(bottom, counted, self._depth)
+        elif self.run_length:
+            self.stack = RunStack.from_list(stack_symbols[i] for i in stack)
+        else:
+            self.stack = StackNode.from_list(stack_symbols[i] for i in stack)
+        self.result = result
+        # Zuletzt gesuchter Schlüssel wie bei step() (für Fehlermeldungen)
+        if t >= 0:
+            self.last_key = compiled.keys[t]
+            self.last_target = self.transitions[self.last_key]
+        elif self.stack:
+            self.last_key = (self.state, self._symbol, self.stack.top)
+            self.last_target = None
+
+    def accepts_stream(self, chunks: Iterable[str], length: Optional[int] = None) -> bool:
+        """Prüft ein Wort, das blockweise ankommt (z.B. aus einer großen Datei)
+
+        Nichtdeterministisch wird die Menge der Konfigurationen Block für
+        Block weitergeschoben. Ohne max_depth begrenzt die Wortlänge die
+        Stacktiefe (epsilon-Push-Zyklen); ist dann auch length nicht
+        angegeben, werden die Blöcke erst zu einem Wort zusammengesetzt.
+        """
+        if self.nondeterministic:
+            if length is None and self.max_depth is None:
+                word = "".join(chunks)
+                return self._run_nondeterministic((word,), len(word)) == ACCEPTED
+            return self._run_nondeterministic(chunks, length) == ACCEPTED
+        self.begin()
+        for chunk in chunks:
+            if self.feed(chunk) != RUNNING:
+                return False
+        return self.finish() == ACCEPTED
+
+    def accepts_file(self, path: str, chunk_size: int = 1 << 24) -> bool:
+        """Prüft den Inhalt einer Datei als ein Wort, gelesen per mmap ohne Dekodieren
+
+        Ein abschließender Zeilenumbruch gehört nicht zum Wort. Jedes Byte
+        ist ein Zeichen, daher nur für ASCII-Eingabesymbole (sonst ValueError).
+        """
+        ByteTable.check_alphabet(self.compiled.input_symbols)
+        with open(path, "rb") as stream:
+            if os.fstat(stream.fileno()).st_size == 0:
+                return self.accepts("")
+            with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    end = len(view)
+                    if view[end - 1] == 0x0A:
+                        end -= 1
+                        if end and view[end - 1] == 0x0D:
+                            end -= 1
+                    if self.nondeterministic:
+                        chunks = (str(view[start:min(start + chunk_size, end)], "latin-1")
+                                  for start in range(0, end, chunk_size))
+                        return self._run_nondeterministic(chunks, end) == ACCEPTED
+                    self.begin()
+                    for start in range(0, end, chunk_size):
+                        if self.feed_bytes(view[start:min(start + chunk_size, end)]) != RUNNING:
+                            return False
+                    return self.finish() == ACCEPTED
+                finally:
+                    view.release()
+
+    def _run_nondeterministic(self, chunks: Iterable[str], length: Optional[int] = None,
+                              word: str = "") -> str:
+        """Breitensuche über alle Konfigurationen (Zustand, Stack) je Position
+
+        Die Eingabe kommt blockweise; length ist ihre Gesamtlänge (Grenze
+        der Stacktiefe). Wie bei feed() wird sie nicht gespeichert, word ist
+        nur das, was run() als Wort hinterlegt. Konfigurationen, die mehr
+        Eingabe zum Abbauen bräuchten als noch kommt, fallen ohne Folgen weg;
+        hat die Tiefengrenze etwas abgeschnitten und nichts akzeptiert, gibt
+        es ExplorationLimitError statt REJECTED.
+        """
+        started = time.perf_counter()
+        graph = ConfigurationGraph(self, length, self.profile)
+        compiled = graph.compiled
+        current = graph.start
+        explored = len(current)
+        position = 0
+        for chunk in chunks:
+            for symbol in chunk:
+                following = graph.read(current, symbol, position)
+                if following is None:
+                    current = frozenset()
+                    break
+                current = following
+                position += 1
+                explored += len(current)
+            else:
+                continue
+            break
+        else:
+            if length is not None and position != length:
+                raise ValueError(f"Eingabe hat {position} Zeichen statt {length}")
+
+        accepted = [base for base, stack in current
+                    if compiled.accepting[base // compiled.state_stride] and stack is graph.bottom]
+        exact = None
+        if not accepted and graph.pruned:
+            # Abgeschnittene Suche: kein Lauf gefunden heißt hier nicht REJECTED.
+            # Mit bekanntem Wort und ohne vorgegebene Grenze entscheidet die
+            # Tripel-Grammatik exakt (Nullable-Nichtterminale, epsilon-Zyklen)
+            if self.max_depth is not None or length != len(word):
+                raise ExplorationLimitError(
+                    f"Stacktiefe über {graph.max_depth} abgeschnitten, Ergebnis unbekannt")
+            exact = self.accepts_exactly(word)
+        if self.profile is not None:
+            self.profile.configurations += explored
+            self.profile.times["lookup"] += time.perf_counter() - started
+        self.word = word
+        self.position = position
+        self.steps = explored
+        self.configurations = len(current)
+        # Bei der exakten Entscheidung ist der akzeptierende Endzustand nicht bekannt
+        self.state = compiled.states[accepted[0] // compiled.state_stride] if accepted else None
+        self.stack = StackNode(self.initial_stack_symbol, EMPTY_STACK) if accepted or exact else EMPTY_STACK
+        self.result = ACCEPTED if accepted or exact else REJECTED
+        return self.result
+
+    def accepts_exactly(self, word: str) -> bool:
+        """Entscheidet ein Wort ohne Tiefengrenze: Earley über der Tripel-Grammatik"""
+        if self._exact_parser is None:
+            grammar = self.to_grammar()
+            self._exact_parser = EarleyParser(grammar) if grammar.start in grammar.nonterminals else False
+        return bool(self._exact_parser) and self._exact_parser.accepts(word)
+
+    def to_grammar(self) -> Grammar:
+        """Tripel-Grammatik (Standardkonstruktion PDA -> kontextfreie Grammatik)
+
+        Das Nichtterminal (p, X, q) erzeugt die Eingaben, mit denen der
+        Automat aus p mit X oben dieses X abbaut und danach in q ist. Das
+        Startsymbol ist (Start, Kellerboden, None): None ist ein gedachter
+        Zustand, in den ein Endzustand den letzten Kellerboden abbaut.
+        Erzeugt werden nur vom Start aus erreichbare, produktive Regeln.
+        """
+        moves = {}
+        for (state, symbol, top), target in self.transitions.items():
+            for new_state, stack_action in transition_targets(target):
+                moves.setdefault((state, top), []).append((symbol, new_state, stack_action))
+        # Nach dem Abbau eines Symbols ist der Automat im Ziel eines Pop-Übergangs
+        popped_to = sorted({new_state for targets in moves.values()
+                            for _, new_state, stack_action in targets if not stack_action})
+        accepting = set(self.accepting_states)
+        start = (self.start_state, self.initial_stack_symbol, None)
+        productions = []
+        seen = {start}
+        todo = [start]
+        while todo:
+            lhs = todo.pop()
+            state, top, end = lhs
+            if end is None and top == self.initial_stack_symbol and state in accepting:
+                productions.append((lhs, ()))
+            for symbol, new_state, stack_action in moves.get((state, top), ()):
+                read = (symbol,) if symbol else ()
+                if not stack_action:
+                    if new_state == end:
+                        productions.append((lhs, read))
+                    continue
+                for middle in itertools.product(popped_to, repeat=len(stack_action) - 1):
+                    states = (new_state,) + middle + (end,)
+                    parts = tuple((states[i], pushed, states[i + 1]) for i, pushed in enumerate(stack_action))
+                    productions.append((lhs, read + parts))
+                    for part in parts:
+                        if part not in seen:
+                            seen.add(part)
+                            todo.append(part)
+                if len(productions) > self.max_configurations:
+                    raise ExplorationLimitError(
+                        f"Tripel-Grammatik mit mehr als {self.max_configurations} Regeln")
+
+        # Nur produktive Nichtterminale (Fixpunkt), sonst blieben Tupel als Terminale übrig
+        productive = set()
+        changed = True
+        while changed:
+            changed = False
+            for lhs, rhs in productions:
+                if lhs not in productive and all(
+                        not isinstance(part, tuple) or part in productive for part in rhs):
+                    productive.add(lhs)
+                    changed = True
+        return Grammar(start, [(lhs, rhs) for lhs, rhs in productions if lhs in productive and all(
+            not isinstance(part, tuple) or part in productive for part in rhs)])
+
+    @property
+    def input_alphabet(self) -> List[str]:
+        """Eingabesymbole der Übergänge (ohne epsilon), sortiert"""
+        return sorted({symbol for _, symbol, _ in self.transitions if symbol})
+
+    def accepted_words(self, max_length: Optional[int] = None) -> Iterator[str]:
+        """Zählt die akzeptierten Wörter auf: kürzere zuerst, gleich lange alphabetisch
+
+        Tiefensuche über die Präfixe (ConfigurationGraph); ein Präfix, nach
+        dem kein Lauf weitergeht, wird mit allen Fortsetzungen übersprungen.
+        Jede Länge wird neu durchsucht (iterative Vertiefung), im Speicher
+        liegt also nur der Suchpfad. Ohne max_length endet die Aufzählung
+        erst, wenn kein Präfix der nächsten Länge mehr lebt.
+        """
+        length = 0
+        while max_length is None or length <= max_length:
+            graph = ConfigurationGraph(self, length)
+            alphabet = graph.alphabet
+            letters = []
+            # Suchpfad: (Knoten, Index des nächsten Symbols)
+            path = [(graph.start, 0)]
+            alive = False
+            while path:
+                node, index = path[-1]
+                if len(letters) == length or index == len(alphabet):
+                    if len(letters) == length:
+                        alive = True
+                        if graph.accepts(node):
+                            yield "".join(letters)
+                    path.pop()
+                    if path:
+                        letters.pop()
+                    continue
+                path[-1] = (node, index + 1)
+                child = graph.read(node, alphabet[index], len(letters))
+                if child is not None:
+                    letters.append(alphabet[index])
+                    path.append((child, 0))
+            if graph.nondeterministic:
+                if graph.pruned:
+                    raise ExplorationLimitError(
+                        f"Stacktiefe über {graph.max_depth} abgeschnitten (Länge {length})")
+                alive = alive or graph.budget_cut
+            if not alive:
+                return
+            length += 1
+
+    def record_trace(self, word: str, path: str) -> str:
+        """Führt ein Wort schrittweise aus und schreibt den Lauf als Trace-Datei"""
+        self.reset(word)
+        with TraceWriter(path, self) as writer:
+            while self.step() == RUNNING:
+                writer.record()
+            writer.record()
+        return self.result
+
+    def accepts(self, word: str) -> bool:
+        """Prüft, ob das Wort akzeptiert wird"""
+        return self.run(word) == ACCEPTED
+
+    def accepts_many(self, words: Iterable[str]) -> Iterator[bool]:
+        """Prüft mehrere Wörter nacheinander (liefert die Ergebnisse lazy)"""
+        for word in words:
+            yield self.run(word) == ACCEPTED
+
+    def accepts_batch(self, words: List[str], batch_size: int = 1 << 16) -> List[bool]:
+        """Prüft viele Wörter gleichzeitig mit NumPy (gleich lange Wörter im Gleichschritt)
+
+        Wörter gleicher Länge laufen gemeinsam: Zustände, Stackzeiger und
+        ein 2D-Stackpuffer sind Arrays, ein Schritt ist ein Tabellen-Lookup
+        per Fancy Indexing für alle Wörter zugleich. Ohne NumPy bzw. für
+        nichtdeterministische Automaten wird Wort für Wort geprüft.
+        """
+        if np is None or self.nondeterministic:
+            return list(self.accepts_many(words))
+        results = np.zeros(len(words), dtype=bool)
+        # Nach Länge sortiert liegen gleich lange Wörter nebeneinander
+        lengths = np.fromiter(map(len, words), dtype=np.int64, count=len(words))
+        order = np.argsort(lengths, kind="stable")
+        bounds = np.flatnonzero(np.diff(lengths[order])) + 1
+        for indices in np.split(order, bounds):
+            for start in range(0, len(indices), batch_size):
+                group = indices[start:start + batch_size]
+                results[group] = self._accepts_lockstep([words[i] for i in group.tolist()])
+        return results.tolist()
+
+    def _accepts_lockstep(self, words: List[str]):
+        """Lässt gleich lange Wörter im Gleichschritt laufen (gleiche Semantik wie run())"""
+        compiled = self.compiled
+        batch = compiled.batch_table
+        table = batch.table
+        next_base = batch.next_base
+        pushes = batch.pushes
+        deltas = batch.deltas
+        stride = batch.stride
+        bottom = compiled.bottom
+        count = len(words)
+        length = len(words[0])
+
+        # Symbole als Offsets, eine Zeile pro Position; Codepunkte über UTF-32
+        if length:
+            points = np.frombuffer("".join(words).encode("utf-32-le"), dtype=np.uint32)
+            lookup = np.full(int(points.max()) + 1, batch.unknown, dtype=np.int64)
+            for symbol, offset in batch.symbol_offsets.items():
+                if len(symbol) == 1 and ord(symbol) < len(lookup):
+                    lookup[ord(symbol)] = offset
+            offsets = lookup[points].reshape(count, length).T.copy()
+
+        # Flacher Stackpuffer, pro Wort [Wächter, Boden, ...]; gepusht werden
+        # immer width Felder, was über dem Top liegt, ist bedeutungslos
+        growth = max(int(deltas.max()), 0)
+        capacity = 2 + length * growth + batch.width
+        stack = np.zeros(count * capacity, dtype=np.int32)
+        stack[::capacity] = batch.sentinel
+        floor = np.arange(count, dtype=np.int64) * capacity + 1
+        stack[floor] = bottom
+        top = floor.copy()
+        base = np.full(count, compiled.start_base // compiled.state_stride * stride, dtype=np.int64)
+        columns = np.arange(batch.width, dtype=np.int64)
+
+        for position in range(length):
+            t = table[base + offsets[position] + stack[top]]
+            base = next_base[t]
+            stack[top[:, None] + columns] = pushes[t]
+            top += deltas[t]
+            if position % 16 == 15 and (base == batch.dead_base).all():
+                break
+
+        # Ganze Eingabe gelesen: Endzustand mit [Boden] akzeptiert direkt
+        accepted = np.zeros(count, dtype=bool)
+        accepting = batch.accepting
+        alive = np.flatnonzero(base != batch.dead_base)
+        if length:
+            done = (accepting[base[alive] // stride] & (top[alive] == floor[alive])
+                    & (stack[floor[alive]] == bottom))
+            accepted[alive[done]] = True
+            alive = alive[~done]
+
+        # Am Ende nur noch epsilon-Übergänge (Symbol-Offset 0), nur noch für
+        # die übrigen Wörter; leerer Stack verwirft wie bei run()
+        while len(alive):
+            alive = alive[top[alive] >= floor[alive]]
+            alive = alive[~batch.diverges[base[alive] // stride * batch.n_stack + stack[top[alive]]]]
+            t = table[base[alive] + stack[top[alive]]]
+            stuck = t == batch.sink
+            accepted[alive[stuck]] = accepting[base[alive[stuck]] // stride]
+            alive, t = alive[~stuck], t[~stuck]
+            if len(alive) and int((top[alive] - floor[alive]).max()) + batch.width + 1 >= capacity:
+                # Epsilon-Pushes am Ende: Puffer pro Wort verdoppeln
+                grown = np.zeros(count * capacity * 2, dtype=np.int32)
+                grown.reshape(count, 2 * capacity)[:, :capacity] = stack.reshape(count, capacity)
+                used = top - floor
+                capacity *= 2
+                floor = np.arange(count, dtype=np.int64) * capacity + 1
+                top = floor + used
+                stack = grown
+            base[alive] = next_base[t]
+            stack[top[alive][:, None] + columns] = pushes[t]
+            top[alive] += deltas[t]
+            final = accepting[base[alive] // stride]
+            rows = alive[final]
+            accepted[rows] = (top[rows] == floor[rows]) & (stack[floor[rows]] == bottom)
+            alive = alive[~final]
+        return accepted
+
+    def classify(self, words: Iterable[str]) -> Iterator[Optional[bool]]:
+        """Wie accepts_many, aber None statt Abbruch, wenn die Suche das Limit überschreitet"""
+        for word in words:
+            try:
+                yield self.run(word) == ACCEPTED
+            except ExplorationLimitError:
+                yield None
+
+    def classify_parallel(self, words: Iterable[str], jobs: Optional[int] = None,
+                          chunk_size: int = 20000) -> Iterator[Optional[bool]]:
+        """Klassifiziert Wörter auf mehreren Prozessen, Ergebnisse in Eingabereihenfolge
+
+        Jeder Worker erhält die kompilierte Tabelle einmal beim Start; danach
+        werden nur noch Wortblöcke verschickt. Es sind höchstens
+        4 * jobs Blöcke gleichzeitig unterwegs, der Speicherbedarf bleibt
+        also auch bei beliebig langen Eingabeströmen begrenzt.
+        """
+        jobs = jobs or os.cpu_count() or 1
+        words = iter(words)
+        engine = self.clone()
+        engine._compiled = self.compiled
+        with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(engine,)) as pool:
+            pending = deque()
+            while True:
+                chunk = list(itertools.islice(words, chunk_size))
+                if chunk:
+                    pending.append(pool.submit(_classify_chunk, chunk))
+                if pending and (not chunk or len(pending) >= 4 * jobs):
+                    yield from pending.popleft().result()
+                elif not chunk:
+                    return
+
+
+# Engine eines Worker-Prozesses (von _init_worker einmal pro Prozess gesetzt)
+_worker_engine = None
+
+
+class ConfigurationGraph:
+    """Was ein Automat nach einem gelesenen Präfix noch weiß, als hashbarer Knoten
+
+    Deterministisch ist ein Knoten (Zustand, Stack, schon akzeptiert?) mit
+    der Semantik von step(): Symbole nur über Symbol-Übergänge, epsilon
+    erst am Ende. Nichtdeterministisch ist er die epsilon-Hülle aller
+    Konfigurationen als frozenset (Teilmengenkonstruktion), damit zählt
+    jedes Wort genau einmal. Stacks sind hash-consed, gleiche Knoten sind
+    also gleich - Grundlage für accepted_words und AutomatonSampler.
+    """
+
+    def __init__(self, engine: "Kellerautomat", max_length: Optional[int] = 0,
+                 profile: Optional[Profile] = None):
+        self.engine = engine
+        self.profile = profile
+        self.nondeterministic = engine.nondeterministic
+        self.alphabet = engine.input_alphabet
+        self.max_configurations = engine.max_configurations
+        self.max_length = max_length
+        # Gleiche Stacks sind derselbe Knoten: Vergleich und Hashing über die Identität
+        self._interned = {}
+        if self.nondeterministic:
+            compiled = self.compiled = engine.compiled
+            # Ohne Grenze könnten epsilon-Push-Zyklen den Stack endlos wachsen lassen
+            self.max_depth = engine.max_depth
+            if self.max_depth is None:
+                growth = max([len(push) - 1 for push in compiled.pushes] + [1])
+                self.max_depth = ((max_length or 0) + 1) * growth + 1
+            # Hat die Tiefengrenze eine Konfiguration verworfen, ist ein
+            # fehlender Lauf kein Beweis für REJECTED
+            self.pruned = False
+            # Wegen zu wenig Resteingabe verworfen: mit längeren Wörtern ginge es weiter
+            self.budget_cut = False
+            # Eingabe, die ein Stack mindestens noch braucht (alles über dem
+            # untersten Symbol muss vor dem Akzeptieren abgebaut werden)
+            self.pop_costs = self.minimum_pops(engine.transitions, compiled.stack_ids)
+            self._costs = {EMPTY_STACK: 0}
+            self.bottom = self.push(compiled.bottom, EMPTY_STACK)
+            self.start = self.close({(compiled.start_base, self.bottom)}, 0)
+        else:
+            self.bottom = self.push(engine.initial_stack_symbol, EMPTY_STACK)
+            self.start = (engine.start_state, self.bottom, False)
+            # Für das epsilon-Ende eines Laufs (step() mit echter Semantik)
+            self._scratch = engine.clone()
+
+    @staticmethod
+    def minimum_pops(transitions, stack_ids: Dict[str, int]) -> List[float]:
+        """Je Stack-Symbol (ID): wie viele Eingabezeichen es mindestens kostet, es abzubauen
+
+        Ein Übergang mit X oben kostet sein Eingabezeichen plus das Abbauen
+        aller Symbole, die er an die Stelle von X legt; Fixpunkt über alle
+        Übergänge. Unendlich heißt: X verschwindet nie wieder vom Stack.
+        """
+        costs = [float("inf")] * len(stack_ids)
+        rules = [(stack_ids[top], 1 if symbol else 0, [stack_ids[pushed] for pushed in stack_action])
+                 for (_, symbol, top), target in transitions.items()
+                 for _, stack_action in transition_targets(target)]
+        changed = True
+        while changed:
+            changed = False
+            for top, read, pushed in rules:
+                cost = read + sum(costs[symbol] for symbol in pushed)
+                if cost < costs[top]:
+                    costs[top] = cost
+                    changed = True
+        return costs
+
+    def push(self, symbol, below: StackNode) -> StackNode:
+        node = self._interned.get((symbol, below))
+        if node is None:
+            node = self._interned[(symbol, below)] = StackNode(symbol, below)
+            if self.nondeterministic:
+                self._costs[node] = self._costs[below] + self.pop_costs[symbol] if below.depth else 0
+        return node
+
+    def budget(self, position: Optional[int]) -> float:
+        """Höchstens noch lesbare Eingabe für Konfigurationen an dieser Position"""
+        if self.max_length is None:
+            return float("inf")
+        return self.max_length - (position or 0)
+
+    def successors(self, configurations, offset: int,
+                   position: Optional[int] = None) -> Iterator[Tuple[int, StackNode]]:
+        """Alle Folgekonfigurationen für ein Symbol (Offset 0 = epsilon)
+
+        position ist die der Folgekonfigurationen; wer mehr Eingabe zum
+        Abbauen braucht, als danach noch kommen kann, fällt weg.
+        """
+        compiled = self.compiled
+        table, next_base, pushes, alternatives = (
+            compiled.table, compiled.next_base, compiled.pushes, compiled.alternatives)
+        push, max_depth, costs = self.push, self.max_depth, self._costs
+        budget = self.budget(position)
+        profile = self.profile
+        for base, stack in configurations:
+            if not stack.depth:
+                continue
+            t = table[base + offset + stack.symbol]
+            if t < 0:
+                continue
+            for t in alternatives.get(t, (t,)):
+                new_stack = stack.below
+                for symbol in pushes[t]:
+                    new_stack = push(symbol, new_stack)
+                if costs[new_stack] > budget:
+                    self.budget_cut = True
+                    continue
+                if new_stack.depth > max_depth:
+                    self.pruned = True
+                    continue
+                if profile is not None:
+                    profile.count(compiled.keys[t], new_stack.depth)
+                yield next_base[t], new_stack
+
+    def close(self, configurations, position: Optional[int] = None) -> frozenset:
+        """Epsilon-Hülle; identische Konfigurationen werden nur einmal besucht"""
+        current = set(configurations)
+        frontier = list(current)
+        while frontier:
+            new = [c for c in self.successors(frontier, 0, position) if c not in current]
+            current.update(new)
+            frontier = new
+            if len(current) > self.max_configurations:
+                where = "" if position is None else f" an Position {position}"
+                raise ExplorationLimitError(
+                    f"mehr als {self.max_configurations} Konfigurationen{where}")
+        return frozenset(current)
+
+    def read(self, node, symbol: str, position: Optional[int] = None):
+        """Knoten nach einem weiteren Eingabesymbol; None, wenn kein Lauf weitergeht"""
+        if self.nondeterministic:
+            offset = self.compiled.symbol_offsets.get(symbol)
+            position = None if position is None else position + 1
+            following = set(self.successors(node, offset, position)) if offset is not None else None
+            if not following:
+                return None
+            return self.close(following, position)
+        state, stack, _ = node
+        if not stack.depth:
+            return None
+        target = self.engine.transitions.get((state, symbol, stack.symbol))
+        if target is None:
+            return None
+        new_state, stack_action = target
+        stack = stack.below
+        for pushed in reversed(stack_action):
+            stack = self.push(pushed, stack)
+        # Wie apply(): Endzustand mit nur dem Kellerboden akzeptiert, falls hier Schluss ist
+        engine = self.engine
+        return (new_state, stack, new_state in engine.accepting_states and stack.depth == 1
+                and stack.symbol == engine.initial_stack_symbol)
+
+    def accepts(self, node) -> bool:
+        """Akzeptiert der Automat, wenn die Eingabe nach diesem Knoten endet?"""
+        if self.nondeterministic:
+            compiled = self.compiled
+            return any(compiled.accepting[base // compiled.state_stride] and stack is self.bottom
+                       for base, stack in node)
+        state, stack, accepted = node
+        if accepted:
+            return True
+        scratch = self._scratch
+        scratch.reset("")
+        scratch.state = state
+        scratch.stack = stack
+        while scratch.step() == RUNNING:
+            pass
+        return scratch.result == ACCEPTED
+
+    def children(self, node, position: Optional[int] = None) -> List[Tuple[str, object]]:
+        """(Symbol, Folgeknoten) für jedes Symbol, nach dem noch ein Lauf weitergeht"""
+        result = []
+        for symbol in self.alphabet:
+            child = self.read(node, symbol, position)
+            if child is not None:
+                result.append((symbol, child))
+        return result
+
+
+class Replay:
+    """Aufzeichnung eines schrittweisen Laufs zum Vor- und Zurückspulen
+
+    Gespeichert werden nur die Transitionsnummern (4 Byte pro Schritt) und
+    alle `interval` Schritte ein Checkpoint der Konfiguration. Der Stack im
+    Checkpoint ist persistent und teilt seine Knoten mit den übrigen, der
+    Speicher wächst also mit O(Schritte / interval + Tiefe). seek(n) stellt
+    den letzten Checkpoint vor n her und wendet von dort höchstens
+    interval - 1 Transitionen erneut an, ohne Tabellen-Lookup. Fehlende
+    Checkpoints (aus einer Trace-Datei geladen) entstehen beim ersten Spulen.
+    """
+
+    def __init__(self, engine: Kellerautomat, interval: int = 1024):
+        if engine.nondeterministic:
+            raise ValueError("Replay unterstützt nur deterministische Automaten")
+        self.engine = engine
+        self.interval = max(1, interval)
+        compiled = engine.compiled
+        self.keys = compiled.keys
+        self.ids = {key: t for t, key in enumerate(compiled.keys)}
+        self.transitions = array('i')
+        # Checkpoint: (Zustand, Position, Stack, letzter Schritt) nach k * interval Schritten
+        self.checkpoints = [self._configuration()]
+        # Ergebnis nach dem letzten aufgezeichneten Schritt
+        self.final = (engine.result, engine.last_key, engine.last_target)
+        # Eigene Engine für step_record, damit die angezeigte stehen bleibt
+        self._scratch = None
+
+    @classmethod
+    def record_run(cls, engine: Kellerautomat, word: str, interval: int = 1024) -> "Replay":
+        """Führt ein Wort ohne GUI schrittweise aus und zeichnet den Lauf auf"""
+        engine.reset(word)
+        replay = cls(engine, interval)
+        while engine.step() == RUNNING:
+            replay.record()
+        replay.record()
+        return replay
+
+    @classmethod
+    def from_trace(cls, path: str, interval: int = 1024) -> "Replay":
+        """Lädt eine Trace-Datei (siehe TraceWriter); der Automat wird nicht erneut ausgeführt"""
+        definition, word, transitions, result = read_trace(path)
+        engine = Kellerautomat.from_definition(definition)
+        engine.reset(word)
+        replay = cls(engine, interval)
+        replay.transitions = transitions
+        replay.final = (result, None, None)
+        return replay
+
+    def _configuration(self, engine: Optional[Kellerautomat] = None):
+        engine = engine or self.engine
+        return engine.state, engine.position, engine.stack, engine.last_step
+
+    def __len__(self):
+        return len(self.transitions)
+
+    def record(self):
+        """Übernimmt den zuletzt ausgeführten Schritt der Engine (nach step())"""
+        engine = self.engine
+        if engine.steps > len(self.transitions):
+            self.transitions.append(self.ids[engine.last_key])
+            if engine.steps == len(self.checkpoints) * self.interval:
+                self.checkpoints.append(self._configuration())
+        self.final = (engine.result, engine.last_key, engine.last_target)
+
+    def seek(self, step: int) -> str:
+        """Setzt die Engine auf den Stand nach `step` Schritten und liefert das Ergebnis"""
+        return self._seek(self.engine, step)
+
+    def step_record(self, step: int) -> Tuple[StepRecord, object]:
+        """Schritt `step` (ab 1) als (StepRecord, Stack vorher), ohne die Engine zu bewegen
+
+        Eine zweite Engine spult zum Schritt davor; aufeinanderfolgende
+        Schritte (eine Log-Seite) kosten danach je nur eine Transition.
+        """
+        scratch = self._scratch
+        if scratch is None:
+            scratch = self._scratch = self.engine.clone()
+        if scratch.word is not self.engine.word or scratch.steps != step - 1:
+            scratch.word = self.engine.word
+            scratch.run_length = self.engine.run_length
+            self._seek(scratch, step - 1)
+        stack_before = scratch.stack
+        key = self.keys[self.transitions[step - 1]]
+        scratch.apply(key, scratch.transitions[key])
+        return scratch.last_step, stack_before
+
+    def _seek(self, engine: Kellerautomat, step: int) -> str:
+        step = max(0, min(step, len(self.transitions)))
+        checkpoint = min(step // self.interval, len(self.checkpoints) - 1)
+        engine.state, engine.position, engine.stack, engine.last_step = self.checkpoints[checkpoint]
+        engine.steps = checkpoint * self.interval
+        # Darstellung kann seit dem Checkpoint umgeschaltet worden sein (Läufe A×n)
+        if engine.run_length != isinstance(engine.stack, RunStack):
+            engine.stack = engine.make_stack(engine.stack.to_list())
+        engine.result = RUNNING
+        transitions, keys = engine.transitions, self.keys
+        for index in range(engine.steps, step):
+            key = keys[self.transitions[index]]
+            engine.apply(key, transitions[key])
+            if engine.steps == len(self.checkpoints) * self.interval:
+                self.checkpoints.append(self._configuration(engine))
+        if step == len(self.transitions):
+            engine.result, engine.last_key, engine.last_target = self.final
+        elif engine.last_step is not None:
+            engine.last_key = engine.last_step.key
+            engine.last_target = transitions[engine.last_key]
+        else:
+            engine.last_key = engine.last_target = None
+        return engine.result
+
+
+def encode_varint(value: int) -> bytes:
+    """Vorzeichenlose Ganzzahl als LEB128-Varint (7 Bit pro Byte)"""
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_varints(data) -> Iterator[int]:
+    """Liest aufeinanderfolgende Varints aus bytes/memoryview"""
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            yield value
+            value = shift = 0
+        else:
+            shift += 7
+    if shift:
+        raise TraceError("abgeschnittener Varint")
+
+
+class TraceWriter:
+    """Schreibt einen Lauf als kompakte Binärspur (gepuffert)
+
+    Aufbau: TRACE_MAGIC, Varint-Länge und JSON-Kopf mit Definition und
+    Wort, pro Schritt zwei Varints (Transitionsnummer, Anzahl gepushter
+    Symbole) und ein Fußteil fester Länge: Schrittzahl (8 Byte), Ergebnis
+    (1 Byte), TRACE_FOOTER_MAGIC. Bei kleinen Automaten ist ein Schritt
+    zwei Byte groß.
+    """
+
+    def __init__(self, path: str, engine: Kellerautomat, buffer_size: int = 1 << 16):
+        if engine.nondeterministic:
+            raise ValueError("Traces unterstützen nur deterministische Automaten")
+        self.engine = engine
+        compiled = engine.compiled
+        self.ids = {key: t for t, key in enumerate(compiled.keys)}
+        # Schneller Weg: jede Transitionsnummer und Pushanzahl passt in ein Byte
+        self.small = len(compiled.keys) < 0x80 and all(len(push) < 0x80 for push in compiled.pushes)
+        self.push_counts = bytes(len(push) for push in compiled.pushes) if self.small else None
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.steps = 0
+        header = json.dumps({"definition": engine.definition_data(), "word": engine.word},
+                            ensure_ascii=False).encode("utf-8")
+        self.stream = open(path, "wb")
+        self.stream.write(TRACE_MAGIC + encode_varint(len(header)) + header)
+
+    def write(self, transition: int):
+        """Hängt einen Schritt an (Transitionsnummer wie in CompiledTable.keys)"""
+        if self.small:
+            self.buffer += bytes((transition, self.push_counts[transition]))
+        else:
+            pushed = len(self.engine.compiled.pushes[transition])
+            self.buffer += encode_varint(transition) + encode_varint(pushed)
+        self.steps += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def write_many(self, transitions: array):
+        """Hängt viele Schritte auf einmal an (z. B. aus einem Replay)"""
+        if self.small:
+            ids = array('B', transitions).tobytes()
+            records = bytearray(2 * len(ids))
+            records[0::2] = ids
+            records[1::2] = ids.translate(self.push_counts.ljust(256, b"\0"))
+            self.buffer += records
+            self.steps += len(ids)
+            self.flush()
+        else:
+            for transition in transitions:
+                self.write(transition)
+
+    def record(self):
+        """Übernimmt den zuletzt ausgeführten Schritt der Engine (nach step())"""
+        engine = self.engine
+        if engine.steps > self.steps:
+            self.write(self.ids[engine.last_key])
+
+    def flush(self):
+        self.stream.write(self.buffer)
+        self.buffer.clear()
+
+    def close(self, result: Optional[str] = None):
+        """Schreibt den Fußteil; ohne Ergebnis gilt das aktuelle der Engine"""
+        if self.stream.closed:
+            return
+        self.flush()
+        code = TRACE_RESULTS.index(result or self.engine.result)
+        self.stream.write(self.steps.to_bytes(8, "little") + bytes((code,)) + TRACE_FOOTER_MAGIC)
+        self.stream.close()
+
+    def abort(self):
+        """Schließt die Datei ohne Fußteil: read_trace meldet sie als unvollständig"""
+        if self.stream.closed:
+            return
+        self.flush()
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Ein abgebrochener Lauf darf nicht wie ein vollständiger aussehen
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+def write_trace(path: str, replay: Replay):
+    """Speichert eine Aufzeichnung als Trace-Datei"""
+    engine = replay.engine
+    # Der Kopf braucht Definition und Wort, nicht den aktuellen Stand
+    with TraceWriter(path, engine) as writer:
+        writer.write_many(replay.transitions)
+        writer.close(replay.final[0])
+
+
+def read_trace(path: str):
+    """Liest eine Trace-Datei per mmap: (Definition, Wort, Transitionsnummern, Ergebnis)"""
+    with open(path, "rb") as stream:
+        try:
+            data = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # leere Datei
+            raise TraceError(f"{path}: keine Trace-Datei") from None
+    with data:
+        if data[:len(TRACE_MAGIC)] != TRACE_MAGIC:
+            raise TraceError(f"{path}: keine Trace-Datei")
+        if len(data) < len(TRACE_MAGIC) + TRACE_FOOTER_SIZE or data[-len(TRACE_FOOTER_MAGIC):] != TRACE_FOOTER_MAGIC:
+            raise TraceError(f"{path}: Trace unvollständig (Aufzeichnung abgebrochen?)")
+        footer = data[-TRACE_FOOTER_SIZE:]
+        steps = int.from_bytes(footer[:8], "little")
+        if footer[8] >= len(TRACE_RESULTS):
+            raise TraceError(f"{path}: unbekanntes Ergebnis")
+        result = TRACE_RESULTS[footer[8]]
+
+        # Kopf: Varint-Länge + JSON
+        offset = len(TRACE_MAGIC)
+        length = shift = 0
+        while True:
+            byte = data[offset]
+            offset += 1
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        try:
+            header = json.loads(data[offset:offset + length].decode("utf-8"))
+            definition = parse_definition(header["definition"], path)
+            word = header["word"]
+        except (ValueError, KeyError, TypeError) as error:
+            raise TraceError(f"{path}: ungültiger Kopf: {error}") from None
+
+        # Pushanzahl je Transition in Tabellenreihenfolge, zur Prüfung der Schritte
+        push_counts = [len(stack_action) for target in definition["transitions"].values()
+                       for _, stack_action in transition_targets(target)]
+        # Die Schritte werden direkt aus dem mmap in ein array('i') dekodiert;
+        # kopiert wird höchstens ein Block von TRACE_READ_CHUNK Bytes
+        with memoryview(data) as view, view[offset + length:len(data) - TRACE_FOOTER_SIZE] as records:
+            transitions = None
+            if (len(records) == 2 * steps and len(push_counts) < 0x80
+                    and max(push_counts, default=0) < 0x80):
+                transitions = _read_short_records(records, push_counts, path)
+            if transitions is None:
+                transitions = _read_varint_records(records, push_counts, path)
+    if len(transitions) != steps:
+        raise TraceError(f"{path}: {len(transitions)} Schritte statt {steps}")
+    return definition, word, transitions, result
+
+
+def _read_short_records(records: memoryview, push_counts: List[int], path: str) -> Optional[array]:
+    """Schnellweg für Spuren aus lauter einbytigen Varints (sonst None)"""
+    table = bytes(push_counts).ljust(256, b"\xff")
+    transitions = array('i')
+    for begin in range(0, len(records), TRACE_READ_CHUNK):
+        chunk = records[begin:begin + TRACE_READ_CHUNK].tobytes()
+        if not chunk.isascii():
+            return None
+        # Jedes zweite Byte ist eine Transitionsnummer, danach ihre Pushanzahl
+        ids = chunk[0::2]
+        if chunk[1::2] != ids.translate(table):
+            raise TraceError(f"{path}: Schritte passen nicht zur Definition")
+        transitions.extend(ids)
+    return transitions
+
+
+def _read_varint_records(records: memoryview, push_counts: List[int], path: str) -> array:
+    """Allgemeiner Weg: Varint-Paare (Transitionsnummer, Pushanzahl) nacheinander"""
+    transitions = array('i')
+    values = decode_varints(records)
+    for transition in values:
+        pushed = next(values, None)
+        if transition >= len(push_counts) or push_counts[transition] != pushed:
+            values.close()
+            raise TraceError(f"{path}: Schritte passen nicht zur Definition")
+        transitions.append(transition)
+    return transitions
+
+
+def _init_worker(engine: Kellerautomat):
+    """Initialisiert einen Worker-Prozess mit der vorkompilierten Engine"""
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _classify_chunk(words: List[str]) -> List[Optional[bool]]:
+    """Klassifiziert einen Wortblock im Worker-Prozess"""
+    return list(_worker_engine.classify(words))
+
+
+class EarleyParser:
+    """Earley-Erkenner für eine Grammatik - unabhängige Gegenprobe zum Kellerautomaten
+
+    Punktierte Regeln sind durchnummeriert (Nummer + 1 schiebt den Punkt
+    weiter), ein Item ist die Ganzzahl Regel * (len(word) + 1) + Ursprung.
+    Jede Itemmenge ist indiziert: wartende Items nach dem erwarteten
+    Nichtterminal (Vervollständigen) und nach dem erwarteten Terminal
+    (Scannen), so dass keine Menge linear durchsucht wird. Ableitbar leere
+    Nichtterminale werden bei der Vorhersage gleich übersprungen
+    (Aycock/Horspool), damit epsilon-Regeln ohne Sonderfall funktionieren.
+    """
+
+    def __init__(self, grammar: Grammar):
+        self.grammar = grammar
+        nonterminal_ids = {name: i for i, name in enumerate(grammar.nonterminals)}
+        # Pro punktierter Regel: erwartetes Nichtterminal (-1 = keins),
+        # erwartetes Terminal (None = keins) und linke Seite
+        self.waits_for = array('i')
+        self.scans = []
+        self.lhs = array('i')
+        # Punktierte Regeln mit Punkt ganz vorne je Nichtterminal
+        self.predictions = [[] for _ in grammar.nonterminals]
+        self.finals = []
+        for lhs, rhs in grammar.productions:
+            self.predictions[nonterminal_ids[lhs]].append(len(self.scans))
+            for dot in range(len(rhs) + 1):
+                symbol = rhs[dot] if dot < len(rhs) else None
+                self.waits_for.append(nonterminal_ids.get(symbol, -1))
+                self.scans.append(symbol if symbol not in nonterminal_ids else None)
+                self.lhs.append(nonterminal_ids[lhs])
+            if lhs == grammar.start:
+                self.finals.append(len(self.scans) - 1)
+        self.nullable = [name in grammar.nullable for name in grammar.nonterminals]
+        self.start = nonterminal_ids[grammar.start]
+        # Items der letzten Erkennung (Vergleichsmaß wie Kellerautomat.steps)
+        self.items = 0
+
+    def accepts(self, word: str) -> bool:
+        """Prüft, ob die Grammatik das Wort erzeugt"""
+        waits_for, scans, lhs, predictions, nullable = (
+            self.waits_for, self.scans, self.lhs, self.predictions, self.nullable)
+        width = len(word) + 1
+        # Wartende Items je Position, indiziert nach erwartetem Nichtterminal
+        waiting_at = []
+        column = [dotted * width for dotted in predictions[self.start]]
+        items = 0
+        for position in range(width):
+            seen = set(column)
+            waiting = {}
+            waiting_at.append(waiting)
+            scanned = {}
+            predicted = set()
+            index = 0
+            while index < len(column):
+                item = column[index]
+                index += 1
+                dotted = item // width
+                expected = waits_for[dotted]
+                if expected >= 0:
+                    waiting.setdefault(expected, []).append(item)
+                    new = []
+                    if expected not in predicted:
+                        predicted.add(expected)
+                        new = [rule * width + position for rule in predictions[expected]]
+                    if nullable[expected]:
+                        new.append(item + width)
+                elif scans[dotted] is not None:
+                    scanned.setdefault(scans[dotted], []).append(item + width)
+                    continue
+                else:
+                    # Vervollständigen: alle Items, die am Ursprung auf lhs warten
+                    new = [parent + width for parent in waiting_at[item % width].get(lhs[dotted], ())]
+                for candidate in new:
+                    if candidate not in seen:
+                        seen.add(candidate)
+                        column.append(candidate)
+            items += len(column)
+            if position == len(word):
+                break
+            column = scanned.get(word[position])
+            if not column:
+                self.items = items
+                return False
+        self.items = items
+        return any(dotted * width in seen for dotted in self.finals)
+
+    def accepts_many(self, words: Iterable[str]) -> Iterator[bool]:
+        """Prüft mehrere Wörter nacheinander (liefert die Ergebnisse lazy)"""
+        for word in words:
+            yield self.accepts(word)
+
+
+def compare_engines(engine: Kellerautomat, parser: EarleyParser, words: List[str]) -> dict:
+    """Differenzieller Vergleich: gleiche Wörter durch Kellerautomat und Earley-Parser
+
+    Liefert die Laufzeit beider Engines, die Wörter mit abweichendem
+    Urteil und die Zahl der Wörter, an denen der Kellerautomat das
+    Konfigurationslimit erreicht hat (Urteil None, keine Abweichung).
+    """
+    started = time.perf_counter()
+    pda = list(engine.classify(words))
+    pda_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    earley = list(parser.accepts_many(words))
+    earley_seconds = time.perf_counter() - started
+    return {
+        "words": len(words),
+        "pda_seconds": pda_seconds,
+        "earley_seconds": earley_seconds,
+        "mismatches": [(word, a, b) for word, a, b in zip(words, pda, earley)
+                       if a is not None and a != b],
+        "errors": pda.count(None),
+    }
+
+
+class WordSampler(ABC):
+    """Zählt die akzeptierten Wörter je Länge und zieht daraus gleichverteilt
+
+    Unterklassen liefern count(length) und unrank(length, rank), das Wort
+    mit der Nummer rank unter allen count(length) Wörtern dieser Länge.
+    Ziehen ist dann unrank mit einer Zufallsnummer, Aufzählen ein Lauf
+    über alle Nummern.
+    """
+
+    alphabet: List[str] = []
+
+    @abstractmethod
+    def count(self, length: int) -> int:
+        """Zahl der akzeptierten Wörter der Länge length"""
+
+    @abstractmethod
+    def unrank(self, length: int, rank: int) -> str:
+        """Das Wort mit der Nummer rank (0 <= rank < count(length))"""
+
+    def sample(self, length: int, rng: Optional[random.Random] = None) -> str:
+        """Ein akzeptiertes Wort der Länge length, jedes gleich wahrscheinlich"""
+        total = self.count(length)
+        if not total:
+            raise ValueError(f"keine akzeptierten Wörter der Länge {length}")
+        return self.unrank(length, (rng or random).randrange(total))
+
+    def words(self, max_length: int) -> Iterator[str]:
+        """Alle akzeptierten Wörter bis max_length, nach Länge (lazy)"""
+        for length in range(max_length + 1):
+            for rank in range(self.count(length)):
+                yield self.unrank(length, rank)
+
+    def _check_rank(self, length: int, rank: int):
+        total = self.count(length)
+        if not 0 <= rank < total:
+            raise IndexError(f"Nummer {rank} außerhalb von 0..{total - 1} (Länge {length})")
+
+
+class AutomatonSampler(WordSampler):
+    """Zählt über die Knoten des ConfigurationGraph, gleichverteilt über Wörter
+
+    count(Knoten, r) ist die Zahl der Fortsetzungen der Länge r, die
+    akzeptiert werden; jeder Wert wird einmal berechnet und gemerkt.
+    unrank wählt Symbol für Symbol, gleich lange Wörter sind also
+    alphabetisch nummeriert. Ein-Zähler-Automaten haben linear viele
+    Knoten (O(n^2) Werte bis Länge n); Automaten, die sich das Präfix auf
+    dem Stack merken (Palindrome), exponentiell viele - ab
+    max_configurations Knoten gibt es ExplorationLimitError.
+    """
+
+    def __init__(self, engine: "Kellerautomat"):
+        self.engine = engine
+        self.alphabet = engine.input_alphabet
+        self._max_length = -1
+        self._prepare(0)
+
+    def _prepare(self, length: int):
+        # Der nichtdeterministische Graph begrenzt die Stacktiefe nach der
+        # Wortlänge; wird sie überschritten, wird neu (doppelt so weit) gezählt
+        if length <= self._max_length or (not self.engine.nondeterministic and self._max_length >= 0):
+            return
+        self._max_length = max(length, 2 * self._max_length)
+        self.graph = ConfigurationGraph(self.engine, self._max_length)
+        self._children = {}
+        self._counts = {}
+
+    def _node_children(self, node, remaining: int) -> List[Tuple[str, object]]:
+        # Nichtdeterministisch verwirft der Graph nach der Resteingabe, die
+        # Kinder hängen also auch von remaining ab
+        key = (node, remaining) if self.engine.nondeterministic else node
+        children = self._children.get(key)
+        if children is None:
+            if len(self._children) >= self.engine.max_configurations:
+                raise ExplorationLimitError(
+                    f"mehr als {self.engine.max_configurations} Konfigurationen beim Zählen")
+            position = self._max_length - remaining
+            children = self._children[key] = self.graph.children(node, position)
+        return children
+
+    def _count(self, node, remaining: int) -> int:
+        """count(Knoten, Restlänge) mit eigenem Stapel statt Rekursion (Länge beliebig)"""
+        counts = self._counts
+        goal = (node, remaining)
+        todo = [goal]
+        while todo:
+            key = todo[-1]
+            if key in counts:
+                todo.pop()
+                continue
+            node, remaining = key
+            if not remaining:
+                counts[key] = 1 if self.graph.accepts(node) else 0
+                todo.pop()
+                continue
+            children = self._node_children(node, remaining)
+            missing = [(child, remaining - 1) for _, child in children
+                       if (child, remaining - 1) not in counts]
+            if missing:
+                todo.extend(missing)
+                continue
+            counts[key] = sum(counts[(child, remaining - 1)] for _, child in children)
+            todo.pop()
+        return counts[goal]
+
+    def count(self, length: int) -> int:
+        self._prepare(length)
+        total = self._count(self.graph.start, length)
+        if self.engine.nondeterministic and self.graph.pruned:
+            raise ExplorationLimitError(
+                f"Stacktiefe über {self.graph.max_depth} abgeschnitten, Anzahl unbekannt")
+        return total
+
+    def unrank(self, length: int, rank: int) -> str:
+        self._check_rank(length, rank)
+        counts = self._counts
+        node = self.graph.start
+        letters = []
+        for remaining in range(length - 1, -1, -1):
+            # count(start, length) hat alle Werte auf dem Weg schon gemerkt
+            for symbol, child in self._node_children(node, remaining + 1):
+                weight = counts[(child, remaining)]
+                if rank < weight:
+                    break
+                rank -= weight
+            letters.append(symbol)
+            node = child
+        return "".join(letters)
+
+
+def _boustrophedon(n: int) -> Iterator[int]:
+    """0, n, 1, n - 1, ... - findet eine Aufteilung nahe am Rand in O(min(j, n - j))"""
+    low, high = 0, n
+    while low < high:
+        yield low
+        yield high
+        low += 1
+        high -= 1
+    if low == high:
+        yield low
+
+
+class GrammarSampler(WordSampler):
+    """Zählt Ableitungen je Länge mit dynamischer Programmierung über die Grammatik
+
+    counts[A][n] ist die Zahl der Ableitungen von Wörtern der Länge n aus A,
+    suffixes[p][i][n] dasselbe für die rechte Seite der Regel p ab Symbol i.
+    Eine weitere Länge n kostet O(Regelsymbole * n) Multiplikationen.
+    Gleichverteilt sind die Ableitungen, bei einer eindeutigen Grammatik
+    also die Wörter. unrank sucht die Aufteilung einer Länge abwechselnd
+    von vorne und hinten (Boustrophedon), ein Wort kostet so O(n log n).
+    """
+
+    def __init__(self, grammar: Grammar):
+        self.grammar = grammar
+        self.alphabet = list(grammar.terminals)
+        self.rules = {name: [] for name in grammar.nonterminals}
+        for index, (lhs, _) in enumerate(grammar.productions):
+            self.rules[lhs].append(index)
+        self.counts = {name: [] for name in grammar.nonterminals}
+        self.suffixes = [[[] for _ in rhs] for _, rhs in grammar.productions]
+        # Leere Restfolge: genau eine Ableitung der Länge 0
+        self._empty = []
+        self._order = self._evaluation_order()
+
+    def _suffix(self, production: int, index: int) -> List[int]:
+        suffixes = self.suffixes[production]
+        return suffixes[index] if index < len(suffixes) else self._empty
+
+    def _evaluation_order(self) -> list:
+        """Reihenfolge der Zellen innerhalb einer Länge, Abhängigkeiten zuerst
+
+        Zellen sind Nichtterminale und (Regel, Position). Bei gleicher Länge
+        hängt A von B ab, wenn A -> αBβ mit ableitbar leerem α und β; ein
+        Kreis hieße unendlich viele Ableitungen desselben Worts.
+        """
+        grammar = self.grammar
+
+        def dependencies(cell):
+            if isinstance(cell, str):
+                return [(p, 0) for p in self.rules[cell] if grammar.productions[p][1]]
+            production, index = cell
+            rhs = grammar.productions[production][1]
+            symbol = rhs[index]
+            if symbol not in self.rules:
+                return []
+            result = []
+            if symbol in grammar.nullable and index + 1 < len(rhs):
+                result.append((production, index + 1))
+            if all(rest in grammar.nullable for rest in rhs[index + 1:]):
+                result.append(symbol)
+            return result
+
+        cells = list(grammar.nonterminals)
+        cells += [(p, i) for p, (_, rhs) in enumerate(grammar.productions) for i in range(len(rhs))]
+        order = []
+        done = set()
+        active = set()
+        for root in cells:
+            if root in done:
+                continue
+            # Tiefensuche mit eigenem Stapel: (Zelle, offene Abhängigkeiten)
+            todo = [(root, iter(dependencies(root)))]
+            active.add(root)
+            while todo:
+                cell, pending = todo[-1]
+                for dependency in pending:
+                    if dependency in active:
+                        name = dependency if isinstance(dependency, str) else cell
+                        raise ValueError(f"Grammatik ist zyklisch: {name} leitet sich selbst ab, "
+                                         f"unendlich viele Ableitungen")
+                    if dependency not in done:
+                        active.add(dependency)
+                        todo.append((dependency, iter(dependencies(dependency))))
+                        break
+                else:
+                    todo.pop()
+                    active.discard(cell)
+                    done.add(cell)
+                    order.append(cell)
+        return order
+
+    def _extend(self, length: int):
+        """Berechnet alle Zellen bis zur Länge length"""
+        productions = self.grammar.productions
+        empty = self._empty
+        while len(empty) <= length:
+            m = len(empty)
+            empty.append(0 if m else 1)
+            for cell in self._order:
+                if isinstance(cell, str):
+                    self.counts[cell].append(sum(self._suffix(p, 0)[m] for p in self.rules[cell]))
+                    continue
+                production, index = cell
+                symbol = productions[production][1][index]
+                rest = self._suffix(production, index + 1)
+                if symbol not in self.rules:
+                    value = rest[m - 1] if m else 0
+                else:
+                    # Summe über die Länge j des Symbols: counts[symbol][j] * rest[m - j].
+                    # Noch nicht berechnete Randwerte gehören zu Faktoren, die 0 sind
+                    counts = self.counts[symbol]
+                    low = 0 if len(rest) > m else 1
+                    high = min(m, len(counts) - 1)
+                    value = sum(map(operator.mul, counts[low:high + 1],
+                                    reversed(rest[m - high:m - low + 1]))) if low <= high else 0
+                self.suffixes[production][index].append(value)
+
+    def count(self, length: int) -> int:
+        self._extend(length)
+        return self.counts[self.grammar.start][length]
+
+    def _choose(self, name: str, length: int, rank: int) -> Tuple[int, int, int, int]:
+        """Regel von name für die Nummer rank: (Regel, Position 0, Länge, Rest-Nummer)"""
+        for production in self.rules[name]:
+            weight = self._suffix(production, 0)[length]
+            if rank < weight:
+                return production, 0, length, rank
+            rank -= weight
+        raise IndexError(f"Nummer außerhalb der Ableitungen von {name}")
+
+    def unrank(self, length: int, rank: int) -> str:
+        self._check_rank(length, rank)
+        productions = self.grammar.productions
+        letters = []
+        # Offene Reste rechter Seiten (Regel, Position, Länge, Nummer); der
+        # zuletzt abgelegte ist der am weitesten links stehende
+        todo = [self._choose(self.grammar.start, length, rank)]
+        while todo:
+            production, index, m, rank = todo.pop()
+            rhs = productions[production][1]
+            if index == len(rhs):
+                continue
+            symbol = rhs[index]
+            if symbol not in self.rules:
+                letters.append(symbol)
+                todo.append((production, index + 1, m - 1, rank))
+                continue
+            counts = self.counts[symbol]
+            rest = self._suffix(production, index + 1)
+            for j in _boustrophedon(m):
+                weight = counts[j] * rest[m - j]
+                if rank < weight:
+                    break
+                rank -= weight
+            head, tail = divmod(rank, rest[m - j])
+            todo.append((production, index + 1, m - j, tail))
+            todo.append(self._choose(symbol, j, head))
+        return "".join(letters)
+
+
+def make_sampler(definition: dict) -> WordSampler:
+    """GrammarSampler für Grammatik-Definitionen, sonst AutomatonSampler"""
+    if definition.get("grammar") is not None:
+        return GrammarSampler(definition["grammar"])
+    return AutomatonSampler(Kellerautomat.from_definition(definition))
+
+
+def draw_length(lengths, rng: random.Random) -> int:
+    """Länge aus einer Zahl, einer Folge (gleichverteilt) oder einer Funktion rng -> Länge"""
+    if isinstance(lengths, int):
+        return lengths
+    if callable(lengths):
+        return lengths(rng)
+    return rng.choice(lengths)
+
+
+def sample_accepted(sampler: WordSampler, lengths, rng: Optional[random.Random] = None) -> Iterator[str]:
+    """Endloser Strom akzeptierter Wörter, je Wort wird eine Länge gezogen
+
+    Innerhalb einer Länge ist jedes Wort gleich wahrscheinlich; die
+    Verteilung der Längen bestimmt lengths (siehe draw_length). Längen
+    ohne akzeptiertes Wort werden neu gezogen.
+    """
+    rng = rng or random.Random()
+    misses = 0
+    while True:
+        length = draw_length(lengths, rng)
+        total = sampler.count(length)
+        if not total:
+            misses += 1
+            if misses >= SAMPLE_ATTEMPTS:
+                raise ValueError(f"keine akzeptierten Wörter in {misses} gezogenen Längen")
+            continue
+        misses = 0
+        yield sampler.unrank(length, rng.randrange(total))
+
+
+def sample_rejected(engine: "Kellerautomat", lengths, rng: Optional[random.Random] = None,
+                    alphabet: Optional[List[str]] = None) -> Iterator[str]:
+    """Endloser Strom verworfener Wörter: Zufallswörter, die die Engine verwirft
+
+    Zufallswörter einer Länge sind gleichverteilt, die verworfenen unter
+    ihnen also auch. Wörter, an denen die Suche das Limit erreicht, zählen
+    nicht als verworfen.
+    """
+    rng = rng or random.Random()
+    alphabet = alphabet or engine.input_alphabet
+    if not alphabet:
+        raise ValueError("leeres Eingabealphabet")
+    misses = 0
+    while True:
+        word = "".join(rng.choices(alphabet, k=draw_length(lengths, rng)))
+        try:
+            rejected = engine.run(word) != ACCEPTED
+        except ExplorationLimitError:
+            rejected = False
+        if not rejected:
+            misses += 1
+            if misses >= SAMPLE_ATTEMPTS:
+                raise ValueError(f"{misses} Zufallswörter hintereinander akzeptiert")
+            continue
+        misses = 0
+        yield word
+
+
+class LogView:
+    """Begrenztes, virtualisiertes Ausführungs-Log über einem ScrolledText
+
+    Ein Schritt belegt im Log nur seine Nummer (4 Byte in einem array);
+    der Text entsteht erst beim Anzeigen über formatter(Nummer), in der
+    GUI aus der Aufzeichnung (Replay.step_record). Freie Texte (Reset,
+    Fehler) liegen in einer eigenen Liste und werden als ~Index
+    eingetragen. Im Widget stehen höchstens max_visible Einträge; beim
+    Zurück- bzw. Vorscrollen werden weitere Einträge seitenweise
+    nachgeladen. Anhängen kostet dadurch konstant viel, egal wie lang der
+    Lauf ist.
+    """
+
+    def __init__(self, text, formatter, max_visible=500, page=100):
+        self.text = text
+        self.formatter = formatter
+        self.max_visible = max_visible
+        self.page = page
+        self.entries = array('i')
+        self.texts = []
+        self.first = 0  # Index des ersten angezeigten Eintrags
+        self.line_counts = deque()  # Zeilen je angezeigtem Eintrag
+        self._load_pending = False
+        self._batch_following = None  # gesetzt während begin_batch/end_batch
+        # Scrollbar weiter bedienen, aber Scroll-Position mitbekommen
+        self._scrollbar_set = text.vbar.set
+        text.configure(yscrollcommand=self._on_scroll)
+
+    @property
+    def last(self):
+        """Index hinter dem letzten angezeigten Eintrag"""
+        return self.first + len(self.line_counts)
+
+    def clear(self):
+        """Löscht alle Einträge"""
+        self.entries = array('i')
+        self.texts = []
+        self.first = 0
+        self.line_counts.clear()
+        self.text.delete("1.0", tk.END)
+
+    def append(self, entry):
+        """Hängt einen Text oder eine Schrittnummer an; sichtbar nur, wenn das Log am Ende steht"""
+        if isinstance(entry, str):
+            self.texts.append(entry)
+            entry = ~(len(self.texts) - 1)
+        if self._batch_following is not None:
+            self.entries.append(entry)
+            return
+        following = self.last == len(self.entries) and self.text.yview()[1] >= 1.0
+        self.entries.append(entry)
+        if following:
+            self._insert_bottom([entry])
+            self.text.see(tk.END)
+            
+    def begin_batch(self):
+        """Sammelt folgende Einträge, ohne das Widget anzufassen"""
+        self._batch_following = self.last == len(self.entries) and self.text.yview()[1] >= 1.0
+        
+    def end_batch(self):
+        """Zeigt nach einem Batch nur die jüngsten Einträge an"""
+        following, self._batch_following = self._batch_following, None
+        if not following or self.last == len(self.entries):
+            return
+        pending = len(self.entries) - self.last
+        if pending >= self.max_visible:
+            # Alles bisher Angezeigte fällt ohnehin heraus
+            self.text.delete("1.0", tk.END)
+            self.line_counts.clear()
+            self.first = len(self.entries) - self.max_visible
+        self._insert_bottom(self.entries[self.last:])
+        self.text.see(tk.END)
+
+    def _format(self, entry) -> str:
+        return self.texts[~entry] if entry < 0 else self.formatter(entry)
+
+    def _insert_bottom(self, entries):
+        texts = [self._format(entry) for entry in entries]
+        self.text.insert(tk.END, "".join(texts))
+        self.line_counts.extend(text.count("\n") for text in texts)
+        while len(self.line_counts) > self.max_visible:
+            # Ältesten angezeigten Eintrag aus dem Widget entfernen
+            lines = self.line_counts.popleft()
+            self.text.delete("1.0", f"{lines + 1}.0")
+            self.first += 1
+
+    def _insert_top(self, entries):
+        texts = [self._format(entry) for entry in entries]
+        self.text.insert("1.0", "".join(texts))
+        self.line_counts.extendleft(reversed([text.count("\n") for text in texts]))
+        self.first -= len(entries)
+        while len(self.line_counts) > self.max_visible:
+            # Jüngsten angezeigten Eintrag entfernen
+            self.line_counts.pop()
+            start = sum(self.line_counts) + 1
+            self.text.delete(f"{start}.0", "end-1c")
+        # Bisher oberste Zeile bleibt oben im Bild
+        self.text.yview(f"{sum(t.count(chr(10)) for t in texts) + 1}.0")
+
+    def _on_scroll(self, first, last):
+        self._scrollbar_set(first, last)
+        at_top = float(first) <= 0.0 and self.first > 0
+        at_bottom = float(last) >= 1.0 and self.last < len(self.entries)
+        if (at_top or at_bottom) and not self._load_pending:
+            # Nicht im Scroll-Callback selbst ins Widget schreiben
+            self._load_pending = True
+            self.text.after_idle(self._load_page)
+
+    def _load_page(self):
+        """Lädt beim Scrollen an den Rand die nächste Seite nach"""
+        self._load_pending = False
+        first, last = self.text.yview()
+        if first <= 0.0 and self.first > 0:
+            start = max(0, self.first - self.page)
+            self._insert_top(self.entries[start:self.first])
+        elif last >= 1.0 and self.last < len(self.entries):
+            self._insert_bottom(self.entries[self.last:self.last + self.page])
+
 
 class KellerautomatGUI:
     def __init__(self, root):
@@ -11,26 +2980,37 @@ class KellerautomatGUI:
         self.root.geometry("1200x800")
         self.root.configure(bg='#f0f0f0')
         
-        # Kellerautomat Zustand
-        self.stack = []
-        self.current_state = "q0"
-        self.input_string = ""
-        self.input_position = 0
-        self.step_history = []
+        # Kellerautomat Zustand (liegt in der headless Engine)
+        self.engine = None
+        self.replay = None  # Aufzeichnung des schrittweisen Laufs zum Zurückspulen
         self.is_running = False
-        self.animation_speed = 500  # ms
+        self._worker = None  # (Engine, Queue, Abbruch-Event, Wortlänge) eines Hintergrundlaufs
+        self.animation_speed = 500  # ms, 0 = Turbo
+        self.turbo_budget = 0.015  # s Rechenzeit pro Tk-Tick im Turbo-Modus
+        self.log_mode = None  # "compact" oder "full", wird in create_widgets gesetzt
+        self._samplers = {}  # Modus -> WordSampler für zufällige Beispiele
+        
+        # Bereits gezeichnete Canvas-Elemente (für inkrementelles Zeichnen)
+        self._vis_key = None
+        self._drawn_position = 0
+        self._stack_key = None
+        self._drawn_stack = None
+        self._stack_cells = {}
+        self._stack_window_base = 0
+        self._stack_browse_top = None  # per Minimap gewähltes Fenster
+        self._stack_top_label = None
+        self._stack_empty_text = None
+        self._stack_more_text = None
+        self._stack_minimap = None
         
         # Automaten-Modi
-        self.automaton_mode = "anbn"  # Default: a^n b^n
+        self.automaton_mode = "anbn"  # Default: a^n b^n; None für eine geladene Trace
+        self.trace_name = None
+        self.info_label = None
         
         # Sprache
         self.language = "en"  # Default: English
         
-        # Wird in load_automaton gesetzt
-        self.transitions = {}
-        self.accepting_states = []
-        self.initial_stack_symbol = "Z"
-        
         # Lade Standard-Automaten
         self.load_automaton("anbn")
         
@@ -39,374 +3019,37 @@ class KellerautomatGUI:
         self.setup_example()
         
     def load_automaton(self, mode):
-        """Lädt verschiedene Automaten-Definitionen"""
+        """Lädt eine mitgelieferte Automaten-Definition (automata/<mode>.json)"""
         self.automaton_mode = mode
+        definition = load_mode(mode)
+        run_length = self.engine.run_length if self.engine is not None else False
+        self.engine = Kellerautomat.from_definition(definition, run_length=run_length)
         
-        if mode == "anbn":
-            # Automat für a^n b^n (gleich viele a wie b)
-            self.transitions = {
-                # a lesen: pushe A auf Stack
-                ("q0", "a", "Z"): ("q0", ["A", "Z"]),
-                ("q0", "a", "A"): ("q0", ["A", "A"]),
-                # b lesen: pop A vom Stack
-                ("q0", "b", "A"): ("q1", []),
-                ("q1", "b", "A"): ("q1", []),
-                # Epsilon-Übergang zum Endzustand
-                ("q1", "", "Z"): ("qf", ["Z"]),
-            }
-            self.accepting_states = ["qf"]
-            
-            if self.language == "de":
-                self.info_text = """
-Ein Kellerautomat (PDA) besteht aus:
-
-• Zuständen (q0, q1, ...)
-• Eingabealphabet (Symbole)
-• Stack-Alphabet
-• Übergangsfunktion
-• Startzustand
-• Anfangsstacksymbol
-
-Aktueller Automat: a^n b^n
-Erkennt Strings mit gleich vielen
-a's gefolgt von b's:
-• aabb ✓
-• aaabbb ✓
-• ab ✓
-• aab ✗
-• abab ✗
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━
-🔍 Funktionsweise:
-
-1. Start in Zustand q0 mit Stack [Z]
-
-2. Für jedes 'a':
-   • Lese 'a' aus Eingabe
-   • Pushe 'A' auf den Stack
-   • Bleibe in q0
-   → Zähle die a's auf dem Stack
-
-3. Beim ersten 'b':
-   • Lese 'b' aus Eingabe
-   • Pop 'A' vom Stack
-   • Wechsel zu q1
-   
-4. Für jedes weitere 'b':
-   • Lese 'b' aus Eingabe
-   • Pop 'A' vom Stack
-   • Bleibe in q1
-   → Entferne a's für jedes b
-
-5. Am Ende (ε-Übergang):
-   • Wenn nur noch [Z] auf Stack
-   • Wechsel zu qf (Akzeptieren!)
-   
-Beispiel "aabb":
-a → Stack: [Z,A]
-a → Stack: [Z,A,A]
-b → Stack: [Z,A]
-b → Stack: [Z]
-ε → Akzeptiert ✓
-                """
-            else:  # English
-                self.info_text = """
-A Pushdown Automaton (PDA) consists of:
-
-• States (q0, q1, ...)
-• Input alphabet (symbols)
-• Stack alphabet
-• Transition function
-• Start state
-• Initial stack symbol
-
-Current Automaton: a^n b^n
-Recognizes strings with equal
-number of a's followed by b's:
-• aabb ✓
-• aaabbb ✓
-• ab ✓
-• aab ✗
-• abab ✗
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━
-🔍 How it works:
-
-1. Start in state q0 with stack [Z]
-
-2. For each 'a':
-   • Read 'a' from input
-   • Push 'A' onto stack
-   • Stay in q0
-   → Count a's on stack
-
-3. At first 'b':
-   • Read 'b' from input
-   • Pop 'A' from stack
-   • Move to q1
-   
-4. For each additional 'b':
-   • Read 'b' from input
-   • Pop 'A' from stack
-   • Stay in q1
-   → Remove a's for each b
-
-5. At the end (ε-transition):
-   • If only [Z] remains on stack
-   • Move to qf (Accept!)
-   
-Example "aabb":
-a → Stack: [Z,A]
-a → Stack: [Z,A,A]
-b → Stack: [Z,A]
-b → Stack: [Z]
-ε → Accepted ✓
-                """
-            
-        elif mode == "klammern":
-            # Automat für ausgeglichene Klammern
-            self.transitions = {
-                # Öffnende Klammer: pushe auf Stack
-                ("q0", "(", "Z"): ("q0", ["(", "Z"]),
-                ("q0", "(", "("): ("q0", ["(", "("]),
-                # Schließende Klammer: pop vom Stack
-                ("q0", ")", "("): ("q0", []),
-                # Leere Eingabe mit leerem Stack -> Akzeptieren
-                ("q0", "", "Z"): ("qf", ["Z"]),
-            }
-            self.accepting_states = ["qf"]
-            
-            if self.language == "de":
-                self.info_text = """
-Ein Kellerautomat (PDA) besteht aus:
-
-• Zuständen (q0, q1, ...)
-• Eingabealphabet (Symbole)
-• Stack-Alphabet
-• Übergangsfunktion
-• Startzustand
-• Anfangsstacksymbol
-
-Aktueller Automat: Klammern
-Erkennt ausgeglichene Klammern:
-• (()) ✓
-• ((()))  ✓
-• ()() ✓
-• ()) ✗
-• (() ✗
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━
-🔍 Funktionsweise:
-
-1. Start in Zustand q0 mit Stack [Z]
-
-2. Für jede öffnende Klammer '(':
-   • Lese '(' aus Eingabe
-   • Pushe '(' auf den Stack
-   • Bleibe in q0
-   → Merke jede öffnende Klammer
-
-3. Für jede schließende Klammer ')':
-   • Lese ')' aus Eingabe
-   • Pop '(' vom Stack
-   • Bleibe in q0
-   → Entferne passende öffnende Klammer
-
-4. Am Ende (ε-Übergang):
-   • Wenn nur noch [Z] auf Stack
-   • Wechsel zu qf (Akzeptieren!)
-   • Alle Klammern waren ausgeglichen
-
-Beispiel "(())":
-( → Stack: [Z,(]
-( → Stack: [Z,(,(]
-) → Stack: [Z,(]
-) → Stack: [Z]
-ε → Akzeptiert ✓
-                """
-            else:  # English
-                self.info_text = """
-A Pushdown Automaton (PDA) consists of:
-
-• States (q0, q1, ...)
-• Input alphabet (symbols)
-• Stack alphabet
-• Transition function
-• Start state
-• Initial stack symbol
-
-Current Automaton: Parentheses
-Recognizes balanced parentheses:
-• (()) ✓
-• ((()))  ✓
-• ()() ✓
-• ()) ✗
-• (() ✗
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━
-🔍 How it works:
-
-1. Start in state q0 with stack [Z]
-
-2. For each opening parenthesis '(':
-   • Read '(' from input
-   • Push '(' onto stack
-   • Stay in q0
-   → Remember each opening parenthesis
-
-3. For each closing parenthesis ')':
-   • Read ')' from input
-   • Pop '(' from stack
-   • Stay in q0
-   → Remove matching opening parenthesis
-
-4. At the end (ε-transition):
-   • If only [Z] remains on stack
-   • Move to qf (Accept!)
-   • All parentheses were balanced
-
-Example "(())":
-( → Stack: [Z,(]
-( → Stack: [Z,(,(]
-) → Stack: [Z,(]
-) → Stack: [Z]
-ε → Accepted ✓
-                """
-            
-        elif mode == "palindrom":
-            # Automat für Palindrome (vereinfacht mit Mittelmarkierung #)
-            self.transitions = {
-                # Phase 1: Symbole auf Stack pushen
-                ("q0", "a", "Z"): ("q0", ["a", "Z"]),
-                ("q0", "b", "Z"): ("q0", ["b", "Z"]),
-                ("q0", "a", "a"): ("q0", ["a", "a"]),
-                ("q0", "a", "b"): ("q0", ["a", "b"]),
-                ("q0", "b", "a"): ("q0", ["b", "a"]),
-                ("q0", "b", "b"): ("q0", ["b", "b"]),
-                # Mitte erkannt (#)
-                ("q0", "#", "Z"): ("q1", ["Z"]),
-                ("q0", "#", "a"): ("q1", ["a"]),
-                ("q0", "#", "b"): ("q1", ["b"]),
-                # Phase 2: Symbole vom Stack matchen
-                ("q1", "a", "a"): ("q1", []),
-                ("q1", "b", "b"): ("q1", []),
-                # Epsilon zum Ende
-                ("q1", "", "Z"): ("qf", ["Z"]),
-            }
-            self.accepting_states = ["qf"]
+        self.update_info_text()
+        
+    def update_info_text(self):
+        """Info-Text zum aktuellen Automaten in der aktuellen Sprache"""
+        if self.automaton_mode is not None:
+            info = load_mode(self.automaton_mode)["info"]
+            self.info_text = info.get(self.language) or info.get("en", "")
+        elif self.language == "de":
+            self.info_text = f"Automat aus der Trace {self.trace_name}"
+        else:
+            self.info_text = f"Automaton from trace {self.trace_name}"
+        if self.info_label is not None:
+            self.info_label.config(text=self.info_text)
             
-            if self.language == "de":
-                self.info_text = """
-Ein Kellerautomat (PDA) besteht aus:
-
-• Zuständen (q0, q1, ...)
-• Eingabealphabet (Symbole)
-• Stack-Alphabet
-• Übergangsfunktion
-• Startzustand
-• Anfangsstacksymbol
-
-Aktueller Automat: Palindrome
-Erkennt Palindrome mit # in der Mitte:
-• aba#aba ✓
-• aa#aa ✓
-• ab#ba ✓
-• abc#cba ✓
-• ab#ab ✗
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━
-🔍 Funktionsweise:
-
-1. Start in Zustand q0 mit Stack [Z]
-
-2. Phase 1 - Erste Hälfte lesen:
-   • Lese Symbole (a oder b)
-   • Pushe jedes Symbol auf Stack
-   • Bleibe in q0
-   → Speichere erste Hälfte
-
-3. Mitte erreicht (#):
-   • Lese '#' aus Eingabe
-   • Wechsel zu q1
-   → Beginne Vergleichsphase
-
-4. Phase 2 - Zweite Hälfte prüfen:
-   • Lese Symbol aus Eingabe
-   • Pop gleiches Symbol vom Stack
-   • Bleibe in q1
-   → Prüfe ob gespiegelt
-
-5. Am Ende (ε-Übergang):
-   • Wenn nur noch [Z] auf Stack
-   • Wechsel zu qf (Akzeptieren!)
-
-Beispiel "aba#aba":
-a → Stack: [Z,a]
-b → Stack: [Z,a,b]
-a → Stack: [Z,a,b,a]
-# → Wechsel zu q1
-a → Stack: [Z,a,b] (match!)
-b → Stack: [Z,a] (match!)
-a → Stack: [Z] (match!)
-ε → Akzeptiert ✓
-                """
-            else:  # English
-                self.info_text = """
-A Pushdown Automaton (PDA) consists of:
-
-• States (q0, q1, ...)
-• Input alphabet (symbols)
-• Stack alphabet
-• Transition function
-• Start state
-• Initial stack symbol
-
-Current Automaton: Palindromes
-Recognizes palindromes with # in middle:
-• aba#aba ✓
-• aa#aa ✓
-• ab#ba ✓
-• abc#cba ✓
-• ab#ab ✗
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━
-🔍 How it works:
-
-1. Start in state q0 with stack [Z]
-
-2. Phase 1 - Read first half:
-   • Read symbols (a or b)
-   • Push each symbol onto stack
-   • Stay in q0
-   → Store first half
-
-3. Middle reached (#):
-   • Read '#' from input
-   • Move to q1
-   → Begin comparison phase
-
-4. Phase 2 - Check second half:
-   • Read symbol from input
-   • Pop same symbol from stack
-   • Stay in q1
-   → Check if mirrored
-
-5. At the end (ε-transition):
-   • If only [Z] remains on stack
-   • Move to qf (Accept!)
-
-Example "aba#aba":
-a → Stack: [Z,a]
-b → Stack: [Z,a,b]
-a → Stack: [Z,a,b,a]
-# → Move to q1
-a → Stack: [Z,a,b] (match!)
-b → Stack: [Z,a] (match!)
-a → Stack: [Z] (match!)
-ε → Accepted ✓
-                """
-        
-        self.initial_stack_symbol = "Z"
+    @staticmethod
+    def bundled_mode_of(engine):
+        """Mitgelieferter Automat mit derselben Definition wie engine (sonst None)"""
+        data = engine.definition_data()
+        data["accepting_states"] = sorted(data["accepting_states"])
+        for mode in bundled_modes():
+            bundled = Kellerautomat.from_definition(load_mode(mode)).definition_data()
+            bundled["accepting_states"] = sorted(bundled["accepting_states"])
+            if bundled == data:
+                return mode
+        return None
         
     def create_widgets(self):
         # Titel
@@ -485,6 +3128,16 @@ a → Stack: [Z] (match!)
                                       padx=10, pady=5, cursor='hand2')
         self.example_btn.pack(side=tk.LEFT, padx=2)
         
+        self.background_btn = tk.Button(button_frame, text="🧵 Background", command=self.start_background,
+                                         bg='#16a085', fg='white', font=('Arial', 10, 'bold'),
+                                         padx=10, pady=5, cursor='hand2')
+        self.background_btn.pack(side=tk.LEFT, padx=2)
+        
+        self.stop_btn = tk.Button(button_frame, text="⏹ Stop", command=self.stop_automaton,
+                                   bg='#7f8c8d', fg='white', font=('Arial', 10, 'bold'),
+                                   padx=10, pady=5, cursor='hand2')
+        self.stop_btn.pack(side=tk.LEFT, padx=2)
+        
         # Automaten-Auswahl
         mode_frame = tk.Frame(input_frame, bg='white')
         mode_frame.pack(fill=tk.X, pady=5)
@@ -494,30 +3147,64 @@ a → Stack: [Z] (match!)
         
         self.mode_var = tk.StringVar(value="anbn")
         
-        mode_anbn = tk.Radiobutton(mode_frame, text="a^n b^n", variable=self.mode_var, 
-                                    value="anbn", command=self.change_automaton,
-                                    bg='white', font=('Arial', 9))
-        mode_anbn.pack(side=tk.LEFT, padx=5)
-        
-        mode_klammern = tk.Radiobutton(mode_frame, text="Parentheses", variable=self.mode_var,
-                                        value="klammern", command=self.change_automaton,
-                                        bg='white', font=('Arial', 9))
-        mode_klammern.pack(side=tk.LEFT, padx=5)
-        
-        mode_palindrom = tk.Radiobutton(mode_frame, text="Palindrome", variable=self.mode_var,
-                                         value="palindrom", command=self.change_automaton,
+        # Ein Knopf pro mitgelieferter Definition; schrittweise laufen nur
+        # deterministische Automaten
+        for mode in bundled_modes():
+            definition = load_mode(mode)
+            if not definition["compiled"].deterministic:
+                continue
+            mode_button = tk.Radiobutton(mode_frame, text=definition["label"], variable=self.mode_var,
+                                         value=mode, command=self.change_automaton,
                                          bg='white', font=('Arial', 9))
-        mode_palindrom.pack(side=tk.LEFT, padx=5)
+            mode_button.pack(side=tk.LEFT, padx=5)
         
         # Geschwindigkeit
         speed_frame = tk.Frame(input_frame, bg='white')
         speed_frame.pack(fill=tk.X, pady=5)
         
         tk.Label(speed_frame, text="Animation Speed:", bg='white', font=('Arial', 9)).pack(side=tk.LEFT)
-        self.speed_scale = tk.Scale(speed_frame, from_=100, to=2000, orient=tk.HORIZONTAL,
+        # Ganz links (0) schaltet vom animierten Modus auf Durchsatz (Turbo)
+        self.speed_mode_label = tk.Label(speed_frame, text="", bg='white', fg='#e67e22',
+                                         font=('Arial', 9, 'bold'))
+        self.speed_scale = tk.Scale(speed_frame, from_=0, to=2000, orient=tk.HORIZONTAL,
                                      command=self.update_speed, bg='white', length=150)
         self.speed_scale.set(500)
         self.speed_scale.pack(side=tk.LEFT, padx=5)
+        self.speed_mode_label.pack(side=tk.LEFT)
+        
+        # Log-Modus: kompakte Deltas oder voller Stack vor/nach jedem Schritt
+        log_frame = tk.Frame(input_frame, bg='white')
+        log_frame.pack(fill=tk.X, pady=5)
+        
+        self.log_label = tk.Label(log_frame, text="Log:", bg='white', font=('Arial', 9))
+        self.log_label.pack(side=tk.LEFT)
+        
+        self.log_mode = tk.StringVar(value="compact")
+        self.log_compact_btn = tk.Radiobutton(log_frame, text="Compact", variable=self.log_mode,
+                                              value="compact", bg='white', font=('Arial', 9))
+        self.log_compact_btn.pack(side=tk.LEFT, padx=5)
+        self.log_full_btn = tk.Radiobutton(log_frame, text="Full stack", variable=self.log_mode,
+                                           value="full", bg='white', font=('Arial', 9))
+        self.log_full_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.snapshot_label = tk.Label(log_frame, text="Snapshot every:", bg='white', font=('Arial', 9))
+        self.snapshot_label.pack(side=tk.LEFT, padx=(10, 0))
+        self.snapshot_spin = tk.Spinbox(log_frame, from_=0, to=100000, width=6, font=('Arial', 9))
+        self.snapshot_spin.pack(side=tk.LEFT, padx=5)
+        
+        # Läufe gleicher Symbole zusammenfassen (Stack als A×n)
+        self.stack_runs = tk.BooleanVar(value=self.engine.run_length)
+        self.stack_runs_btn = tk.Checkbutton(log_frame, text="Runs A×n", variable=self.stack_runs,
+                                             command=self.toggle_stack_runs, bg='white',
+                                             font=('Arial', 9))
+        self.stack_runs_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Profiling: Treffer je Übergang und Zeitanteile, Tabelle neben dem Verlauf
+        self.profiling = tk.BooleanVar(value=False)
+        self.profile_btn = tk.Checkbutton(log_frame, text="Profile", variable=self.profiling,
+                                          command=self.toggle_profiling, bg='white',
+                                          font=('Arial', 9))
+        self.profile_btn.pack(side=tk.LEFT, padx=5)
         
         # Visualisierung-Frame
         self.vis_frame = tk.LabelFrame(left_frame, text="🎨 Visualization", font=('Arial', 12, 'bold'),
@@ -537,6 +3224,28 @@ a → Stack: [Z] (match!)
                                       font=('Arial', 11, 'bold'), fg='#2c3e50')
         self.status_label.pack()
         
+        # Zeitreise: beliebigen Schritt der Aufzeichnung anzeigen
+        replay_frame = tk.Frame(self.status_frame_label, bg='white')
+        replay_frame.pack(fill=tk.X, pady=(5, 0))
+        
+        self.back_btn = tk.Button(replay_frame, text="◀ Back", command=self.step_back,
+                                   bg='#95a5a6', fg='white', font=('Arial', 9, 'bold'),
+                                   padx=8, cursor='hand2')
+        self.back_btn.pack(side=tk.LEFT, padx=(0, 5))
+        self.replay_scale = tk.Scale(replay_frame, from_=0, to=0, orient=tk.HORIZONTAL,
+                                      command=self.on_replay_scale, bg='white', showvalue=True)
+        self.replay_scale.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        # Aufzeichnung als Binärspur speichern/laden
+        self.save_trace_btn = tk.Button(replay_frame, text="💾 Save", command=self.save_trace,
+                                         bg='#95a5a6', fg='white', font=('Arial', 9, 'bold'),
+                                         padx=8, cursor='hand2')
+        self.save_trace_btn.pack(side=tk.LEFT, padx=(5, 0))
+        self.load_trace_btn = tk.Button(replay_frame, text="📂 Load", command=self.load_trace,
+                                         bg='#95a5a6', fg='white', font=('Arial', 9, 'bold'),
+                                         padx=8, cursor='hand2')
+        self.load_trace_btn.pack(side=tk.LEFT, padx=(5, 0))
+        
         # Rechte Seite - Information und Stack
         right_frame = tk.Frame(main_container, bg='#f0f0f0', width=400)
         right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, padx=(5, 0))
@@ -555,9 +3264,30 @@ a → Stack: [Z] (match!)
                                       bg='white', padx=10, pady=10)
         self.history_frame_label.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
         
+        # Profil-Tabelle (nur sichtbar, solange Profiling an ist)
+        self.profile_frame = tk.Frame(self.history_frame_label, bg='white')
+        self.profile_table = ttk.Treeview(self.profile_frame, columns=("transition", "hits"),
+                                          show="headings", height=8)
+        self.profile_table.heading("transition", text="δ")
+        self.profile_table.heading("hits", text="Hits")
+        self.profile_table.column("transition", width=110)
+        self.profile_table.column("hits", width=50, anchor=tk.E)
+        for level, color in enumerate(HEAT_COLORS):
+            self.profile_table.tag_configure(f"heat{level}", background=color)
+        self.profile_table.pack(fill=tk.BOTH, expand=True)
+        self.profile_summary = tk.Label(self.profile_frame, text="", bg='white', font=('Arial', 8),
+                                        justify=tk.LEFT, anchor=tk.W)
+        self.profile_summary.pack(fill=tk.X)
+        self.export_profile_btn = tk.Button(self.profile_frame, text="⬇ JSON", command=self.export_profile,
+                                             bg='#95a5a6', fg='white', font=('Arial', 8, 'bold'),
+                                             cursor='hand2')
+        self.export_profile_btn.pack(anchor=tk.E)
+        self._profile_rows = {}
+        
         self.history_text = scrolledtext.ScrolledText(self.history_frame_label, height=10, width=40,
                                                        font=('Courier', 9), bg='#fdfefe')
-        self.history_text.pack(fill=tk.BOTH, expand=True)
+        self.history_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.log_view = LogView(self.history_text, self.format_log_entry)
         
         # Erklärung
         self.info_frame_label = tk.LabelFrame(right_frame, text="ℹ️ Information", font=('Arial', 12, 'bold'),
@@ -579,9 +3309,8 @@ a → Stack: [Z] (match!)
             self.lang_btn.config(text="🌐 Deutsch")
             self.update_ui_language_en()
         
-        # Lade Automaten neu mit neuer Sprache
-        self.load_automaton(self.automaton_mode)
-        self.info_label.config(text=self.info_text)
+        # Info-Text in der neuen Sprache; die Engine bleibt (auch eine aus einer Trace)
+        self.update_info_text()
         self.reset_automaton()
         
     def update_ui_language_en(self):
@@ -590,7 +3319,17 @@ a → Stack: [Z] (match!)
         self.input_label.config(text="Input string:")
         self.step_btn.config(text="⏩ Step")
         self.example_btn.config(text="💡 Example")
+        self.background_btn.config(text="🧵 Background")
+        self.stop_btn.config(text="⏹ Stop")
+        self.back_btn.config(text="◀ Back")
+        self.save_trace_btn.config(text="💾 Save")
+        self.load_trace_btn.config(text="📂 Load")
         self.mode_label.config(text="Automaton Type:")
+        self.log_compact_btn.config(text="Compact")
+        self.log_full_btn.config(text="Full stack")
+        self.snapshot_label.config(text="Snapshot every:")
+        self.stack_runs_btn.config(text="Runs A×n")
+        self.profile_btn.config(text="Profile")
         self.vis_frame.config(text="🎨 Visualization")
         self.status_frame_label.config(text="📊 Status")
         self.status_label.config(text="Ready")
@@ -604,7 +3343,17 @@ a → Stack: [Z] (match!)
         self.input_label.config(text="Eingabestring:")
         self.step_btn.config(text="⏩ Schritt")
         self.example_btn.config(text="💡 Beispiel")
+        self.background_btn.config(text="🧵 Hintergrund")
+        self.stop_btn.config(text="⏹ Stopp")
+        self.back_btn.config(text="◀ Zurück")
+        self.save_trace_btn.config(text="💾 Speichern")
+        self.load_trace_btn.config(text="📂 Laden")
         self.mode_label.config(text="Automat-Typ:")
+        self.log_compact_btn.config(text="Kompakt")
+        self.log_full_btn.config(text="Voller Stack")
+        self.snapshot_label.config(text="Schnappschuss alle:")
+        self.stack_runs_btn.config(text="Läufe A×n")
+        self.profile_btn.config(text="Profil")
         self.vis_frame.config(text="🎨 Visualisierung")
         self.status_frame_label.config(text="📊 Status")
         self.status_label.config(text="Bereit")
@@ -616,49 +3365,120 @@ a → Stack: [Z] (match!)
         """Wechselt den Automaten-Typ"""
         mode = self.mode_var.get()
         self.load_automaton(mode)
-        self.info_label.config(text=self.info_text)
         self.reset_automaton()
         self.setup_example()
         
     def setup_example(self):
-        """Lädt ein Beispiel"""
-        if self.automaton_mode == "anbn":
-            examples = ["aabb", "aaabbb", "ab", "aaaabbbb"]
-        elif self.automaton_mode == "klammern":
-            examples = ["(())", "((()))", "()()", "(()(()))"]
-        elif self.automaton_mode == "palindrom":
-            examples = ["aba#aba", "aa#aa", "ab#ba", "abc#cba"]
-        else:
-            examples = ["aabb"]
-            
-        import random
-        example = random.choice(examples)
+        """Lädt ein Beispiel: mitgeliefert oder frisch gezogen (akzeptiert bzw. verworfen)"""
+        if self.automaton_mode is None:
+            # Automat aus einer Trace: nur das aufgezeichnete Wort, Sampler ohne Cache
+            examples = [self.engine.word]
+            sampler = AutomatonSampler(self.engine.clone())
+        else:
+            examples = list(load_mode(self.automaton_mode)["examples"])
+            sampler = self._samplers.get(self.automaton_mode)
+        try:
+            if sampler is None:
+                definition = load_mode(self.automaton_mode)
+                sampler = self._samplers[self.automaton_mode] = make_sampler(definition)
+            examples.append(next(sample_accepted(sampler, range(1, 13))))
+            examples.append(next(sample_rejected(self.engine.clone(), range(1, 9))))
+        except (ValueError, ExplorationLimitError):
+            pass
+            
+        example = random.choice(examples or [""])
         self.input_entry.delete(0, tk.END)
         self.input_entry.insert(0, example)
         self.reset_automaton()
         
+    def toggle_stack_runs(self):
+        """Schaltet die Lauflängen-Darstellung des Stacks um"""
+        self.engine.set_run_length(self.stack_runs.get())
+        self.draw_stack()
+        
+    def toggle_profiling(self):
+        """Schaltet die Messung ein/aus; die Tabelle erscheint neben dem Verlauf"""
+        if self.profiling.get():
+            self.engine.profile = Profile()
+            self.profile_frame.pack(side=tk.RIGHT, fill=tk.Y, padx=(5, 0), before=self.history_text)
+            self.update_profile_view()
+        else:
+            self.engine.profile = None
+            self.profile_frame.pack_forget()
+            
+    def update_profile_view(self):
+        """Füllt die Heatmap-Tabelle: eine Zeile pro Übergang, Farbe nach Trefferanteil"""
+        profile = self.engine.profile
+        if profile is None:
+            return
+        transitions = self.engine.transitions
+        if set(self._profile_rows) != set(transitions):
+            self.profile_table.delete(*self.profile_table.get_children())
+            self._profile_rows = {}
+            for key in transitions:
+                self._profile_rows[key] = self.profile_table.insert("", tk.END, values=("", 0))
+        busiest = max(profile.hits.values(), default=0)
+        for key, row in self._profile_rows.items():
+            state, symbol, top = key
+            new_state, stack_action = transition_targets(transitions[key])[0]
+            hits = profile.hits.get(key, 0)
+            level = hits * (len(HEAT_COLORS) - 1) // busiest if busiest else 0
+            label = f"{state},{symbol or 'ε'},{top} → {new_state},{''.join(stack_action) or 'ε'}"
+            self.profile_table.item(row, values=(label, hits), tags=(f"heat{level}",))
+            
+        total = sum(profile.times.values()) or 1
+        shares = " · ".join(f"{phase} {100 * profile.times[phase] / total:.0f}%" for phase in Profile.PHASES)
+        if self.language == "de":
+            text = f"{shares}\nmax. Tiefe {profile.max_depth} · ε-Schritte {profile.epsilon_moves}"
+        else:
+            text = f"{shares}\nmax depth {profile.max_depth} · ε-moves {profile.epsilon_moves}"
+        self.profile_summary.config(text=text)
+        
+    def export_profile(self):
+        """Speichert das Profil als JSON"""
+        profile = self.engine.profile
+        if profile is None:
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".json",
+                                            filetypes=[("JSON", "*.json"), ("*", "*")])
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as stream:
+                json.dump(profile.to_dict(self.engine.transitions), stream, indent=2, ensure_ascii=False)
+        except OSError as error:
+            messagebox.showerror("Error", str(error))
+            
+    def snapshot_interval(self):
+        """Liest das Intervall für volle Stack-Schnappschüsse (0 = aus)"""
+        try:
+            return max(0, int(self.snapshot_spin.get()))
+        except (TypeError, ValueError):
+            return 0
+            
     def update_speed(self, value):
         """Aktualisiert die Animationsgeschwindigkeit"""
-        self.animation_speed = int(value)
+        self.animation_speed = int(float(value))
+        self.speed_mode_label.config(text="⚡ Turbo" if self.animation_speed <= 0 else "")
         
     def reset_automaton(self):
         """Setzt den Automaten zurück"""
-        self.stack = [self.initial_stack_symbol]
-        self.current_state = "q0"
-        self.input_position = 0
-        self.step_history = []
+        self.cancel_background()
+        self.engine.reset(self.input_entry.get())
+        self.engine.profile = Profile() if self.profiling.get() else None
+        self.replay = Replay(self.engine)
         self.is_running = False
         
-        self.history_text.delete(1.0, tk.END)
+        self.log_view.clear()
         if self.language == "de":
-            self.history_text.insert(tk.END, "Automat zurückgesetzt.\n")
-            self.history_text.insert(tk.END, f"Startzustand: {self.current_state}\n")
-            self.history_text.insert(tk.END, f"Stack initialisiert: {self.stack}\n\n")
+            self.log_view.append("Automat zurückgesetzt.\n")
+            self.log_view.append(f"Startzustand: {self.engine.state}\n")
+            self.log_view.append(f"Stack initialisiert: {self.engine.stack}\n\n")
             self.status_label.config(text="Bereit", fg='#2c3e50')
         else:
-            self.history_text.insert(tk.END, "Automaton reset.\n")
-            self.history_text.insert(tk.END, f"Start state: {self.current_state}\n")
-            self.history_text.insert(tk.END, f"Stack initialized: {self.stack}\n\n")
+            self.log_view.append("Automaton reset.\n")
+            self.log_view.append(f"Start state: {self.engine.state}\n")
+            self.log_view.append(f"Stack initialized: {self.engine.stack}\n\n")
             self.status_label.config(text="Ready", fg='#2c3e50')
         
         self.update_visualization()
@@ -668,8 +3488,7 @@ a → Stack: [Z] (match!)
         if self.is_running:
             return
             
-        self.input_string = self.input_entry.get()
-        if not self.input_string and self.input_position == 0:
+        if not self.input_entry.get():
             if self.language == "de":
                 messagebox.showwarning("Warnung", "Bitte geben Sie einen String ein!")
             else:
@@ -680,253 +3499,977 @@ a → Stack: [Z] (match!)
         self.is_running = True
         self.run_automatic()
         
+    def stop_automaton(self):
+        """Hält einen laufenden (auch Hintergrund-)Lauf an"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        if self._worker is None:
+            if self.language == "de":
+                self.status_label.config(text="⏹ Gestoppt", fg='#7f8c8d')
+            else:
+                self.status_label.config(text="⏹ Stopped", fg='#7f8c8d')
+                
+    def start_background(self):
+        """Wertet das Wort in einem Worker-Thread aus; die GUI bleibt bedienbar"""
+        if self.is_running:
+            return
+            
+        word = self.input_entry.get()
+        if not word:
+            if self.language == "de":
+                messagebox.showwarning("Warnung", "Bitte geben Sie einen String ein!")
+            else:
+                messagebox.showwarning("Warning", "Please enter a string!")
+            return
+            
+        self.reset_automaton()
+        self.is_running = True
+        # Eigene Engine für den Thread, die GUI-Engine bleibt unangetastet
+        engine = self.engine.clone()
+        updates = queue.Queue()
+        cancel = threading.Event()
+        self._worker = (engine, updates, cancel, len(word))
+        threading.Thread(target=self.background_worker, args=(engine, word, updates, cancel),
+                         daemon=True).start()
+        self.root.after(100, self.poll_background)
+        
+    @staticmethod
+    def background_worker(engine, word, updates, cancel):
+        """Läuft im Worker-Thread: nur Engine und Queue, keine Widgets"""
+        started = time.perf_counter()
+        
+        def progress(position, state, depth):
+            updates.put(("progress", position, state, depth, time.perf_counter() - started))
+            return not cancel.is_set()
+            
+        try:
+            result = engine.run(word, progress)
+        except Exception as error:
+            updates.put(("error", error))
+            return
+        updates.put(("done", result, time.perf_counter() - started))
+        
+    def cancel_background(self):
+        """Bricht einen Hintergrundlauf ab; spätere Meldungen werden ignoriert"""
+        if self._worker is not None:
+            self._worker[2].set()
+            self._worker = None
+            
+    def poll_background(self):
+        """Holt Fortschrittsmeldungen des Workers ab (läuft per root.after)"""
+        worker = self._worker
+        if worker is None:
+            return
+        engine, updates, cancel, length = worker
+        if not self.is_running:
+            cancel.set()
+            
+        progress = None
+        try:
+            while True:
+                message = updates.get_nowait()
+                if message[0] == "progress":
+                    progress = message
+                else:
+                    self.finish_background(engine, message)
+                    return
+        except queue.Empty:
+            pass
+            
+        if progress is not None:
+            _, position, state, depth, elapsed = progress
+            percent = 100 * position // max(1, length)
+            rate = int(position / elapsed) if elapsed > 0 else 0
+            if self.language == "de":
+                text = f"⏳ {percent}% · {state} · Tiefe {depth} · {rate:,} Schritte/s"
+            else:
+                text = f"⏳ {percent}% · {state} · depth {depth} · {rate:,} steps/s"
+            self.status_label.config(text=text, fg='#16a085')
+        self.root.after(100, self.poll_background)
+        
+    def finish_background(self, engine, message):
+        """Übernimmt das Ergebnis des Workers in die GUI"""
+        self._worker = None
+        self.is_running = False
+        if message[0] == "error":
+            messagebox.showerror("Error", str(message[1]))
+            return
+        _, result, elapsed = message
+        self.engine = engine
+        self.replay = None  # Hintergrundläufe werden nicht aufgezeichnet
+        if self.language == "de":
+            self.log_view.append(f"Hintergrundlauf: {engine.steps} Schritte in {elapsed:.2f} s\n")
+        else:
+            self.log_view.append(f"Background run: {engine.steps} steps in {elapsed:.2f} s\n")
+        if result == CANCELLED:
+            if self.language == "de":
+                self.status_label.config(text="⏹ Abgebrochen", fg='#7f8c8d')
+            else:
+                self.status_label.config(text="⏹ Cancelled", fg='#7f8c8d')
+            self.update_visualization()
+            return
+        self.show_step_result(result)
+        
     def run_automatic(self):
         """Führt Schritte automatisch aus"""
         if not self.is_running:
             return
             
-        if self.input_position <= len(self.input_string):
-            result = self.step_automaton()
+        if self.engine.position <= len(self.engine.word):
+            if self.animation_speed <= 0:
+                result = self.run_turbo_batch()
+            else:
+                result = self.step_automaton()
             if result:
-                self.root.after(self.animation_speed, self.run_automatic)
+                self.root.after(max(1, self.animation_speed), self.run_automatic)
             else:
                 self.is_running = False
         else:
             self.is_running = False
             
+    def run_turbo_batch(self):
+        """Turbo: so viele Schritte wie in das Zeitbudget passen, dann einmal zeichnen"""
+        full = self.log_mode.get() == "full"
+        interval = self.snapshot_interval()
+        deadline = time.perf_counter() + self.turbo_budget
+        self.log_view.begin_batch()
+        try:
+            result = self.advance_automaton(full, interval)
+            while result == RUNNING and time.perf_counter() < deadline:
+                result = self.advance_automaton(full, interval)
+        finally:
+            self.log_view.end_batch()
+        return self.show_step_result(result)
+            
     def step_automaton(self):
         """Führt einen Schritt aus"""
-        self.input_string = self.input_entry.get()
+        replay = self.replay
+        if replay is not None and self.engine.steps < len(replay):
+            # Nach dem Zurückspulen erst die aufgezeichneten Schritte zeigen
+            return self.seek_step(self.engine.steps + 1)
+        result = self.advance_automaton(self.log_mode.get() == "full", self.snapshot_interval())
+        return self.show_step_result(result)
+        
+    def step_back(self):
+        """Geht einen Schritt in der Aufzeichnung zurück"""
+        if self.engine.steps > 0:
+            self.seek_step(self.engine.steps - 1)
+            
+    def on_replay_scale(self, value):
+        """Slider bewegt: zum gewählten Schritt springen"""
+        step = int(float(value))
+        if self.replay is not None and step != self.engine.steps:
+            self.seek_step(step)
+            
+    def seek_step(self, step):
+        """Zeigt den Stand nach `step` Schritten (Checkpoint + erneut angewandte Transitionen)"""
+        replay = self.replay
+        if replay is None or self.is_running:
+            return False
+        replay.seek(step)
+        total = len(replay)
+        if self.language == "de":
+            text = f"⏪ Schritt {self.engine.steps} / {total}"
+        else:
+            text = f"⏪ Step {self.engine.steps} / {total}"
+        self.status_label.config(text=text, fg='#7f8c8d')
+        self.update_visualization()
+        return self.engine.steps < total
+        
+    def save_trace(self):
+        """Speichert die aktuelle Aufzeichnung als Trace-Datei"""
+        if self.replay is None or not len(self.replay):
+            if self.language == "de":
+                messagebox.showwarning("Warnung", "Es gibt noch keine aufgezeichneten Schritte!")
+            else:
+                messagebox.showwarning("Warning", "There are no recorded steps yet!")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".pdat",
+                                            filetypes=[("PDA trace", "*.pdat"), ("*", "*")])
+        if not path:
+            return
+        try:
+            write_trace(path, self.replay)
+        except OSError as error:
+            messagebox.showerror("Error", str(error))
+            
+    def load_trace(self):
+        """Lädt eine Trace-Datei und zeigt sie ohne erneute Ausführung an"""
+        if self.is_running:
+            return
+        path = filedialog.askopenfilename(filetypes=[("PDA trace", "*.pdat"), ("*", "*")])
+        if not path:
+            return
+        try:
+            replay = Replay.from_trace(path)
+        except (OSError, ValueError) as error:  # auch TraceError/DefinitionError
+            messagebox.showerror("Error", str(error))
+            return
+            
+        self.cancel_background()
+        self.engine = replay.engine
+        self.engine.set_run_length(self.stack_runs.get())
+        self.replay = replay
+        # Auswahl und Info auf den Automaten der Trace umstellen; ohne passenden
+        # mitgelieferten Automaten bleibt kein Modus gewählt (Reset und
+        # Sprachwechsel behalten dann die geladene Engine)
+        self.automaton_mode = self.bundled_mode_of(self.engine)
+        self.trace_name = os.path.basename(path)
+        self.mode_var.set(self.automaton_mode or "")
+        self.update_info_text()
+        self.input_entry.delete(0, tk.END)
+        self.input_entry.insert(0, self.engine.word)
+        
+        self.log_view.clear()
+        if self.language == "de":
+            self.log_view.append(f"Trace geladen: {os.path.basename(path)}\n")
+            self.log_view.append(f"{len(replay)} Schritte, Ergebnis: {replay.final[0]}\n\n")
+        else:
+            self.log_view.append(f"Trace loaded: {os.path.basename(path)}\n")
+            self.log_view.append(f"{len(replay)} steps, result: {replay.final[0]}\n\n")
+        self.seek_step(0)
+        
+    def update_replay_controls(self):
+        """Slider-Bereich und -Position an die Aufzeichnung anpassen"""
+        total = len(self.replay) if self.replay is not None else 0
+        self.replay_scale.config(to=total)
+        self.replay_scale.set(min(self.engine.steps, total))
+        
+    def advance_automaton(self, full_log, snapshot_interval):
+        """Führt einen Schritt der Engine aus und protokolliert ihn (ohne Zeichnen)"""
+        engine = self.engine
+        # Neues Wort erst übernehmen, solange noch kein Schritt gemacht wurde
+        if engine.steps == 0:
+            word = self.input_entry.get()
+            if word != engine.word:
+                engine.reset(word)
+                self.replay = Replay(engine)
+        
+        stack_before = engine.stack
+        steps_before = engine.steps
+        result = engine.step()
+        
+        if self.replay is not None:
+            self.replay.record()
+            
+        if result == STACK_EMPTY:
+            if self.language == "de":
+                self.log_view.append("FEHLER: Stack ist leer!\n")
+            else:
+                self.log_view.append("ERROR: Stack is empty!\n")
+        elif engine.steps != steps_before:
+            # Log: nur die Schrittnummer, der Text entsteht erst, wenn er sichtbar ist
+            if self.replay is None:
+                entry = self.format_step_text(engine.last_step, stack_before, full_log, snapshot_interval)
+            else:
+                entry = engine.steps
+            if engine.profile is None:
+                self.log_view.append(entry)
+            else:
+                started = time.perf_counter()
+                self.log_view.append(entry)
+                engine.profile.times["log"] += time.perf_counter() - started
+        return result
+        
+    def show_step_result(self, result):
+        """Zeigt das Ergebnis eines Schritts an; True, wenn es weitergeht"""
+        engine = self.engine
         
         # Prüfe ob fertig
-        if self.input_position > len(self.input_string):
+        if result == FINISHED:
             if self.language == "de":
                 self.status_label.config(text="Fertig", fg='#95a5a6')
             else:
                 self.status_label.config(text="Finished", fg='#95a5a6')
             return False
             
-        # Aktuelles Symbol (oder epsilon)
-        if self.input_position < len(self.input_string):
-            symbol = self.input_string[self.input_position]
-        else:
-            symbol = ""  # Epsilon-Übergang
-            
-        # Stack-Top
-        if len(self.stack) > 0:
-            stack_top = self.stack[-1]
-        else:
+        if result == STACK_EMPTY:
             if self.language == "de":
                 self.status_label.config(text="❌ Fehler: Stack leer!", fg='#e74c3c')
-                self.history_text.insert(tk.END, "FEHLER: Stack ist leer!\n")
             else:
                 self.status_label.config(text="❌ Error: Stack empty!", fg='#e74c3c')
-                self.history_text.insert(tk.END, "ERROR: Stack is empty!\n")
             return False
             
-        # Suche passende Transition
-        transition_key = (self.current_state, symbol, stack_top)
-        
-        if transition_key in self.transitions:
-            new_state, stack_action = self.transitions[transition_key]
-            
-            # Log
+        if result == DIVERGED:
             if self.language == "de":
-                log_msg = f"Schritt {len(self.step_history) + 1}:\n"
-                log_msg += f"  Zustand: {self.current_state} → {new_state}\n"
-                log_msg += f"  Symbol: '{symbol if symbol else 'ε'}'\n"
-                log_msg += f"  Stack vorher: {self.stack}\n"
+                self.status_label.config(text="❌ ABGELEHNT: ε-Zyklus", fg='#e74c3c')
+                messagebox.showerror("Fehler", f"Endlose ε-Übergänge ab:\nZustand: {engine.state}\nStack-Top: {engine.stack.top}")
             else:
-                log_msg = f"Step {len(self.step_history) + 1}:\n"
-                log_msg += f"  State: {self.current_state} → {new_state}\n"
-                log_msg += f"  Symbol: '{symbol if symbol else 'ε'}'\n"
-                log_msg += f"  Stack before: {self.stack}\n"
-            
-            # Stack aktualisieren
-            self.stack.pop()  # Entferne Top
-            if stack_action:
-                self.stack.extend(reversed(stack_action))  # Füge neue Symbole hinzu
+                self.status_label.config(text="❌ REJECTED: ε-cycle", fg='#e74c3c')
+                messagebox.showerror("Error", f"Endless ε-transitions from:\nState: {engine.state}\nStack-Top: {engine.stack.top}")
+            self.update_visualization()
+            return False
             
-            if self.language == "de":
-                log_msg += f"  Stack nachher: {self.stack}\n\n"
-            else:
-                log_msg += f"  Stack after: {self.stack}\n\n"
-            
-            self.history_text.insert(tk.END, log_msg)
-            self.history_text.see(tk.END)
-            
-            # Update
-            self.current_state = new_state
-            if symbol:  # Nur weitergehen wenn nicht epsilon
-                self.input_position += 1
-            elif self.current_state in self.accepting_states:
-                # Bei epsilon-Übergang in Endzustand
-                self.input_position = len(self.input_string) + 1
-                
-            self.step_history.append((transition_key, new_state, list(self.stack)))
-            
-            # Prüfe Akzeptanz
-            if self.current_state in self.accepting_states and self.input_position >= len(self.input_string):
-                if len(self.stack) == 1 and self.stack[0] == self.initial_stack_symbol:
-                    if self.language == "de":
-                        self.status_label.config(text="✅ AKZEPTIERT!", fg='#27ae60')
-                        messagebox.showinfo("Erfolg", "Der String wurde akzeptiert!")
-                    else:
-                        self.status_label.config(text="✅ ACCEPTED!", fg='#27ae60')
-                        messagebox.showinfo("Success", "The string was accepted!")
-                    self.update_visualization()
-                    return False
-                    
+        if result == RUNNING:
             self.update_visualization()
             return True
             
+        _, symbol, stack_top = engine.last_key
+        
+        if result == ACCEPTED and engine.last_target is not None:
+            # Akzeptiert nach einem Übergang
+            if self.language == "de":
+                self.status_label.config(text="✅ AKZEPTIERT!", fg='#27ae60')
+                messagebox.showinfo("Erfolg", "Der String wurde akzeptiert!")
+            else:
+                self.status_label.config(text="✅ ACCEPTED!", fg='#27ae60')
+                messagebox.showinfo("Success", "The string was accepted!")
+        elif result == ACCEPTED:
+            # Keine Transition mehr, aber im Endzustand am Ende der Eingabe
+            if self.language == "de":
+                self.status_label.config(text="✅ AKZEPTIERT!", fg='#27ae60')
+            else:
+                self.status_label.config(text="✅ ACCEPTED!", fg='#27ae60')
         else:
-            # Keine Transition gefunden
-            if self.current_state in self.accepting_states and self.input_position == len(self.input_string):
-                if self.language == "de":
-                    self.status_label.config(text="✅ AKZEPTIERT!", fg='#27ae60')
-                else:
-                    self.status_label.config(text="✅ ACCEPTED!", fg='#27ae60')
+            if self.language == "de":
+                self.status_label.config(text="❌ ABGELEHNT", fg='#e74c3c')
+                messagebox.showerror("Fehler", f"Keine Transition für:\nZustand: {engine.state}\nSymbol: '{symbol if symbol else 'ε'}'\nStack-Top: {stack_top}")
             else:
-                if self.language == "de":
-                    self.status_label.config(text="❌ ABGELEHNT", fg='#e74c3c')
-                    messagebox.showerror("Fehler", f"Keine Transition für:\nZustand: {self.current_state}\nSymbol: '{symbol if symbol else 'ε'}'\nStack-Top: {stack_top}")
-                else:
-                    self.status_label.config(text="❌ REJECTED", fg='#e74c3c')
-                    messagebox.showerror("Error", f"No transition for:\nState: {self.current_state}\nSymbol: '{symbol if symbol else 'ε'}'\nStack-Top: {stack_top}")
+                self.status_label.config(text="❌ REJECTED", fg='#e74c3c')
+                messagebox.showerror("Error", f"No transition for:\nState: {engine.state}\nSymbol: '{symbol if symbol else 'ε'}'\nStack-Top: {stack_top}")
             
-            self.update_visualization()
-            return False
+        self.update_visualization()
+        return False
             
-    def update_visualization(self):
-        """Aktualisiert die Visualisierung"""
-        # Canvas leeren
-        self.canvas.delete("all")
+    def format_log_entry(self, step):
+        """Formatiert Schritt `step` für das Log (aus der Aufzeichnung nachgebaut)"""
+        record, stack_before = self.replay.step_record(step)
+        return self.format_step_text(record, stack_before, self.log_mode.get() == "full",
+                                     self.snapshot_interval())
+        
+    def format_step_text(self, record, stack_before, full, snapshot_interval):
+        """Text eines Schritts: kompaktes Delta oder (full) mit Stack vorher/nachher"""
+        symbol = record.symbol if record.symbol else 'ε'
+        if not full:
+            snapshot = snapshot_interval > 0 and record.number % snapshot_interval == 0
+            return format_step(record, snapshot) + "\n"
+        if self.language == "de":
+            log_msg = f"Schritt {record.number}:\n"
+            log_msg += f"  Zustand: {record.old_state} → {record.new_state}\n"
+            log_msg += f"  Symbol: '{symbol}'\n"
+            log_msg += f"  Stack vorher: {stack_before}\n"
+            log_msg += f"  Stack nachher: {record.stack}\n\n"
+        else:
+            log_msg = f"Step {record.number}:\n"
+            log_msg += f"  State: {record.old_state} → {record.new_state}\n"
+            log_msg += f"  Symbol: '{symbol}'\n"
+            log_msg += f"  Stack before: {stack_before}\n"
+            log_msg += f"  Stack after: {record.stack}\n\n"
+        return log_msg
         
-        # Eingabestring visualisieren
+    def update_visualization(self):
+        """Aktualisiert die Visualisierung
+
+        Die Canvas-Elemente werden nur beim ersten Zeichnen (neues Wort,
+        Größe oder Sprache geändert) erzeugt. Von der Eingabe wird nur ein
+        Fenster um die Leseposition gezeichnet, das in die Canvas passt;
+        pro Schritt werden nur betroffene Felder umgefärbt, der Zeiger
+        verschoben und die Zustandsanzeige umkonfiguriert.
+        """
+        started = time.perf_counter()
+        engine = self.engine
         canvas_width = self.canvas.winfo_width() if self.canvas.winfo_width() > 1 else 600
-        canvas_height = self.canvas.winfo_height() if self.canvas.winfo_height() > 1 else 300
+        
+        key = (engine.word, canvas_width, self.language)
+        if self._vis_key is None or self._vis_key[0] is not engine.word or self._vis_key[1:] != key[1:]:
+            self.build_visualization(canvas_width)
+            self._vis_key = key
+            self.show_input_window(self.input_window_for(engine.position))
+        elif not self.in_input_window(engine.position):
+            # Leseposition hat das Fenster verlassen: Fenster weiterschieben
+            self.show_input_window(self.input_window_for(engine.position))
+        else:
+            # Nur Felder zwischen alter und neuer Leseposition umfärben
+            old, new = self._drawn_position, engine.position
+            start = self._input_window_start
+            for i in range(max(min(old, new), start),
+                           min(max(old, new) + 1, start + len(self._input_cells), len(engine.word))):
+                self.canvas.itemconfig(self._input_cells[i - start], fill=self.input_color(i))
+        self._drawn_position = engine.position
+        self.update_input_minimap()
+        self.place_pointer()
+            
+        # Zustand
+        accepting = engine.state in engine.accepting_states
+        if self.language == "de":
+            state_text = f"Aktueller Zustand: {engine.state}"
+        else:
+            state_text = f"Current State: {engine.state}"
+        self.canvas.itemconfig(self._state_label, text=state_text,
+                               fill='#e74c3c' if accepting else '#3498db')
+        self.canvas.itemconfig(self._state_circle, fill='#2ecc71' if accepting else '#3498db')
+        self.canvas.itemconfig(self._state_name, text=engine.state)
+        # Doppelkreis für Endzustand
+        self.canvas.itemconfig(self._state_inner, state='normal' if accepting else 'hidden')
+                                   
+        # Stack visualisieren (Minimap-Auswahl gilt nur bis zum nächsten Schritt)
+        self._stack_browse_top = None
+        self.draw_stack()
+        self.update_replay_controls()
+        if engine.profile is not None:
+            engine.profile.times["render"] += time.perf_counter() - started
+            self.update_profile_view()
+        
+    # Geometrie der Eingabefelder
+    input_x_start = 50
+    input_y = 80
+    box_size = 40
+    minimap_y = 145
+    
+    def input_x(self, slot):
+        return self.input_x_start + slot * (self.box_size + 5)
+        
+    def input_color(self, i):
+        """Farbe eines Eingabefelds basierend auf der Leseposition"""
+        if i < self.engine.position:
+            return '#bdc3c7'  # Bereits gelesen
+        elif i == self.engine.position:
+            return '#f39c12'  # Aktuell
+        return '#ecf0f1'  # Noch nicht gelesen
+        
+    def more_text(self, count):
+        if self.language == "de":
+            return f"… {count} weitere"
+        return f"… {count} more"
+        
+    def in_input_window(self, i):
+        return self._input_window_start <= i < self._input_window_start + len(self._input_cells)
+        
+    def input_window_for(self, position):
+        """Fensteranfang, bei dem die Leseposition im ersten Viertel liegt"""
+        slots = len(self._input_cells)
+        start = position - slots // 4
+        return max(0, min(start, len(self.engine.word) - slots))
+        
+    def build_visualization(self, canvas_width):
+        """Erzeugt alle Elemente der Eingabe- und Zustandsanzeige neu
+
+        Es gibt nur so viele Eingabefelder, wie in die Canvas passen;
+        sie werden beim Verschieben des Fensters umbeschriftet.
+        """
+        engine = self.engine
+        self.canvas.delete("all")
+        self._canvas_width = canvas_width
         
         # Titel
         if self.language == "de":
             title_text = "Eingabestring mit Leseposition"
-            state_text = f"Aktueller Zustand: {self.current_state}"
         else:
             title_text = "Input String with Read Position"
-            state_text = f"Current State: {self.current_state}"
         
         self.canvas.create_text(canvas_width // 2, 30, text=title_text,
                                font=('Arial', 12, 'bold'), fill='#2c3e50')
         
-        # Eingabestring
-        if self.input_string:
-            x_start = 50
-            y_pos = 80
-            box_size = 40
-            
-            for i, char in enumerate(self.input_string):
-                x = x_start + i * (box_size + 5)
-                
-                # Farbe basierend auf Position
-                if i < self.input_position:
-                    color = '#bdc3c7'  # Bereits gelesen
-                elif i == self.input_position:
-                    color = '#f39c12'  # Aktuell
-                else:
-                    color = '#ecf0f1'  # Noch nicht gelesen
-                    
+        # Eingabestring (nur sichtbare Felder)
+        box_size = self.box_size
+        y_pos = self.input_y
+        fitting = max(1, (canvas_width - 2 * self.input_x_start + 5) // (box_size + 5))
+        self._input_cells = []
+        self._input_texts = []
+        self._input_window_start = 0
+        for slot in range(min(fitting, len(engine.word))):
+            x = self.input_x(slot)
+            self._input_cells.append(
                 self.canvas.create_rectangle(x, y_pos, x + box_size, y_pos + box_size,
-                                            fill=color, outline='#34495e', width=2)
+                                             outline='#34495e', width=2))
+            self._input_texts.append(
                 self.canvas.create_text(x + box_size // 2, y_pos + box_size // 2,
-                                       text=char, font=('Courier', 16, 'bold'))
+                                        font=('Courier', 16, 'bold')))
+        
+        # Zusammenfassung der abgeschnittenen Teile und Minimap der ganzen Eingabe
+        self._input_more_left = self.canvas.create_text(self.input_x_start, y_pos + box_size + 12,
+                                                        anchor=tk.W, font=('Arial', 9), fill='#7f8c8d')
+        self._input_more_right = self.canvas.create_text(canvas_width - self.input_x_start,
+                                                         y_pos + box_size + 12, anchor=tk.E,
+                                                         font=('Arial', 9), fill='#7f8c8d')
+        minimap_right = canvas_width - self.input_x_start
+        self._input_minimap = self.canvas.create_rectangle(self.input_x_start, self.minimap_y,
+                                                           minimap_right, self.minimap_y + 6,
+                                                           fill='#ecf0f1', outline='#bdc3c7')
+        self._input_minimap_view = self.canvas.create_rectangle(0, 0, 0, 0, fill='#bdc3c7', outline='')
+        self._input_minimap_pos = self.canvas.create_line(0, 0, 0, 0, fill='#e74c3c', width=2)
+        for item in (self._input_minimap, self._input_minimap_view, self._input_minimap_pos):
+            self.canvas.tag_bind(item, "<Button-1>", self.on_input_minimap_click)
                                        
-            # Zeiger
-            if self.input_position < len(self.input_string):
-                x_pointer = x_start + self.input_position * (box_size + 5) + box_size // 2
-                self.canvas.create_text(x_pointer, y_pos - 20, text="▼",
-                                       font=('Arial', 20), fill='#e74c3c')
+        # Zeiger (wird in update_visualization positioniert)
+        self._pointer = self.canvas.create_text(0, 0, text="▼", font=('Arial', 20), fill='#e74c3c')
                                        
-        # Zustand visualisieren
+        # Zustand
         state_y = 180
-        self.canvas.create_text(canvas_width // 2, state_y, 
-                               text=state_text,
-                               font=('Arial', 16, 'bold'), 
-                               fill='#e74c3c' if self.current_state in self.accepting_states else '#3498db')
+        self._state_label = self.canvas.create_text(canvas_width // 2, state_y, text="",
+                                                    font=('Arial', 16, 'bold'))
         
         # Zustandskreis
         cx = canvas_width // 2
         cy = state_y + 50
         radius = 40
         
-        color = '#2ecc71' if self.current_state in self.accepting_states else '#3498db'
-        self.canvas.create_oval(cx - radius, cy - radius, cx + radius, cy + radius,
-                               fill=color, outline='#2c3e50', width=3)
-        self.canvas.create_text(cx, cy, text=self.current_state,
-                               font=('Arial', 18, 'bold'), fill='white')
+        self._state_circle = self.canvas.create_oval(cx - radius, cy - radius, cx + radius, cy + radius,
+                                                     outline='#2c3e50', width=3)
+        self._state_name = self.canvas.create_text(cx, cy, text="",
+                                                   font=('Arial', 18, 'bold'), fill='white')
+        self._state_inner = self.canvas.create_oval(cx - radius + 5, cy - radius + 5,
+                                                    cx + radius - 5, cy + radius - 5,
+                                                    outline='#2c3e50', width=2)
         
-        # Doppelkreis für Endzustand
-        if self.current_state in self.accepting_states:
-            self.canvas.create_oval(cx - radius + 5, cy - radius + 5, 
-                                   cx + radius - 5, cy + radius - 5,
-                                   outline='#2c3e50', width=2)
-                                   
-        # Stack visualisieren
-        self.draw_stack()
+    def show_input_window(self, start):
+        """Beschriftet und färbt die Eingabefelder für das Fenster ab start"""
+        word = self.engine.word
+        self._input_window_start = start
+        for slot, (rect, text) in enumerate(zip(self._input_cells, self._input_texts)):
+            i = start + slot
+            self.canvas.itemconfig(rect, fill=self.input_color(i))
+            self.canvas.itemconfig(text, text=word[i])
+        hidden_right = len(word) - start - len(self._input_cells)
+        self.canvas.itemconfig(self._input_more_left, text=self.more_text(start) if start else "")
+        self.canvas.itemconfig(self._input_more_right, text=self.more_text(hidden_right) if hidden_right > 0 else "")
+        
+    def update_input_minimap(self):
+        """Zeigt Fenster und Leseposition relativ zur ganzen Eingabe"""
+        length = len(self.engine.word)
+        clipped = length > len(self._input_cells)
+        state = 'normal' if clipped else 'hidden'
+        for item in (self._input_minimap, self._input_minimap_view, self._input_minimap_pos):
+            self.canvas.itemconfig(item, state=state)
+        if not clipped:
+            return
+        left = self.input_x_start
+        width = self._canvas_width - 2 * self.input_x_start
+        start = self._input_window_start
+        x0 = left + width * start // length
+        x1 = max(x0 + 2, left + width * (start + len(self._input_cells)) // length)
+        self.canvas.coords(self._input_minimap_view, x0, self.minimap_y, x1, self.minimap_y + 6)
+        x_pos = left + width * min(self.engine.position, length) // length
+        self.canvas.coords(self._input_minimap_pos, x_pos, self.minimap_y - 2, x_pos, self.minimap_y + 8)
+        
+    def place_pointer(self):
+        """Zeiger über die Leseposition setzen (versteckt, wenn nicht im Fenster)"""
+        engine = self.engine
+        if engine.position < len(engine.word) and self.in_input_window(engine.position):
+            x_pointer = self.input_x(engine.position - self._input_window_start) + self.box_size // 2
+            self.canvas.coords(self._pointer, x_pointer, self.input_y - 20)
+            self.canvas.itemconfig(self._pointer, state='normal')
+        else:
+            self.canvas.itemconfig(self._pointer, state='hidden')
+            
+    def on_input_minimap_click(self, event):
+        """Springt mit dem Eingabefenster zur angeklickten Stelle"""
+        length = len(self.engine.word)
+        width = self._canvas_width - 2 * self.input_x_start
+        target = (event.x - self.input_x_start) * length // max(1, width)
+        start = target - len(self._input_cells) // 2
+        self.show_input_window(max(0, min(start, length - len(self._input_cells))))
+        self.update_input_minimap()
+        self.place_pointer()
+        
+    # Geometrie der Stack-Felder
+    stack_box_height = 40
+    stack_box_width = 100
+    
+    def stack_y(self, level):
+        """Obere Kante des Felds auf Ebene level (0 = unterstes Element)
+
+        Die Felder liegen fest in Canvas-Koordinaten und wachsen nach oben;
+        sichtbar gemacht wird der obere Teil über die scrollregion.
+        """
+        return -(level + 1) * (self.stack_box_height + 5)
         
     def draw_stack(self):
-        """Zeichnet den Stack"""
-        self.stack_canvas.delete("all")
+        """Zeichnet den Stack
+
+        Es werden nur die obersten Ebenen gezeichnet, die in die Canvas
+        passen (bzw. das per Minimap gewählte Fenster); darunter steht eine
+        Zusammenfassung "… N weitere". Bestehende Felder werden
+        wiederverwendet und nur bei geändertem Symbol umbeschriftet.
+        Bei einem RunStack ist jede Ebene ein ganzer Lauf ("A×10000").
+        """
+        stack = self.engine.stack
+        runs = isinstance(stack, RunStack)
+        depth = stack.runs if runs else stack.depth
+        canvas_width = self.stack_canvas.winfo_width() if self.stack_canvas.winfo_width() > 1 else 350
+        canvas_height = self.stack_canvas.winfo_height() if self.stack_canvas.winfo_height() > 1 else 250
         
-        if not self.stack:
+        key = (canvas_width, canvas_height, self.language, runs)
+        if stack is self._drawn_stack and key == self._stack_key and self._stack_browse_top is None:
+            return
+        if key != self._stack_key:
+            self.stack_canvas.delete("all")
+            self._stack_cells = {}
+            self._stack_top_label = None
+            self._stack_empty_text = None
+            self._stack_more_text = None
+            self._stack_minimap = None
+            self._stack_key = key
+        self._drawn_stack = stack
+        
+        x_center = canvas_width // 2
+        box_width = self.stack_box_width
+        cells = self._stack_cells
+        visible = max(1, (canvas_height - 45) // (self.stack_box_height + 5))
+        
+        # Sichtbares Fenster: die obersten Ebenen oder das gewählte Fenster
+        window_top = depth - 1
+        if self._stack_browse_top is not None:
+            window_top = min(self._stack_browse_top, window_top)
+        base = max(0, window_top - visible + 1)
+        self._stack_window_base = base
+        
+        # Symbole des Fensters
+        symbols = stack.run_levels(base, window_top) if runs else stack.levels(base, window_top)
+        
+        # Felder außerhalb des Fensters entfernen
+        for level in [level for level in cells if level not in symbols]:
+            rect, text, _ = cells.pop(level)
+            self.stack_canvas.delete(rect, text)
+        
+        for level, symbol in symbols.items():
+            if level in cells:
+                rect, text, drawn_symbol = cells[level]
+                if drawn_symbol != symbol:
+                    self.stack_canvas.itemconfig(text, text=str(symbol))
+                    cells[level] = (rect, text, symbol)
+                # Hervorhebung nur für das oberste Element
+                top = level == depth - 1
+                self.stack_canvas.itemconfig(rect, fill='#f39c12' if top else '#3498db',
+                                             width=3 if top else 2)
+                continue
+            y = self.stack_y(level)
+            top = level == depth - 1
+            rect = self.stack_canvas.create_rectangle(x_center - box_width // 2, y,
+                                                      x_center + box_width // 2, y + self.stack_box_height,
+                                                      fill='#f39c12' if top else '#3498db',
+                                                      outline='#2c3e50', width=3 if top else 2)
+            text = self.stack_canvas.create_text(x_center, y + self.stack_box_height // 2,
+                                                 text=str(symbol), font=('Courier', 12 if runs else 16, 'bold'),
+                                                 fill='white')
+            cells[level] = (rect, text, symbol)
+        
+        if not stack:
+            if self._stack_top_label is not None:
+                self.stack_canvas.itemconfig(self._stack_top_label, state='hidden')
+            for item in (self._stack_more_text, self._stack_minimap):
+                if item is not None:
+                    self.stack_canvas.itemconfig(item, state='hidden')
             if self.language == "de":
                 empty_text = "Stack ist leer"
             else:
                 empty_text = "Stack is empty"
-            self.stack_canvas.create_text(175, 125, text=empty_text,
-                                         font=('Arial', 14, 'italic'), fill='#95a5a6')
+            if self._stack_empty_text is None:
+                self._stack_empty_text = self.stack_canvas.create_text(
+                    175, 125, text=empty_text, font=('Arial', 14, 'italic'), fill='#95a5a6')
+            self.stack_canvas.itemconfig(self._stack_empty_text, state='normal')
+            self.stack_canvas.configure(scrollregion=(0, 0, canvas_width, canvas_height))
             return
+        if self._stack_empty_text is not None:
+            self.stack_canvas.itemconfig(self._stack_empty_text, state='hidden')
             
-        canvas_width = self.stack_canvas.winfo_width() if self.stack_canvas.winfo_width() > 1 else 350
-        canvas_height = self.stack_canvas.winfo_height() if self.stack_canvas.winfo_height() > 1 else 250
+        view_y = self.stack_y(window_top) - 20
         
-        box_height = 40
-        box_width = 100
-        x_center = canvas_width // 2
+        # Label für Top (nur wenn das Top im Fenster liegt)
+        top_y = self.stack_y(depth - 1)
+        label_x = x_center + box_width // 2 + 30
+        label_y = top_y + self.stack_box_height // 2
+        if self._stack_top_label is None:
+            self._stack_top_label = self.stack_canvas.create_text(
+                label_x, label_y, text="← TOP", font=('Arial', 10, 'bold'), fill='#e74c3c')
+        self.stack_canvas.coords(self._stack_top_label, label_x, label_y)
+        self.stack_canvas.itemconfig(self._stack_top_label,
+                                     state='normal' if window_top == depth - 1 else 'hidden')
         
-        # Von oben nach unten zeichnen (Top ist oben)
-        for i, symbol in enumerate(reversed(self.stack)):
-            y = 20 + i * (box_height + 5)
-            
-            # Hervorhebung des obersten Elements
-            if i == 0:
-                color = '#f39c12'
-                outline_width = 3
-            else:
-                color = '#3498db'
-                outline_width = 2
-                
-            # Box
-            self.stack_canvas.create_rectangle(x_center - box_width // 2, y,
-                                               x_center + box_width // 2, y + box_height,
-                                               fill=color, outline='#2c3e50', width=outline_width)
-            
-            # Symbol
-            self.stack_canvas.create_text(x_center, y + box_height // 2,
-                                         text=str(symbol), font=('Courier', 16, 'bold'),
-                                         fill='white')
-            
-            # Label für Top
-            if i == 0:
-                self.stack_canvas.create_text(x_center + box_width // 2 + 30, y + box_height // 2,
-                                             text="← TOP", font=('Arial', 10, 'bold'),
-                                             fill='#e74c3c')
+        # Zusammenfassung unterhalb und oberhalb des Fensters
+        if self._stack_more_text is None:
+            self._stack_more_text = self.stack_canvas.create_text(
+                0, 0, font=('Arial', 10, 'italic'), fill='#7f8c8d')
+        above = depth - 1 - window_top
+        summary = []
+        if base:
+            summary.append("▼ " + self.more_text(base))
+        if above:
+            summary.append("▲ " + self.more_text(above))
+        self.stack_canvas.coords(self._stack_more_text, x_center, self.stack_y(base) + self.stack_box_height + 12)
+        self.stack_canvas.itemconfig(self._stack_more_text, text="   ".join(summary),
+                                     state='normal' if summary else 'hidden')
+        
+        # Minimap: Balken für den ganzen Stack, Markierung für das Fenster
+        minimap_top = view_y + 10
+        minimap_height = canvas_height - 20
+        if self._stack_minimap is None:
+            self._stack_minimap = self.stack_canvas.create_rectangle(0, 0, 0, 0, fill='#ecf0f1',
+                                                                     outline='#bdc3c7')
+            self._stack_minimap_view = self.stack_canvas.create_rectangle(0, 0, 0, 0, fill='#bdc3c7',
+                                                                          outline='')
+            for item in (self._stack_minimap, self._stack_minimap_view):
+                self.stack_canvas.tag_bind(item, "<Button-1>", self.on_stack_minimap_click)
+        clipped = depth > visible
+        self.stack_canvas.itemconfig(self._stack_minimap, state='normal' if clipped else 'hidden')
+        self.stack_canvas.itemconfig(self._stack_minimap_view, state='normal' if clipped else 'hidden')
+        if clipped:
+            # Oben im Balken ist das Top des Stacks
+            y0 = minimap_top + minimap_height * above // depth
+            y1 = max(y0 + 2, minimap_top + minimap_height * (depth - base) // depth)
+            self.stack_canvas.coords(self._stack_minimap, 10, minimap_top, 18, minimap_top + minimap_height)
+            self.stack_canvas.coords(self._stack_minimap_view, 10, y0, 18, y1)
+        
+        # Sichtbereich so legen, dass das Fenster oben beginnt
+        self.stack_canvas.configure(scrollregion=(0, view_y, canvas_width, view_y + canvas_height))
+        self.stack_canvas.yview_moveto(0)
+        
+    def on_stack_minimap_click(self, event):
+        """Zeigt den Stack ab der angeklickten Tiefe (bis zum nächsten Schritt)"""
+        stack = self.engine.stack
+        depth = stack.runs if isinstance(stack, RunStack) else stack.depth
+        canvas_height = self.stack_canvas.winfo_height() if self.stack_canvas.winfo_height() > 1 else 250
+        fraction = (event.y - 10) / max(1, canvas_height - 20)
+        self._stack_browse_top = depth - 1 - int(max(0.0, min(1.0, fraction)) * depth)
+        self.draw_stack()
+
+
+def read_words(paths: List[str]) -> Iterator[str]:
+    """Liest Wörter zeilenweise aus Dateien bzw. stdin ('-'), ohne sie zu sammeln"""
+    for path in paths or ["-"]:
+        if path == "-":
+            for line in sys.stdin:
+                yield line.rstrip("\r\n")
+        else:
+            with open(path, encoding="utf-8") as stream:
+                for line in stream:
+                    yield line.rstrip("\r\n")
+
+
+def definition_from_args(args) -> dict:
+    """Definition aus --definition (Datei) bzw. --mode (mitgeliefert)"""
+    if args.definition:
+        return load_definition(args.definition)
+    return load_mode(args.mode)
+
+
+def engine_from_args(args) -> Kellerautomat:
+    """Engine aus --definition (Datei) bzw. --mode (mitgeliefert)"""
+    return Kellerautomat.from_definition(definition_from_args(args))
+
+
+def run_cli(args) -> int:
+    """Klassifiziert Wörter ohne GUI und schreibt ein Urteil pro Zeile"""
+    engine = engine_from_args(args)
+    out = sys.stdout
+    counts = {"accept": 0, "reject": 0, "error": 0}
+    # Die Wörter werden für die Ausgabe ein zweites Mal gebraucht; tee puffert
+    # nur die Blöcke, die gerade in den Workern sind
+    words, echo = itertools.tee(read_words(args.files))
+    if args.profile:
+        engine.profile = Profile()
+    if args.jobs == 1 or args.profile:
+        results = engine.classify(words)
+    else:
+        results = engine.classify_parallel(words, args.jobs or None)
+    names = {True: "accept", False: "reject", None: "error"}
+    for word, accepted in zip(echo, results):
+        verdict = names[accepted]
+        counts[verdict] += 1
+        out.write(f"{verdict}\t{word}\n")
+    out.flush()
+    if args.summary:
+        print(" ".join(f"{key}={value}" for key, value in counts.items()), file=sys.stderr)
+    if args.profile:
+        with open(args.profile, "w", encoding="utf-8") as stream:
+            json.dump(engine.profile.to_dict(engine.transitions), stream, indent=2, ensure_ascii=False)
+    return 1 if counts["error"] else 0
+
+
+def check_cli(args) -> int:
+    """Prüft jede Datei als ein einziges (beliebig großes) Wort"""
+    engine = engine_from_args(args)
+    try:
+        ByteTable.check_alphabet(engine.compiled.input_symbols)
+    except ValueError as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 2
+    for path in args.files:
+        try:
+            verdict = "accept" if engine.accepts_file(path) else "reject"
+        except ExplorationLimitError:
+            verdict = "error"
+        print(f"{verdict}\t{path}")
+    return 0
+
+
+def record_cli(args) -> int:
+    """Führt ein Wort schrittweise aus und speichert den Lauf als Trace-Datei"""
+    engine = engine_from_args(args)
+    if engine.nondeterministic:
+        print("error: traces need a deterministic automaton", file=sys.stderr)
+        return 2
+    if args.word is not None:
+        word = args.word
+    elif args.file and args.file != "-":
+        with open(args.file, encoding="utf-8") as stream:
+            word = stream.read()
+    else:
+        word = sys.stdin.read()
+    # Ein abschließender Zeilenumbruch gehört nicht zum Wort (wie bei check)
+    if args.word is None and word.endswith("\n"):
+        word = word[:-2] if word.endswith("\r\n") else word[:-1]
+    result = engine.record_trace(word, args.output)
+    verdict = "accept" if result == ACCEPTED else "reject"
+    print(f"{verdict}\t{engine.steps} steps\t{os.path.getsize(args.output)} bytes\t{args.output}")
+    return 0
+
+
+def parse_lengths(text: str):
+    """--length: "N" (genau N) oder "A:B" (gleichverteilt von A bis B)"""
+    low, _, high = text.partition(":")
+    try:
+        if not high:
+            return int(low)
+        return range(int(low), int(high) + 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected N or A:B, got {text!r}") from None
+
+
+def generate_cli(args) -> int:
+    """Schreibt akzeptierte (bzw. verworfene) Wörter, eines pro Zeile"""
+    definition = definition_from_args(args)
+    engine = Kellerautomat.from_definition(definition)
+    if args.rejected and args.sample is None:
+        print("error: --rejected needs --sample", file=sys.stderr)
+        return 2
+    rng = random.Random(args.seed)
+    lengths = args.length if args.length is not None else range(args.max_length + 1)
+    try:
+        if args.sample is None:
+            words = engine.accepted_words(args.max_length)
+        elif args.rejected:
+            words = itertools.islice(sample_rejected(engine, lengths, rng), args.sample)
+        else:
+            words = itertools.islice(sample_accepted(make_sampler(definition), lengths, rng), args.sample)
+        out = sys.stdout
+        for word in words:
+            out.write(word + "\n")
+    except (ValueError, ExplorationLimitError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 2
+    out.flush()
+    return 0
+
+
+def compare_cli(args) -> int:
+    """Vergleicht Kellerautomat und Earley-Parser einer Grammatik auf denselben Wörtern"""
+    definition = definition_from_args(args)
+    grammar = definition.get("grammar")
+    if grammar is None:
+        raise DefinitionError(f"{args.definition or args.mode}: keine Grammatik-Definition")
+    words = list(read_words(args.files)) if args.files or not args.random else []
+    words += definition["examples"]
+    # Zur Hälfte gleichverteilt gezogene Wörter der Grammatik (sonst wären
+    # fast alle Zufallswörter schon nach wenigen Zeichen verworfen); eine
+    # zyklische Grammatik lässt sich nicht zählen, dann nur Zufallswörter
+    rng = random.Random(args.seed)
+    try:
+        sampler = GrammarSampler(grammar)
+        lengths = [length for length in range(args.max_length + 1) if sampler.count(length)]
+    except ValueError:
+        lengths = []
+    sampled = 0
+    if lengths:
+        sampled = args.random // 2
+        words += itertools.islice(sample_accepted(sampler, lengths, rng), sampled)
+    for _ in range(args.random - sampled):
+        length = rng.randint(0, args.max_length)
+        words.append("".join(rng.choice(grammar.terminals) for _ in range(length)))
+    
+    report = compare_engines(Kellerautomat.from_definition(definition), EarleyParser(grammar), words)
+    for word, pda, earley in report["mismatches"]:
+        print(f"mismatch\t{word}\tpda={'accept' if pda else 'reject'}"
+              f"\tearley={'accept' if earley else 'reject'}")
+    print(f"words={report['words']} mismatches={len(report['mismatches'])} "
+          f"errors={report['errors']} pda={report['pda_seconds']:.3f}s "
+          f"earley={report['earley_seconds']:.3f}s")
+    return 1 if report["mismatches"] else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Pushdown automaton: interactive GUI (no arguments) or batch classification.")
+    commands = parser.add_subparsers(dest="command")
+    machine = argparse.ArgumentParser(add_help=False)
+    machine.add_argument("--mode", default="anbn", choices=bundled_modes(),
+                         help="bundled automaton (default: anbn)")
+    machine.add_argument("--definition", metavar="PATH",
+                         help="load the automaton from a JSON/YAML definition file instead")
+    run = commands.add_parser("run", parents=[machine],
+                              help="classify words, one per line, from files or stdin")
+    run.add_argument("--jobs", type=int, default=1, metavar="N",
+                     help="worker processes; 0 uses all cores (default: 1)")
+    run.add_argument("--summary", action="store_true",
+                     help="print accept/reject counts to stderr")
+    run.add_argument("--profile", metavar="PATH",
+                     help="step through every word and write per-transition hit counts and "
+                          "timings as JSON (deterministic automata, runs in one process)")
+    run.add_argument("files", nargs="*", metavar="FILE",
+                     help="word files; '-' or none reads stdin")
+    check = commands.add_parser("check", parents=[machine],
+                                help="treat each file as one word (memory-mapped; each byte is one "
+                                     "symbol, so only machines with ASCII input symbols)")
+    check.add_argument("files", nargs="+", metavar="FILE", help="files holding one word each")
+    record = commands.add_parser("record", parents=[machine],
+                                 help="run one word step by step and save a binary trace")
+    record.add_argument("-o", "--output", required=True, metavar="PATH",
+                        help="trace file to write (open it in the GUI with Load)")
+    record.add_argument("--word", help="the word itself instead of reading FILE")
+    record.add_argument("file", nargs="?", metavar="FILE",
+                        help="file holding the word; '-' or none reads stdin")
+    generate = commands.add_parser("generate", parents=[machine],
+                                   help="list accepted words, or sample accepted/rejected words")
+    generate.add_argument("--max-length", type=int, default=10, metavar="L",
+                          help="list all accepted words up to length L, shortest first "
+                               "(default: 10; with --sample the default length range is 0:L)")
+    generate.add_argument("--sample", type=int, metavar="N",
+                          help="draw N random words instead, uniformly among the words of each length")
+    generate.add_argument("--length", type=parse_lengths, metavar="N|A:B",
+                          help="length of sampled words, or a range to draw it from uniformly")
+    generate.add_argument("--rejected", action="store_true",
+                          help="sample words the automaton rejects (needs --sample)")
+    generate.add_argument("--seed", type=int, help="random seed (default: random)")
+    compare = commands.add_parser("compare", parents=[machine],
+                                  help="cross-check a grammar's PDA against an Earley parser")
+    compare.add_argument("--random", type=int, default=0, metavar="N",
+                         help="add N random words: half sampled uniformly from the grammar, "
+                              "half random strings over its terminals")
+    compare.add_argument("--max-length", type=int, default=12, metavar="L",
+                         help="maximum length of random words (default: 12)")
+    compare.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    compare.add_argument("files", nargs="*", metavar="FILE",
+                         help="word files; '-' reads stdin (default: stdin unless --random)")
+    return parser
 
 
-def main():
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == "run":
+            return run_cli(args)
+        if args.command == "check":
+            return check_cli(args)
+        if args.command == "record":
+            return record_cli(args)
+        if args.command == "generate":
+            return generate_cli(args)
+        if args.command == "compare":
+            return compare_cli(args)
+    except DefinitionError as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 2
+    
+    if tk is None:
+        print("error: the GUI needs tkinter; the subcommands (run, check, record, generate, "
+              "compare) work without it", file=sys.stderr)
+        return 2
     root = tk.Tk()
     app = KellerautomatGUI(root)
     root.mainloop()
 
 
 if __name__ == "__main__":
-    main()
+    multiprocessing.freeze_support()
+    sys.exit(main())
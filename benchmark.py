@@ -0,0 +1,263 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from typing import List
+
+from Kellerautomat import (Kellerautomat, ExplorationLimitError, RUNNING, bundled_modes,
+                           np)
+
+
+def _random_half(n: int) -> str:
+    """Reproduzierbare Zufallshälfte für Palindrome"""
+    rng = random.Random(n)
+    return "".join(rng.choice("ab") for _ in range(n))
+
+
+# Eingaben wachsender Größe je Modus: n -> Wort (akzeptiert, Stacktiefe ~ n)
+GENERATORS = {
+    "anbn": lambda n: "a" * n + "b" * n,
+    "klammern": lambda n: "(" * n + ")" * n,
+    "palindrom": lambda n: _random_half(n) + "#" + _random_half(n)[::-1],
+    "palindrom_nd": lambda n: _random_half(n) + _random_half(n)[::-1],
+    "ausdruck": lambda n: "(" * (n // 2) + "a" + "+a" * (n // 4) + ")" * (n // 2),
+}
+
+
+def sizes(limit: int) -> List[int]:
+    """Zehnerpotenzen von 10 bis limit"""
+    result = []
+    size = 10
+    while size <= limit:
+        result.append(size)
+        size *= 10
+    return result
+
+
+def best_of(function, repeat: int, min_time: float = 0.2):
+    """Schnellster Lauf: (Sekunden, Rückgabewert)
+
+    Mindestens repeat Läufe; kurze Messungen werden wiederholt, bis
+    min_time vergangen ist, damit kleine Eingaben nicht im Rauschen untergehen.
+    """
+    best = None
+    total = 0.0
+    runs = 0
+    while runs < repeat or total < min_time:
+        started = time.perf_counter()
+        value = function()
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best[0]:
+            best = (elapsed, value)
+        total += elapsed
+        runs += 1
+    return best
+
+
+def step_all(engine: Kellerautomat, word: str) -> str:
+    """Schrittweise Ausführung wie in der GUI, nur ohne Zeichnen"""
+    engine.reset(word)
+    result = engine.step()
+    while result == RUNNING:
+        result = engine.step()
+    return result
+
+
+def bench_engine(mode: str, max_size: int, max_step_size: int, max_nd_size: int,
+                 repeat: int, log=None) -> List[dict]:
+    """Schritte pro Sekunde eines Modus über wachsende Eingaben
+
+    Gemessen werden run() (kompilierte Tabelle, bei Ein-Zähler-Automaten
+    nur die Tiefe) und step() (der Pfad der schrittweisen GUI). Bei
+    nichtdeterministischen Automaten zählt steps die besuchten
+    Konfigurationen.
+    """
+    generate = GENERATORS[mode]
+    engine = Kellerautomat.from_mode(mode)
+    if engine.nondeterministic:
+        paths = [("run", engine.run, max_nd_size)]
+    else:
+        paths = [("run", engine.run, max_size),
+                 ("step", lambda word: step_all(engine, word), max_step_size)]
+    results = []
+    for path, function, limit in paths:
+        for size in sizes(limit):
+            word = generate(size)
+            try:
+                seconds, result = best_of(lambda: function(word), repeat)
+            except ExplorationLimitError:
+                seconds, result = None, "error"
+            entry = {
+                "mode": mode,
+                "path": path,
+                "size": size,
+                "length": len(word),
+                "result": result,
+                "steps": engine.steps,
+                "seconds": seconds,
+                "steps_per_second": engine.steps / seconds if seconds else None,
+            }
+            results.append(entry)
+            if log:
+                log(entry)
+    return results
+
+
+def bench_render(frames: int, log=None) -> dict:
+    """Kosten pro Frame von update_visualization und draw_stack (braucht ein Display)
+
+    Ohne Display (z. B. in CI ohne xvfb-run) wird übersprungen. Gezeichnet
+    wird nach jedem Schritt wie im animierten Modus, der Stack wächst
+    dabei auf etwa frames Elemente.
+    """
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as error:  # tk.TclError ohne Display, ImportError ohne Tk
+        return {"skipped": f"no display: {error}"}
+    from Kellerautomat import KellerautomatGUI
+
+    app = KellerautomatGUI(root)
+    root.update()
+    results = []
+    try:
+        for mode in bundled_modes():
+            if mode not in GENERATORS or Kellerautomat.from_mode(mode).nondeterministic:
+                continue
+            app.mode_var.set(mode)
+            app.change_automaton()
+            word = GENERATORS[mode](frames)
+            for name, draw in (("update_visualization", app.update_visualization),
+                               ("draw_stack", app.draw_stack)):
+                app.input_entry.delete(0, tk.END)
+                app.input_entry.insert(0, word)
+                app.reset_automaton()
+                root.update()
+                times = []
+                while len(times) < frames and app.advance_automaton(False, 0) == RUNNING:
+                    started = time.perf_counter()
+                    draw()
+                    root.update_idletasks()
+                    times.append(time.perf_counter() - started)
+                entry = {
+                    "mode": mode,
+                    "what": name,
+                    "frames": len(times),
+                    "depth": app.engine.stack.depth,
+                    "mean_ms": 1000 * sum(times) / max(1, len(times)),
+                    "max_ms": 1000 * max(times, default=0),
+                }
+                results.append(entry)
+                if log:
+                    log(entry)
+    finally:
+        root.destroy()
+    return {"results": results}
+
+
+def regressions(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Vergleicht mit einem früheren Bericht; liefert die deutlich langsameren Messungen"""
+    found = []
+    old = {(e["mode"], e["path"], e["size"]): e for e in baseline.get("engine", [])}
+    for entry in report["engine"]:
+        before = old.get((entry["mode"], entry["path"], entry["size"]))
+        if before and before["steps_per_second"] and entry["steps_per_second"]:
+            ratio = entry["steps_per_second"] / before["steps_per_second"]
+            if ratio < 1 - tolerance:
+                found.append(f"{entry['mode']} {entry['path']} n={entry['size']}: "
+                             f"{ratio:.2f}x steps/s")
+    old = {(e["mode"], e["what"]): e for e in baseline.get("render", {}).get("results", [])}
+    for entry in report["render"].get("results", []):
+        before = old.get((entry["mode"], entry["what"]))
+        if before and before["mean_ms"]:
+            ratio = entry["mean_ms"] / before["mean_ms"]
+            if ratio > 1 + tolerance:
+                found.append(f"{entry['mode']} {entry['what']}: {ratio:.2f}x ms/frame")
+    return found
+
+
+def print_entry(entry: dict):
+    """Fortschritt lesbar auf stderr (stdout bleibt für JSON frei)"""
+    if "path" in entry:
+        rate = f"{entry['steps_per_second']:>14,.0f} steps/s" if entry["steps_per_second"] else "         error"
+        print(f"{entry['mode']:<13} {entry['path']:<4} n={entry['size']:<9} {rate}", file=sys.stderr)
+    else:
+        print(f"{entry['mode']:<13} {entry['what']:<20} {entry['mean_ms']:8.3f} ms/frame "
+              f"(max {entry['max_ms']:.3f}, depth {entry['depth']})", file=sys.stderr)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the pushdown automaton engine and GUI rendering; "
+                    "results are written as JSON.")
+    parser.add_argument("--modes", nargs="+", metavar="MODE",
+                        help="modes to measure (default: all bundled modes with a generator)")
+    parser.add_argument("--max-size", type=int, default=10 ** 6, metavar="N",
+                        help="largest n for run() (default: 10^6, e.g. 10000000 for 10^7)")
+    parser.add_argument("--max-step-size", type=int, default=10 ** 5, metavar="N",
+                        help="largest n for step() (default: 10^5)")
+    parser.add_argument("--max-nd-size", type=int, default=10 ** 3, metavar="N",
+                        help="largest n for nondeterministic modes (default: 10^3)")
+    parser.add_argument("--repeat", type=int, default=3, metavar="R",
+                        help="runs per measurement, the fastest counts (default: 3)")
+    parser.add_argument("--frames", type=int, default=200, metavar="F",
+                        help="frames per rendering measurement (default: 200)")
+    parser.add_argument("--no-render", action="store_true", help="skip the rendering benchmark")
+    parser.add_argument("--output", metavar="PATH", help="write JSON here instead of stdout")
+    parser.add_argument("--baseline", metavar="PATH",
+                        help="earlier JSON report; exit 1 if anything got slower")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown against --baseline (default: 0.2 = 20%%)")
+    parser.add_argument("--quiet", action="store_true", help="no progress on stderr")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    log = None if args.quiet else print_entry
+    modes = args.modes or [mode for mode in bundled_modes() if mode in GENERATORS]
+    unknown = [mode for mode in modes if mode not in GENERATORS]
+    if unknown:
+        print(f"error: no input generator for {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "numpy": np is not None,
+            "repeat": args.repeat,
+        },
+        "engine": [],
+        "render": {"skipped": "--no-render"},
+    }
+    for mode in modes:
+        report["engine"] += bench_engine(mode, args.max_size, args.max_step_size,
+                                         args.max_nd_size, args.repeat, log)
+    if not args.no_render:
+        report["render"] = bench_render(args.frames, log)
+        if log and "skipped" in report["render"]:
+            print(f"render: skipped ({report['render']['skipped']})", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as stream:
+            stream.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as stream:
+            found = regressions(report, json.load(stream), args.tolerance)
+        for line in found:
+            print(f"regression: {line}", file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,431 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import Kellerautomat as K
+
+
+def run_without_tk(code: str) -> subprocess.CompletedProcess:
+    """Führt Python-Code aus, in dem `import tkinter` fehlschlägt (wie auf Builds ohne Tk)"""
+    prelude = f"import sys; sys.modules['tkinter'] = None; sys.path.insert(0, {ROOT!r})\n"
+    return subprocess.run([sys.executable, "-c", prelude + code], capture_output=True, text=True)
+
+
+def test_engine_and_cli_import_without_tk():
+    result = run_without_tk(
+        "import io, Kellerautomat as K\n"
+        "assert K.tk is None\n"
+        "assert K.Kellerautomat.from_mode('anbn').accepts('aabb')\n"
+        "sys.stdin = io.StringIO('ab\\naab\\n')\n"
+        "sys.exit(K.main(['run', '--mode', 'anbn']))\n")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == "accept\tab\nreject\taab\n"
+
+
+def test_gui_without_tk_fails_cleanly():
+    result = run_without_tk("import Kellerautomat as K; sys.exit(K.main([]))")
+    assert result.returncode == 2
+    assert "tkinter" in result.stderr
+
+
+class StubText:
+    """Gerade genug Text-Widget für LogView ohne Display"""
+
+    def __init__(self):
+        self.vbar = self
+        self.lines = 0
+
+    def set(self, first, last):
+        pass
+
+    def configure(self, **options):
+        pass
+
+    def insert(self, index, text):
+        self.lines += text.count("\n")
+
+    def delete(self, first, last=None):
+        pass
+
+    def see(self, index):
+        pass
+
+    def yview(self, *args):
+        return (0.0, 1.0)
+
+    def after_idle(self, callback):
+        pass
+
+
+def retained_per_step(steps: int) -> float:
+    """Bytes, die ein aufgezeichneter und geloggter Lauf pro Schritt festhält"""
+    import gc
+    import tracemalloc
+
+    engine = K.Kellerautomat.from_mode("klammern")
+    engine.reset("()" * (steps // 2))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        replay = K.Replay(engine)
+        log = K.LogView(StubText(), lambda step: replay.step_record(step)[0].symbol + "\n")
+        # Wie advance_automaton: Schritt, Aufzeichnung, Schrittnummer ins Log
+        result = K.RUNNING
+        while result == K.RUNNING:
+            logged = engine.steps
+            result = engine.step()
+            replay.record()
+            if engine.steps > logged:
+                log.append(engine.steps)
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert len(log.entries) == engine.steps
+    return retained / engine.steps
+
+
+def test_replay_and_log_memory_is_bounded():
+    # Kein Stack pro Schritt: Transitionsnummer im Replay, Schrittnummer im Log
+    # (je 4 Byte) plus ein Checkpoint alle 1024 Schritte
+    if K.tk is None:
+        pytest.skip("LogView braucht tkinter")
+    assert retained_per_step(20000) < 16
+    assert retained_per_step(80000) < 16
+
+
+def test_step_record_matches_live_run():
+    engine = K.Kellerautomat.from_mode("anbn")
+    live = []
+    engine.reset("a" * 1500 + "b" * 1500)
+    replay = K.Replay(engine, interval=64)
+    while True:
+        before = engine.stack
+        result = engine.step()
+        replay.record()
+        if engine.last_step is not None and engine.last_step.number > len(live):
+            live.append((engine.last_step, before.to_list()))
+        if result != K.RUNNING:
+            break
+    for step in [1, 2, 700, 64, 65, 3001, 3000, 1] + list(range(1490, 1510)):
+        record, before = replay.step_record(step)
+        expected, expected_before = live[step - 1]
+        assert (record.number, record.key, record.stack.to_list()) == (
+            expected.number, expected.key, expected.stack.to_list())
+        assert before.to_list() == expected_before
+    # Die angezeigte Engine bleibt stehen
+    assert engine.steps == len(replay)
+
+
+def test_grammar_with_all_bottom_symbols_gets_fresh_bottom():
+    definition = K.parse_definition({"grammar": {"start": "S", "rules": {"S": ["Z$⊥", ""]}}})
+    assert definition["initial_stack_symbol"] not in K.BOTTOM_SYMBOLS
+    engine = K.Kellerautomat.from_definition(definition)
+    assert engine.accepts("Z$⊥")
+    assert engine.accepts("")
+    assert not engine.accepts("Z$")
+
+
+def test_read_trace_decodes_without_copying_the_file(tmp_path):
+    # array('i') braucht 4 Byte pro Schritt; auf der Platte sind es mindestens
+    # 2 Byte, Spitzenbedarf also etwa 2x Dateigröße (ohne Kopie und Liste)
+    import tracemalloc
+
+    cycle = {(f"q{i}", "a", "Z"): (f"q{(i + 1) % 200}", ["Z"]) for i in range(200)}
+    cases = [(K.Kellerautomat.from_mode("klammern"), "(" * 100000 + ")" * 100000),
+             (K.Kellerautomat(cycle, ["q0"]), "a" * 100000)]  # Nummern >= 128: Varint-Weg
+    for engine, word in cases:
+        path = str(tmp_path / "run.pdat")
+        engine.record_trace(word, path)
+        expected = K.Replay.record_run(engine.clone(), word).transitions
+        tracemalloc.start()
+        try:
+            _, _, transitions, _ = K.read_trace(path)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert transitions == expected
+        assert peak < 3 * os.path.getsize(path)
+
+
+def test_definition_cache_keeps_labels_and_module_apart(tmp_path):
+    text = open(os.path.join(K.AUTOMATA_DIR, "anbn.json"), "rb").read()
+    data = json.loads(text)
+    data.pop("label", None)
+    for name in ("first.json", "second.json"):
+        (tmp_path / name).write_text(json.dumps(data))
+    cache = str(tmp_path / "cache")
+    for _ in range(2):  # zweiter Durchlauf aus dem Cache
+        assert K.load_definition(str(tmp_path / "first.json"), cache)["label"] == "first"
+        assert K.load_definition(str(tmp_path / "second.json"), cache)["label"] == "second"
+    assert len(os.listdir(cache)) == 2
+
+    # Als Skript gestartet landen die Pickles unter eigenem Schlüssel
+    script = os.path.join(ROOT, "Kellerautomat.py")
+    env = dict(os.environ, KELLERAUTOMAT_CACHE=cache)
+    subprocess.run([sys.executable, script, "run", "--definition", str(tmp_path / "first.json")],
+                   input="ab\n", capture_output=True, text=True, env=env, check=True)
+    assert len(os.listdir(cache)) == 3
+    definition = K.load_definition(str(tmp_path / "first.json"), cache)
+    assert type(definition["compiled"]) is K.CompiledTable
+
+
+def test_nondeterministic_stream_matches_accepts(tmp_path):
+    engine = K.Kellerautomat.from_mode("palindrom_nd")
+    path = str(tmp_path / "word.txt")
+    for word in ["", "a", "abba", "abab", "aabbaa", "ab" * 20 + "ba" * 20, "ab" * 20 + "b"]:
+        expected = engine.accepts(word)
+        chunks = [word[start:start + 3] for start in range(0, len(word), 3)]
+        assert engine.accepts_stream(iter(chunks), len(word)) == expected
+        assert engine.accepts_stream(iter(chunks)) == expected
+        with open(path, "w") as stream:
+            stream.write(word + "\n")
+        assert engine.accepts_file(path, chunk_size=4) == expected
+    with pytest.raises(ValueError):
+        engine.accepts_stream(iter(["ab", "ba"]), 7)
+
+
+def test_word_sampler_is_abstract():
+    with pytest.raises(TypeError):
+        K.WordSampler()
+    sampler = K.make_sampler(K.load_mode("anbn"))
+    assert isinstance(sampler, K.WordSampler)
+    assert list(sampler.words(6)) == ["ab", "aabb", "aaabbb"]
+
+
+def test_depth_limit_never_becomes_a_reject():
+    definition = K.parse_definition({"grammar": {"start": "S", "rules": {"S": ["aSb", ""]}}})
+    capped = K.Kellerautomat.from_definition(definition, max_depth=3)
+    assert capped.accepts("")
+    with pytest.raises(K.ExplorationLimitError):
+        capped.accepts("aabb")
+    assert K.Kellerautomat.from_definition(definition).accepts("aabb")
+
+    # Linksrekursion wächst nur bis zur Resteingabe: echte Ablehnungen bleiben REJECTED
+    expr = K.Kellerautomat.from_definition(K.parse_definition(
+        {"grammar": {"start": "E", "rules": {"E": ["E+T", "T"], "T": ["T*F", "F"], "F": ["(E)", "a"]}}}))
+    assert expr.accepts("a+a*(a)")
+    assert expr.run("a+") == K.REJECTED
+    assert expr.run("a+*a") == K.REJECTED
+
+
+def test_nullable_grammars_match_earley(tmp_path):
+    # Nullable Nichtterminale stapeln sich über jede Längengrenze hinaus;
+    # abgeschnittene Suchen entscheidet die Tripel-Grammatik exakt
+    import itertools
+
+    grammars = [{"S": ["AB"], "A": ["a", ""], "B": ["b", ""]},
+                {"S": ["Sa", "TT"], "T": ["", ""]},
+                {"S": ["S", "b", "TTT"], "T": ["", "ab", "b"]},
+                {"S": ["SS", "(S)", ""]}]
+    for rules in grammars:
+        definition = K.parse_definition({"grammar": {"start": "S", "rules": rules}})
+        engine = K.Kellerautomat.from_definition(definition)
+        parser = K.EarleyParser(definition["grammar"])
+        alphabet = definition["grammar"].terminals
+        for length in range(5):
+            for letters in itertools.product(alphabet, repeat=length):
+                word = "".join(letters)
+                assert engine.accepts(word) == parser.accepts(word), (rules, word)
+
+    path = tmp_path / "ab.json"
+    path.write_text(json.dumps({"grammar": {"start": "S", "rules": grammars[0]}}))
+    result = subprocess.run([sys.executable, os.path.join(ROOT, "Kellerautomat.py"), "compare",
+                             "--definition", str(path), "--random", "200", "--max-length", "6"],
+                            capture_output=True, text=True,
+                            env=dict(os.environ, KELLERAUTOMAT_CACHE=str(tmp_path / "cache")))
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "mismatches=0 errors=0" in result.stdout
+
+
+def test_long_epsilon_chains_close_without_recursion(tmp_path):
+    def chain(length, back_to=None):
+        transitions = [{"state": "q0", "input": "a", "top": "Z", "next": "p0", "push": ["Z"]}]
+        transitions += [{"state": f"p{i}", "input": "", "top": "Z", "next": f"p{i + 1}", "push": ["Z"]}
+                        for i in range(length)]
+        if back_to is not None:
+            transitions[-1]["next"] = back_to
+        return {"start_state": "q0", "initial_stack_symbol": "Z",
+                "accepting_states": [f"p{length}"], "transitions": transitions}
+
+    path = tmp_path / "chain.json"
+    for data, expected in [(chain(3000), K.ACCEPTED), (chain(3000, back_to="p0"), K.DIVERGED)]:
+        path.write_text(json.dumps(data))
+        definition = K.load_definition(str(path), str(tmp_path / "cache"))
+        engine = K.Kellerautomat.from_definition(definition)
+        assert engine.run("a") == expected
+        engine.begin()
+        engine.feed("a")
+        assert engine.finish() == expected
+
+
+def test_profile_counts_nondeterministic_runs(tmp_path):
+    words = tmp_path / "words.txt"
+    words.write_text("a+a*(a)\n(a\n")
+    profile = tmp_path / "profile.json"
+    subprocess.run([sys.executable, os.path.join(ROOT, "Kellerautomat.py"), "run", "--mode", "ausdruck",
+                    "--profile", str(profile), str(words)],
+                   capture_output=True, text=True, check=True,
+                   env=dict(os.environ, KELLERAUTOMAT_CACHE=str(tmp_path / "cache")))
+    data = json.loads(profile.read_text())
+    assert data["steps"] > 0 and data["configurations"] > 0 and data["max_depth"] > 1
+    assert sum(row["hits"] for row in data["transitions"]) == data["steps"]
+
+
+def test_accepts_batch_matches_run():
+    pytest.importorskip("numpy")
+    import itertools
+    import random
+
+    rng = random.Random(7)
+    for mode in K.bundled_modes():
+        engine = K.Kellerautomat.from_mode(mode)
+        if engine.nondeterministic:
+            continue
+        # Gemischte Längen, Fremdzeichen und Wörter, die früh steckenbleiben
+        alphabet = engine.input_alphabet + ["x"]
+        words = ["".join(letters) for length in range(6)
+                 for letters in itertools.product(alphabet, repeat=length)]
+        words += list(K.load_mode(mode).get("examples", []))
+        words += ["".join(rng.choice(alphabet) for _ in range(rng.randrange(40))) for _ in range(300)]
+        words += [example * 3 for example in K.load_mode(mode).get("examples", [])]
+        words += list(K.make_sampler(K.load_mode(mode)).words(12))
+        rng.shuffle(words)
+        expected = [engine.run(word) == K.ACCEPTED for word in words]
+        assert engine.accepts_batch(words) == expected, mode
+        assert engine.accepts_batch(words, batch_size=5) == expected, mode
+
+
+def test_samplers_agree_with_the_engine():
+    import itertools
+    import random
+
+    expr = K.parse_definition({"grammar": {"start": "E", "rules": {
+        "E": ["E+T", "T"], "T": ["T*F", "F"], "F": ["(E)", "a"]}}})
+    definitions = [K.load_mode(mode) for mode in K.bundled_modes()] + [expr]
+    for definition in definitions:
+        engine = K.Kellerautomat.from_definition(definition)
+        sampler = K.make_sampler(definition)
+        rng = random.Random(3)
+        lengths = range(11)
+        for word in itertools.islice(K.sample_accepted(sampler, lengths, rng), 40):
+            assert engine.accepts(word), word
+        for word in itertools.islice(K.sample_rejected(engine, lengths, rng), 40):
+            assert engine.run(word) == K.REJECTED, word
+
+    # Die Zählung stimmt mit der Aufzählung aller Wörter überein
+    for sampler in [K.make_sampler(expr), K.AutomatonSampler(K.Kellerautomat.from_definition(expr))]:
+        parser = K.EarleyParser(expr["grammar"])
+        for length in range(6):
+            words = ["".join(letters) for letters in itertools.product(sampler.alphabet, repeat=length)]
+            assert sampler.count(length) == sum(map(parser.accepts, words)), length
+
+
+def test_trace_aborted_by_an_exception_reads_as_incomplete(tmp_path):
+    engine = K.Kellerautomat.from_mode("anbn")
+    path = str(tmp_path / "aborted.pdat")
+    engine.reset("aabb")
+    with pytest.raises(KeyboardInterrupt):
+        with K.TraceWriter(path, engine) as writer:
+            engine.step()
+            writer.record()
+            raise KeyboardInterrupt
+    with pytest.raises(K.TraceError, match="unvollständig"):
+        K.read_trace(path)
+    assert engine.record_trace("aabb", path) == K.ACCEPTED
+    assert K.read_trace(path)[3] == K.ACCEPTED
+
+
+def test_byte_input_refuses_non_ascii_alphabets(tmp_path):
+    path = tmp_path / "word.txt"
+    path.write_text("(ä)\n", encoding="utf-8")
+    klammern = K.Kellerautomat.from_mode("klammern")
+    assert not klammern.accepts_file(str(path))
+    assert not klammern.accepts("(ä)")
+
+    data = {"start_state": "q0", "initial_stack_symbol": "Z", "accepting_states": ["q1"],
+            "transitions": [{"state": "q0", "input": "ä", "top": "Z", "next": "q1", "push": ["Z"]}]}
+    definition = tmp_path / "umlaut.json"
+    definition.write_text(json.dumps(data))
+    path.write_text("ä\n", encoding="utf-8")
+    engine = K.Kellerautomat.from_definition(K.parse_definition(data))
+    assert engine.accepts("ä")
+    with pytest.raises(ValueError):
+        engine.accepts_file(str(path))
+    result = subprocess.run([sys.executable, os.path.join(ROOT, "Kellerautomat.py"), "check",
+                             "--definition", str(definition), str(path)],
+                            capture_output=True, text=True,
+                            env=dict(os.environ, KELLERAUTOMAT_CACHE=str(tmp_path / "cache")))
+    assert result.returncode == 2 and "error:" in result.stderr
+
+
+def run_three_ways(engine, word):
+    """Ergebnis und Stack über step(), run() und feed()/finish()"""
+    outcomes = [run_plain(engine, word)]
+    engine.run(word)
+    outcomes.append((engine.result, engine.stack.depth, engine.stack.to_list()))
+    engine.begin()
+    for start in range(0, len(word), 3):
+        engine.feed(word[start:start + 3])
+    engine.finish()
+    outcomes.append((engine.result, engine.stack.depth, engine.stack.to_list()))
+    return outcomes
+
+
+def run_plain(engine, word):
+    """Lauf nur mit step()"""
+    engine.reset(word)
+    while engine.step() == K.RUNNING:
+        pass
+    return engine.result, engine.stack.depth, engine.stack.to_list()
+
+
+def stack_test_words(engine):
+    import itertools
+
+    words = ["".join(letters) for length in range(8)
+             for letters in itertools.product(engine.input_alphabet, repeat=length)]
+    return words + ["a" * 40 + "b" * 40, "(" * 40 + ")" * 39, "x"]
+
+
+def test_counter_stack_matches_plain_stack():
+    for mode in ("anbn", "klammern"):
+        counter = K.Kellerautomat.from_mode(mode)
+        counter.reset("")
+        assert type(counter.stack) is K.CounterStack
+        # Referenz: schrittweise mit gewöhnlichem StackNode
+        plain = K.Kellerautomat.from_mode(mode)
+        plain.counted_symbol = None
+        plain.reset("")
+        assert type(plain.stack) is K.StackNode
+        for word in stack_test_words(counter):
+            expected = run_plain(plain, word)
+            assert run_three_ways(counter, word) == [expected] * 3, (mode, word)
+
+
+def test_run_length_stack_matches_plain_stack():
+    for mode in ("anbn", "klammern"):
+        runs = K.Kellerautomat.from_definition(K.load_mode(mode), run_length=True)
+        runs.reset("")
+        assert type(runs.stack) is K.RunStack
+        plain = K.Kellerautomat.from_mode(mode)
+        plain.counted_symbol = None
+        for word in stack_test_words(runs):
+            expected = run_plain(plain, word)
+            assert run_three_ways(runs, word) == [expected] * 3, (mode, word)
+            # Umschalten mitten im Lauf ändert nichts am Ergebnis
+            runs.reset(word)
+            for _ in range(len(word) // 2):
+                runs.step()
+            runs.set_run_length(False)
+            while runs.step() == K.RUNNING:
+                pass
+            runs.set_run_length(True)
+            assert (runs.result, runs.stack.depth, runs.stack.to_list()) == expected, (mode, word)